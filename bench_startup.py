@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Startup budget check for the publisher CLIs.
+
+For each module it runs, in a fresh interpreter:
+  python -X importtime -c "import <module>"   -> cumulative import time (us)
+  python <module>.py --help                    -> wall time of a no-op invocation
+and asserts heavy/network modules (requests, urllib3, PIL) were not imported.
+
+Exit code 1 if any budget is exceeded, so cron / CI can gate on it:
+  python3 bench_startup.py [--budget-ms 60]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+MODULES = ["publish_ig_single", "publish_ig_carousel"]
+FORBIDDEN = ("requests", "urllib3", "PIL")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_profile(module: str) -> Tuple[int, Dict[str, int]]:
+    """Return (total cumulative us for `module`, {top-level package: cumulative us})."""
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    total = 0
+    per_pkg: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue
+        name = parts[2].strip()
+        if name == module:
+            total = cumulative
+        per_pkg[name.split(".")[0]] = max(per_pkg.get(name.split(".")[0], 0), cumulative)
+    return total, per_pkg
+
+
+def help_wall_ms(module: str, runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, f"{module}.py", "--help"], cwd=HERE,
+                       capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - t0) * 1000.0)
+    return best
+
+
+def bare_python_ms(runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - t0) * 1000.0)
+    return best
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=60.0, help="Max cumulative import time per module")
+    args = ap.parse_args(argv)
+
+    baseline = bare_python_ms()
+    failed = False
+    for mod in MODULES:
+        total_us, pkgs = import_profile(mod)
+        heavy = [p for p in FORBIDDEN if p in pkgs]
+        wall = help_wall_ms(mod)
+        ok = total_us / 1000.0 <= args.budget_ms and not heavy
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {mod:22s} import={total_us / 1000.0:7.1f}ms "
+              f"--help={wall:7.1f}ms (bare python {baseline:.1f}ms)"
+              + (f"  heavy imports: {', '.join(heavy)}" if heavy else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Local fake of the Instagram Graph endpoints the publishers use.
+
+Enforces a publishing quota (rolling window) and a call-rate limit, and sends
+X-App-Usage / X-Business-Use-Case-Usage headers like the real API, so the
+rate-limit handling in ig_graph / ig_ratelimit / ig_queue can be exercised
+without touching a real account.
+
+  python3 fake_graph.py --port 8765 --quota 3 --window 120 --calls 40 --call-window 60
+  META_GRAPH_BASE=http://127.0.0.1:8765/v22.0 META_ACCESS_TOKEN=x \\
+    INSTAGRAM_IG_BUSINESS_ID=17840000000000000 python3 publish_ig_single.py https://x/a.png "hi"
+
+Endpoints: POST /{ig}/media, GET /{container}?fields=status_code,
+POST /{ig}/media_publish, GET /{media}?fields=permalink,
+GET /{ig}/content_publishing_limit, GET /{ig}/media (listing),
+GET /{media}/insights, and batch POSTs to the API root (every item counts as
+a call). Containers become FINISHED after --ready-polls status checks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeGraph:
+    def __init__(self, quota: int, window_s: float, calls: int, call_window_s: float, ready_polls: int) -> None:
+        self.quota = quota
+        self.window_s = window_s
+        self.calls = calls
+        self.call_window_s = call_window_s
+        self.ready_polls = ready_polls
+        self.lock = threading.Lock()
+        self.ids = itertools.count(18000000000000001)
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.media: Dict[str, Dict[str, Any]] = {}
+        self.published_at: Dict[str, float] = {}
+        self.published: Deque[float] = deque()
+        self.call_times: Deque[float] = deque()
+
+    def _prune(self, now: float) -> None:
+        while self.published and self.published[0] <= now - self.window_s:
+            self.published.popleft()
+        while self.call_times and self.call_times[0] <= now - self.call_window_s:
+            self.call_times.popleft()
+
+    def usage_headers(self, ig: str, now: float) -> Dict[str, str]:
+        pct = min(100, int(100 * len(self.call_times) / max(self.calls, 1)))
+        regain = 0
+        if len(self.call_times) >= self.calls:
+            regain = max(1, int((self.call_times[0] + self.call_window_s - now + 59) // 60))
+        return {
+            "X-App-Usage": json.dumps({"call_count": pct, "total_cputime": pct // 2, "total_time": pct // 2}),
+            "X-Business-Use-Case-Usage": json.dumps({ig: [{
+                "type": "instagram", "call_count": pct, "total_cputime": pct // 2, "total_time": pct // 2,
+                "estimated_time_to_regain_access": regain,
+            }]}),
+        }
+
+    def handle(self, method: str, parts: List[str], args: Dict[str, str]) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        now = time.time()
+        with self.lock:
+            self._prune(now)
+            ig = parts[0] if parts else "0"
+            if len(self.call_times) >= self.calls:
+                return 400, {"error": {"message": "Application request limit reached", "type": "OAuthException",
+                                       "code": 4, "is_transient": True}}, self.usage_headers(ig, now)
+            self.call_times.append(now)
+            if method == "POST" and not parts and "batch" in args:
+                return self._batch(json.loads(args["batch"]), now) + (self.usage_headers(ig, now),)
+            headers = self.usage_headers(ig, now)
+            return self._route(method, parts, args, now) + (headers,)
+
+    def _batch(self, items: List[Dict[str, Any]], now: float) -> Tuple[int, Any]:
+        self.call_times.extend([now] * (len(items) - 1))
+        out = []
+        for item in items:
+            url = urlparse(item["relative_url"])
+            args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            status, body = self._route(item.get("method", "GET"), [p for p in url.path.split("/") if p], args, now)
+            out.append({"code": status, "body": json.dumps(body)})
+        return 200, out
+
+    def _route(self, method: str, parts: List[str], args: Dict[str, str], now: float) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET" and len(parts) == 2 and parts[1] == "content_publishing_limit":
+            return 200, {"data": [{"quota_usage": len(self.published),
+                                   "config": {"quota_total": self.quota, "quota_duration": int(self.window_s)}}]}
+        if method == "POST" and len(parts) == 2 and parts[1] == "media":
+            cid = str(next(self.ids))
+            self.containers[cid] = {"args": args, "polls": 0}
+            return 200, {"id": cid}
+        if method == "POST" and len(parts) == 2 and parts[1] == "media_publish":
+            c = self.containers.get(args.get("creation_id", ""))
+            if c is None:
+                return 400, {"error": {"message": "Invalid creation_id", "code": 100}}
+            if len(self.published) >= self.quota:
+                return 400, {"error": {"message": "The maximum number of posts that can be published has been reached",
+                                       "code": 9, "error_subcode": 2207042}}
+            self.published.append(now)
+            mid = str(next(self.ids))
+            self.published_at[mid] = now
+            self.media[mid] = {"permalink": f"https://www.instagram.com/p/FAKE{mid[-6:]}/",
+                               "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(now)),
+                               "media_type": "IMAGE"}
+            return 200, {"id": mid}
+        if method == "GET" and len(parts) == 2 and parts[1] == "media":
+            since = float(args.get("since", 0))
+            ids = [m for m in sorted(self.media, reverse=True) if self.published_at[m] >= since]
+            start = ids.index(args["after"]) + 1 if args.get("after") in ids else 0
+            page = ids[start:start + int(args.get("limit", 25))]
+            paging: Dict[str, Any] = {"cursors": {"after": page[-1]}} if page else {}
+            if page and start + len(page) < len(ids):
+                paging["next"] = "more"
+            return 200, {"data": [{"id": m, **self.media[m]} for m in page], "paging": paging}
+        if method == "GET" and len(parts) == 2 and parts[1] == "insights":
+            if parts[0] not in self.media:
+                return 400, {"error": {"message": f"Unknown media {parts[0]}", "code": 100}}
+            seed = int(parts[0]) % 997
+            return 200, {"data": [{"name": m, "period": "lifetime", "values": [{"value": seed * (i + 1)}]}
+                                  for i, m in enumerate(args.get("metric", "").split(",")) if m]}
+        if method == "GET" and len(parts) == 1:
+            if parts[0] in self.containers:
+                c = self.containers[parts[0]]
+                c["polls"] += 1
+                return 200, {"status_code": "FINISHED" if c["polls"] >= self.ready_polls else "IN_PROGRESS",
+                             "id": parts[0]}
+            if parts[0] in self.media:
+                return 200, {"id": parts[0], **self.media[parts[0]]}
+        return 404, {"error": {"message": f"Unsupported {method} /{'/'.join(parts)}", "code": 100}}
+
+
+def make_handler(graph: FakeGraph) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def _serve(self, method: str) -> None:
+            url = urlparse(self.path)
+            args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if method == "POST":
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+                args.update({k: v[-1] for k, v in parse_qs(body).items()})
+            # Drop the /vXX.X version prefix
+            parts = [p for p in url.path.split("/") if p]
+            if parts and parts[0].startswith("v") and parts[0][1:2].isdigit():
+                parts = parts[1:]
+            status, payload, headers = graph.handle(method, parts, args)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            self._serve("GET")
+
+        def do_POST(self) -> None:
+            self._serve("POST")
+
+        def log_message(self, fmt: str, *a: Any) -> None:
+            sys.stderr.write(f"[fake-graph] {self.command} {self.path.split('?')[0]} -> {a[1] if len(a) > 1 else ''}\n")
+
+    return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--quota", type=int, default=50, help="Posts per publishing window")
+    ap.add_argument("--window", type=float, default=86400, help="Publishing window (seconds)")
+    ap.add_argument("--calls", type=int, default=200, help="API calls per call window")
+    ap.add_argument("--call-window", type=float, default=3600, help="Call-rate window (seconds)")
+    ap.add_argument("--ready-polls", type=int, default=1, help="Status polls before a container is FINISHED")
+    args = ap.parse_args(argv)
+
+    graph = FakeGraph(args.quota, args.window, args.calls, args.call_window, args.ready_polls)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(graph))
+    print(f"fake Graph API on http://{args.host}:{args.port}/v22.0 "
+          f"(quota {args.quota}/{args.window:.0f}s, {args.calls} calls/{args.call_window:.0f}s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
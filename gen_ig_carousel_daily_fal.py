@@ -4,6 +4,26 @@
 - Uses fal.ai (flux/dev) to generate a background (style A/B blend)
 - Overlays crisp text/footer/disclaimer with Pillow
 - Saves slides to assets/ig/YYYY-MM-DD-AM-<slug>-S01..S0N.png
+  (--formats portrait,story adds -4x5 / -9x16 variants from the same background)
+- Incremental: slides whose inputs are unchanged (assets/ig/.build-index.json)
+  are skipped; copy edits re-use the cached background instead of a new fal call
+- New backgrounds come from the pre-generated pool (ig_pool.py) when it has
+  one for the theme/variant, so the 9AM run is normally compositing only
+- If fal misses the --deadline (or fails), slides get a procedural background
+  (ig_procedural.py) so the slot isn't missed; the build index marks them
+  fallback=true and the next run re-renders them with a real background
+- --preview renders a low-res contact sheet (ig_preview.py) with no network
+- Headline and sub sizes/line breaks are auto-fit to the template's safe area
+  (ig_text.fit_text); before anything else every slide is laid out for every
+  format, and copy that doesn't fit even at the minimum sizes exits 2 without
+  a fal call (--fit strict|off, --check)
+- Slides are rendered as a stream (ig_stream.py): each is written and
+  released as it finishes; --workers N composites and encodes in N
+  processes (backgrounds handed over through shared memory, ig_shm.py)
+  with at most --mem-budget MB of slides in flight
+- --animate gif|apng|frames also writes each slide as a short animation
+  (ig_animate.py: text fades in line by line over the still, glow pulse,
+  optional chart motif); frames are PNG sequences for ffmpeg / Reels
 
 This is designed to be called from the 9AM cron job.
 """
@@ -12,14 +32,31 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import functools
 import json
 import os
 import random
+import sys
+import time
 from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from PIL import Image, ImageDraw, ImageFont
 
-from ig_fal import generate_image
+import ig_analysis
+import ig_animate
+import ig_bgcache as bgcache
+import ig_compose
+import ig_pool as pool
+import ig_stream
+import ig_preview as preview
+import ig_procedural as procedural
+from ig_build import BuildIndex, fingerprint, font_id, source_hash
+from ig_compose import Canvas
+from ig_export import FORMATS, fal_image_size, fal_pixels, out_path, parse_formats
+from ig_fal import call_with_deadline, generate_images
+from ig_text import fit_text, text_bbox
+from ig_trace import run, span
 
 W = H = 1024
 
@@ -35,6 +72,7 @@ def pt_today() -> str:
     return dt.datetime.now().strftime("%Y-%m-%d")
 
 
+@functools.lru_cache(maxsize=None)
 def load_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
     candidates = [
         f"/System/Library/Fonts/{'SFProDisplay-Bold' if bold else 'SFProDisplay-Regular'}.otf",
@@ -155,27 +193,293 @@ def build_prompt(theme: str, variant: str) -> str:
     return prompt
 
 
-def main():
+# Text-safe area on the 1024px reference canvas: clear of the badge / slide
+# number row at the top and the footer rule (img_h - 94) at the bottom.
+# Headline and sub are auto-fit (ig_text.fit_text) between MIN and MAX;
+# the *_PT sizes are the as-authored sizes `--fit strict` checks against.
+HEADLINE_PT = 62
+HEADLINE_MIN_PT, HEADLINE_MAX_PT = 40, 72
+HEADLINE_MAX_LINES = 3
+SUB_PT = 28
+SUB_MIN_PT = 20
+SAFE_X = 52
+SAFE_TOP = 104
+SAFE_BOTTOM = 108
+PILL_PAD_X = 24
+PILL_PAD_Y = 12
+
+
+@dataclass
+class TextBlock:
+    lines: List[Tuple[str, int, int]]   # headline (text, width, height)
+    h_font: ImageFont.ImageFont
+    sub_font: ImageFont.ImageFont
+    sub_w: int
+    sub_h: int
+    top: int                            # y of the first headline line
+    height: int                         # headline lines + gaps + sub
+
+
+def _bold_font(size: int) -> ImageFont.ImageFont:
+    return load_font(size, bold=True)
+
+
+def layout_text(s: Slide, img_w: int, img_h: int, autofit: bool = True) -> TextBlock:
+    """Measure the headline + sub block of `s`, vertically centred on the canvas.
+
+    With `autofit`, the sub gets the largest size (<= SUB_PT) that keeps its
+    pill inside the safe width and the headline the largest size and line
+    breaks that fill the rest of the safe area; otherwise the as-authored
+    sizes and line breaks are measured.
+    """
+
+    k = img_w / W
+
+    def px(v: float) -> int:
+        return int(round(v * k))
+
+    max_w = img_w - 2 * px(SAFE_X)
+    if autofit:
+        sub = fit_text(s.sub, load_font, max_w - 2 * px(PILL_PAD_X), img_h, px(SUB_PT), px(SUB_MIN_PT), max_lines=1)
+        sub_font = sub.font
+        sb = text_bbox(s.sub, sub_font)
+        # The block is centred, so the tighter of the two safe margins applies to both
+        # ends; the sub pill pads below it, and after the last headline line come
+        # px(12) + px(24) + the sub
+        avail = img_h - 2 * max(px(SAFE_TOP), px(SAFE_BOTTOM) + px(PILL_PAD_Y)) - 1
+        box_h = avail - px(12) - px(24) - (sb[3] - sb[1])
+        fit = fit_text(s.headline, _bold_font, max_w, box_h, px(HEADLINE_MAX_PT), px(HEADLINE_MIN_PT),
+                       line_gap=px(12), max_lines=HEADLINE_MAX_LINES)
+        if not fit.fits:
+            fit = fit_text(s.headline, _bold_font, max_w, box_h, px(HEADLINE_MAX_PT), px(HEADLINE_MIN_PT),
+                           line_gap=px(12))
+        h_font, lines = fit.font, list(fit.lines)
+    else:
+        h_font, sub_font = load_font(px(HEADLINE_PT), bold=True), load_font(px(SUB_PT))
+        lines = []
+        for line in s.headline.split("\n"):
+            bb = text_bbox(line, h_font)
+            lines.append((line, bb[2] - bb[0], bb[3] - bb[1]))
+        sb = text_bbox(s.sub, sub_font)
+
+    total_h = sum(h + px(12) for _, _, h in lines)   # line gap
+    total_h += px(24)   # gap to sub
+    total_h += sb[3] - sb[1]
+    return TextBlock(lines, h_font, sub_font, sb[2] - sb[0], sb[3] - sb[1], (img_h - total_h) // 2, total_h)
+
+
+def fit_problems(s: Slide, size: Tuple[int, int], autofit: bool = True) -> List[str]:
+    """What of `s` would not fit the template's text-safe area at `size`."""
+
+    img_w, img_h = size
+    k = img_w / W
+    max_w = img_w - 2 * int(round(SAFE_X * k))
+    block = layout_text(s, img_w, img_h, autofit)
+    problems = [f"headline line {line!r} is {w}px wide (max {max_w}px)" for line, w, _ in block.lines if w > max_w]
+    pill_w = block.sub_w + 2 * int(round(PILL_PAD_X * k))
+    if pill_w > max_w:
+        problems.append(f"sub {s.sub!r} needs {pill_w}px (max {max_w}px)")
+    top, bottom = int(round(SAFE_TOP * k)), img_h - int(round(SAFE_BOTTOM * k))
+    if block.top < top or block.top + block.height + int(round(PILL_PAD_Y * k)) > bottom:
+        problems.append(f"text block is {block.height}px tall (max {bottom - top}px)")
+    return problems
+
+
+def preflight(slides: List[Slide], formats: List[str], fix: bool = True) -> List[str]:
+    """Check every slide against every export size before any network call.
+
+    With `fix` the check is of the auto-fit layout (what gets rendered), so
+    only copy that overflows even at the minimum sizes is reported; without
+    it, of the as-authored sizes and line breaks. Returns one line per problem.
+    """
+
+    problems = []
+    for s in slides:
+        for fmt in formats:
+            problems += [f"S{s.number:02d} {fmt}: {p}" for p in fit_problems(s, FORMATS[fmt][:2], autofit=fix)]
+    return problems
+
+
+def compose_slide(img: Image.Image, s: Slide, idx: int, total: int, theme: str, text: bool = True) -> Image.Image:
+    """Draw badge, headline, sub pill, slide number and footer onto `img`.
+
+    Layout is authored on the 1024px reference canvas and scaled by the
+    canvas width, so the same call works for 1:1, 4:5 and 9:16 exports:
+    header elements anchor to the top, the text block to the vertical
+    centre and the footer to the bottom. The text block moves (and gets a
+    scrim / light ink) only where ig_analysis finds the background busy or dark.
+    text=False leaves out the text block (the static base of ig_animate).
+    """
+
+    img_w, img_h = img.size
+    k = img_w / W
+
+    def px(v: float) -> int:
+        return int(round(v * k))
+
+    badge_font = load_font(px(19), bold=True)
+    footer_font = load_font(px(21), bold=True)
+    disc_font = load_font(px(16), bold=False)
+
+    # TEXT LAYOUT (Vertical Center, unless the background is busy there)
+    bg_stats = ig_analysis.analyze(img)
+    block = layout_text(s, img_w, img_h)
+    h_font, sub_font = block.h_font, block.sub_font
+    block_w = max([w for _, w, _ in block.lines] + [block.sub_w + 2 * px(PILL_PAD_X)])
+    spot = ig_analysis.place(img, (block_w, block.height + px(PILL_PAD_Y)), block.top,
+                             px(SAFE_TOP), img_h - px(SAFE_BOTTOM), analysis=bg_stats, ink=INK)
+
+    canvas = Canvas(img)
+
+    # badge
+    theme_label = theme.upper().replace("_", " ")
+    badge = f"NEURAL-ENGINE  |  {theme_label}"
+    bb = badge_font.getbbox(badge)
+    bw = (bb[2] - bb[0]) + px(36)
+    bh = px(36)
+    bx = (img_w - bw) // 2
+    canvas.rounded_rectangle([bx, px(48), bx + bw, px(48) + bh], radius=px(18), fill=(*ACCENT2, 40), outline=(*ACCENT2, 140), width=1)
+    canvas.text(((img_w - (bb[2]-bb[0]))//2, px(56)), badge, font=badge_font, fill=ACCENT1)
+
+    if text:
+        # Draw Headline
+        y = spot.top
+        if spot.scrim and block.lines:
+            head_h = sum(h + px(12) for _, _, h in block.lines)
+            hx = (img_w - max(w for _, w, _ in block.lines)) // 2
+            canvas.flush()
+            ig_analysis.scrim(img, (hx - px(24), y - px(12), img_w - hx + px(24), y + head_h),
+                              spot.scrim_color, spot.scrim, px(20))
+        for line, w, h in block.lines:
+            canvas.text(((img_w - w)//2, y), line, font=h_font, fill=spot.ink)
+            y += h + px(12)
+
+        # Draw Sub (with pill)
+        y += px(12)
+        # Pill background for sub (Light grey/blue for contrast)
+        pill_pad_x = px(PILL_PAD_X)
+        pill_pad_y = px(PILL_PAD_Y)
+        sub_w, sub_h = block.sub_w, block.sub_h
+        pill_x = (img_w - sub_w) // 2
+        canvas.rounded_rectangle(
+            [pill_x - pill_pad_x, y - pill_pad_y, pill_x + sub_w + pill_pad_x, y + sub_h + pill_pad_y],
+            radius=px(16),
+            fill=(243, 244, 246, 255) # Gray-100
+        )
+        canvas.text(((img_w - sub_w)//2, y), s.sub, font=sub_font, fill=ACCENT2)
+
+    # slide number
+    num = f"{idx:02d}/{total:02d}"
+    nf = load_font(px(18), bold=True)
+    nb = nf.getbbox(num)
+    canvas.rounded_rectangle([px(48), px(52), px(48) + (nb[2]-nb[0]) + px(22), px(52) + px(30)], radius=px(15), fill=(255, 255, 255, 220), outline=(229, 231, 235, 255), width=1)
+    canvas.text((px(58), px(57)), num, font=nf, fill=GREY)
+
+    # footer
+    brand_y = img_h - px(80)
+    canvas.line([(px(52), brand_y - px(14)), (img_w - px(52), brand_y - px(14))], fill=(229, 231, 235, 255), width=1)
+    brand_ink = ig_analysis.ink_for(bg_stats, (px(52), brand_y, px(260), brand_y + px(28)))
+    canvas.text((px(52), brand_y), "NEURAL-ENGINE", font=footer_font, fill=brand_ink)
+    disc = "Not financial advice. Trade responsibly."
+    db = disc_font.getbbox(disc)
+    canvas.text((img_w - (db[2]-db[0]) - px(52), brand_y + px(4)), disc, font=disc_font, fill=GREY)
+
+    return canvas.flatten()
+
+
+def slide_fingerprint(s: Slide, idx: int, total: int, theme: str, bg_sha: Optional[str], size: Tuple[int, int]) -> str:
+    """Build-index fingerprint of everything that affects one rendered slide."""
+
+    return fingerprint(
+        template=source_hash(compose_slide, layout_text, fit_text, ig_analysis, ig_compose), headline=s.headline, sub=s.sub, idx=idx, total=total,
+        theme=theme, fonts=[font_id(load_font(HEADLINE_MAX_PT, bold=True)), font_id(load_font(SUB_PT))],
+        bg=bg_sha, size=list(size),
+    )
+
+
+def fetch_backgrounds(theme: str, variants: List[str], fal_size: Union[str, Dict[str, int]]) -> List[str]:
+    """Generate one new background per entry of `variants`; returns bgcache shas in order.
+
+    Slides sharing a variant share a prompt, so each variant is a single
+    batched fal request (num_images) instead of one round trip per slide.
+    """
+
+    shas: List[Optional[str]] = [None] * len(variants)
+    for variant in sorted(set(variants)):
+        positions = [i for i, v in enumerate(variants) if v == variant]
+        with span("slide.background", variant=variant, slides=len(positions), source="fal"):
+            images = generate_images(prompt=build_prompt(theme=theme, variant=variant), model="fal-ai/flux/dev",
+                                     image_size=fal_size, num_images=len(positions))
+            for i, img in zip(positions, images):
+                shas[i] = bgcache.put(img)
+    return shas
+
+
+def compose_job(bg: Image.Image, s: Slide, idx: int, total: int, theme: str, fmt: str) -> Image.Image:
+    """ig_stream Job.render for one slide in one format."""
+
+    with span("slide.composite", slide=idx, format=fmt):
+        return compose_slide(bg, s, idx, total, theme)
+
+
+def render_preview(date: str, slug: str, theme: str, slides: List[Slide], formats: List[str], scale: float) -> None:
+    """Reduced-scale render into the ig_preview contact sheet.
+
+    Uses the background each slide was last built with, else a procedural
+    placeholder; no fal/pool calls, nothing written to assets/ig or the index.
+    """
+
+    index = BuildIndex("assets/ig")
+    with preview.session(os.path.join(preview.PREVIEW_DIR, f"{date}-AM-{slug}.png"), title=f"{date} AM {slug}"):
+        for idx, s in enumerate(slides, start=1):
+            base = f"assets/ig/{date}-AM-{slug}-S{idx:02d}.png"
+            for fmt in formats:
+                full = FORMATS[fmt][:2]
+                prev = index.get(out_path(base, fmt))
+                sha = prev.get("bg") if prev.get("theme") == theme else None
+                bg = preview.background(sha, full, preview.scaled(full, scale), theme, prev.get("variant", "A"), idx)
+                preview.add(f"{date} AM {slug} S{idx:02d} {fmt}", compose_slide(bg, s, idx, len(slides), theme))
+
+
+def main(argv: Optional[List[str]] = None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--date", default=pt_today())
     ap.add_argument("--slug", default="daily")
     ap.add_argument("--theme", default="workflow")
     ap.add_argument("--slides", type=int, default=4)
     ap.add_argument("--content", help="Path to JSON file with slide content [{'headline': '...', 'sub': '...'}, ...]")
-    args = ap.parse_args()
+    ap.add_argument("--formats", default="square", help=f"Comma list of {','.join(FORMATS)} (one fal call per slide)")
+    ap.add_argument("--force", action="store_true", help="Ignore the build index and cached backgrounds")
+    ap.add_argument("--no-pool", action="store_true", help="Always call fal instead of using pre-generated backgrounds")
+    ap.add_argument("--deadline", type=float, default=float(os.environ.get("IG_FAL_DEADLINE_S", "90")),
+                    help="Seconds to wait for fal before rendering procedural backgrounds")
+    ap.add_argument("--preview", action="store_true", help="Low-res contact sheet only; no fal calls, no assets written")
+    ap.add_argument("--preview-scale", type=float, default=preview.DEFAULT_SCALE)
+    ap.add_argument("--fit", choices=["fix", "strict", "off"], default="fix",
+                    help="Pre-flight text fit: auto-fit sizes/line breaks (fix), require the authored layout to fit (strict), or skip")
+    ap.add_argument("--check", action="store_true", help="Run the text fit pre-flight only and exit")
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("IG_RENDER_WORKERS", "1")),
+                    help="Composite/encode slides in this many processes (backgrounds shared via ig_shm)")
+    ap.add_argument("--mem-budget", type=int, default=ig_stream.DEFAULT_BUDGET_MB,
+                    help="MB of in-flight slides allowed with --workers (ig_stream)")
+    ap.add_argument("--animate", choices=ig_animate.KINDS,
+                    help="Also write an animated version of each slide (ig_animate.py)")
+    ap.add_argument("--anim-seconds", type=float, default=ig_animate.DEFAULT_SECONDS)
+    ap.add_argument("--anim-fps", type=int, default=ig_animate.DEFAULT_FPS)
+    ap.add_argument("--anim-effects", default=",".join(ig_animate.DEFAULT_EFFECTS),
+                    help=f"Comma list of {','.join(ig_animate.EFFECTS)}")
+    ap.add_argument("--anim-workers", type=int, default=ig_animate.DEFAULT_WORKERS,
+                    help="Processes rendering animation frames")
+    args = ap.parse_args(argv)
+    deadline = time.monotonic() + args.deadline
 
     date = args.date
     slug = args.slug
     theme = args.theme
+    formats = parse_formats(args.formats)
+    fal_size = fal_image_size(formats)
 
     # A/B blend: 70% A, 30% B per slide
-    os.makedirs("assets/ig", exist_ok=True)
-
-    badge_font = load_font(19, bold=True)
-    h_font = load_font(62, bold=True)
-    sub_font = load_font(28, bold=False)
-    footer_font = load_font(21, bold=True)
-    disc_font = load_font(16, bold=False)
 
     slides = []
     if args.content and os.path.exists(args.content):
@@ -195,93 +499,115 @@ def main():
             base_slides = DEFAULT_SLIDES
         slides = base_slides[: args.slides]
 
-    for idx, s in enumerate(slides, start=1):
-        variant = "A" if random.random() < 0.7 else "B"
-        prompt = build_prompt(theme=theme, variant=variant)
-        bg = generate_image(prompt=prompt, model="fal-ai/flux/dev", image_size="square_hd")
-        bg = bg.resize((W, H))
-
-        draw = ImageDraw.Draw(bg)
-
-        # badge
-        theme_label = theme.upper().replace("_", " ")
-        badge = f"NEURAL-ENGINE  |  {theme_label}"
-        bb = badge_font.getbbox(badge)
-        bw = (bb[2] - bb[0]) + 36
-        bh = 36
-        bx = (W - bw) // 2
-        draw.rounded_rectangle([bx, 48, bx + bw, 48 + bh], radius=18, fill=(*ACCENT2, 40), outline=(*ACCENT2, 140), width=1)
-        draw.text(((W - (bb[2]-bb[0]))//2, 56), badge, font=badge_font, fill=ACCENT1)
-
-        # TEXT LAYOUT (Vertical Center)
-        # Calculate total height of text block first
-        total_h = 0
-        headline_lines = s.headline.split("\n")
-        
-        # Measure headline
-        h_metrics = []
-        for line in headline_lines:
-            bb = h_font.getbbox(line)
-            h_metrics.append((line, bb[2]-bb[0], bb[3]-bb[1]))
-            total_h += (bb[3]-bb[1]) + 12 # line gap
-        
-        total_h += 24 # gap to sub
-        
-        # Measure sub
-        sb = sub_font.getbbox(s.sub)
-        sub_w = sb[2] - sb[0]
-        sub_h = sb[3] - sb[1]
-        total_h += sub_h
-        
-        # Start Y position for vertical centering
-        start_y = (H - total_h) // 2
-        
-        # Optional: Add a subtle gradient/blur backing behind text for readability?
-        # For now, let's just use a semi-transparent dark box if background is busy
-        # But we don't know if bg is busy. Let's assume the prompt handles "clean area".
-        # Better: Drop shadow for text.
-
-        # Draw Headline
-        y = start_y
-        for line, w, h in h_metrics:
-            # No shadow needed for clean white background, maybe subtle glow if needed
-            # draw.text(((W - w)//2 + 2, y + 2), line, font=h_font, fill=(200,200,200)) 
-            # Text (Dark Ink)
-            draw.text(((W - w)//2, y), line, font=h_font, fill=INK)
-            y += h + 12
-        
-        # Draw Sub (with pill)
-        y += 12
-        # Pill background for sub (Light grey/blue for contrast)
-        pill_pad_x = 24
-        pill_pad_y = 12
-        pill_x = (W - sub_w) // 2
-        draw.rounded_rectangle(
-            [pill_x - pill_pad_x, y - pill_pad_y, pill_x + sub_w + pill_pad_x, y + sub_h + pill_pad_y],
-            radius=16,
-            fill=(243, 244, 246, 255) # Gray-100
-        )
-        draw.text(((W - sub_w)//2, y), s.sub, font=sub_font, fill=ACCENT2)
-
-        # slide number
-        num = f"{idx:02d}/{len(slides):02d}"
-        nf = load_font(18, bold=True)
-        nb = nf.getbbox(num)
-        draw.rounded_rectangle([48, 52, 48 + (nb[2]-nb[0]) + 22, 52 + 30], radius=15, fill=(255, 255, 255, 220), outline=(229, 231, 235, 255), width=1)
-        draw.text((58, 57), num, font=nf, fill=GREY)
+    # Bad copy is cheaper to catch here than after paying for backgrounds
+    if args.fit != "off":
+        problems = preflight(slides, formats, fix=args.fit == "fix")
+        for p in problems:
+            print(f"Text fit: {p}", file=sys.stderr)
+        if problems:
+            return 2
+    if args.check:
+        return 0
 
-        # footer
-        brand_y = H - 80
-        draw.line([(52, brand_y - 14), (W - 52, brand_y - 14)], fill=(229, 231, 235, 255), width=1)
-        draw.text((52, brand_y), "NEURAL-ENGINE", font=footer_font, fill=INK)
-        disc = "Not financial advice. Trade responsibly."
-        db = disc_font.getbbox(disc)
-        draw.text((W - (db[2]-db[0]) - 52, brand_y + 4), disc, font=disc_font, fill=GREY)
+    if args.preview:
+        render_preview(date, slug, theme, slides, formats, args.preview_scale)
+        return
 
-        out = f"assets/ig/{date}-AM-{slug}-S{idx:02d}.png"
-        bg.convert("RGB").save(out, "PNG")
-        print(f"Saved: {out} (variant={variant})")
+    os.makedirs("assets/ig", exist_ok=True)
+    index = BuildIndex("assets/ig")
 
+    with run("gen_ig_carousel_daily_fal", date=date, slug=slug, theme=theme, slides=len(slides)):
+        try:
+            # Pass 1: which slides need rendering, and from which background
+            plan = []
+            for idx, s in enumerate(slides, start=1):
+                base = f"assets/ig/{date}-AM-{slug}-S{idx:02d}.png"
+                outs = {fmt: out_path(base, fmt) for fmt in formats}
+
+                # Reuse the cached background this slide was last rendered with
+                # (never a procedural fallback: those get upgraded on the next run)
+                prev = next((e for e in map(index.get, outs.values()) if e.get("theme") == theme), {})
+                bg_sha = None if args.force or prev.get("fallback") else prev.get("bg")
+
+                if bg_sha and all(
+                    index.fresh(outs[f], slide_fingerprint(s, idx, len(slides), theme, bg_sha, FORMATS[f][:2]))
+                    for f in formats
+                ):
+                    print(f"Up to date: {base}")
+                    continue
+
+                if bgcache.has(bg_sha):
+                    variant = prev.get("variant", "A")
+                else:
+                    variant = "A" if random.random() < 0.7 else "B"
+                    with span("slide.pool", slide=idx, variant=variant) as a:
+                        bg_sha = None if args.no_pool else pool.pop("carousel", theme, variant, fal_size)
+                        a["hit"] = bg_sha is not None
+                plan.append({"idx": idx, "slide": s, "outs": outs, "bg": bg_sha, "variant": variant, "fallback": False})
+
+            # Pass 2: everything still missing a background, one fal call per variant,
+            # bounded by the run's deadline (procedural backgrounds after that)
+            missing = [p for p in plan if p["bg"] is None]
+            if missing:
+                variants = [p["variant"] for p in missing]
+
+                def keep_late(shas: List[str]) -> None:
+                    # Too late for this run: offer them to the next one via the pool
+                    for v, sha in zip(variants, shas):
+                        pool.push("carousel", theme, v, fal_size, sha)
+                    print(f"Late fal backgrounds added to the pool: {len(shas)}", flush=True)
+
+                try:
+                    shas = call_with_deadline(lambda: fetch_backgrounds(theme, variants, fal_size),
+                                              deadline - time.monotonic(), on_late=keep_late)
+                except Exception as e:
+                    print(f"fal unavailable ({e}); using procedural backgrounds")
+                    with span("slide.background", slides=len(missing), source="procedural", error=str(e)[:200]):
+                        shas = [
+                            bgcache.put(procedural.render(fal_pixels(fal_size), theme, p["variant"], seed=p["idx"]))
+                            for p in missing
+                        ]
+                    for p in missing:
+                        p["fallback"] = True
+                for p, sha in zip(missing, shas):
+                    p["bg"] = sha
+
+            # Pass 3: composite + encode, streamed: only in-flight slides are held in memory
+            def stale() -> Iterator[ig_stream.Job]:
+                for p in plan:
+                    for fmt in formats:
+                        size = FORMATS[fmt][:2]
+                        out = p["outs"][fmt]
+                        fp = slide_fingerprint(p["slide"], p["idx"], len(slides), theme, p["bg"], size)
+                        if not index.fresh(out, fp):
+                            yield ig_stream.Job(out, size, compose_job, functools.partial(bgcache.fitted, p["bg"], size),
+                                                (p["slide"], p["idx"], len(slides), theme, fmt), meta=(p, fp))
+
+            for job, sha, changed in ig_stream.render(stale(), args.workers, args.mem_budget):
+                p, fp = job.meta
+                variant = p["variant"]
+                index.record(job.out, fp, sha, bg=p["bg"], variant=variant, theme=theme, slug=slug, date=date,
+                             slide=p["idx"], fallback=p["fallback"])
+                print(f"{'Saved' if changed else 'Unchanged'}: {job.out} "
+                      f"(variant={variant}{', procedural fallback' if p['fallback'] else ''})")
+
+            # Pass 4: animated versions, from the background each still was built with
+            if args.animate:
+                effects = [e.strip() for e in args.anim_effects.split(",") if e.strip()]
+                for idx, s in enumerate(slides, start=1):
+                    base = f"assets/ig/{date}-AM-{slug}-S{idx:02d}.png"
+                    for fmt in formats:
+                        still = out_path(base, fmt)
+                        bg_sha = index.get(still).get("bg")
+                        if not bgcache.has(bg_sha):
+                            print(f"Not animated (no cached background): {still}")
+                            continue
+                        compose = functools.partial(compose_slide, s=s, idx=idx, total=len(slides), theme=theme)
+                        ig_animate.export(index, still, bgcache.fitted(bg_sha, FORMATS[fmt][:2]), compose, args.animate,
+                                          args.anim_seconds, args.anim_fps, effects, args.anim_workers,
+                                          glow_color=ACCENT1, seed=idx)
+        finally:
+            index.save()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -4,9 +4,13 @@ Neural-Engine IG Single — 2026-02-25 PM
 Theme: FAQ — "How does Neural-Engine actually work?"
 """
 
-import os, sys, textwrap, math
+import functools, os, sys, textwrap, math
 from PIL import Image, ImageDraw, ImageFont
 
+import ig_preview
+from ig_compose import Canvas
+from ig_text import fit_text
+
 OUT_PATH = "assets/ig/2026-02-25-PM-faq-how-it-works.png"
 W, H = 1024, 1024
 
@@ -42,6 +46,7 @@ def glow_circle(draw, cx, cy, r, color, steps=8):
         box = [cx-radius, cy-radius, cx+radius, cy+radius]
         draw.ellipse(box, fill=(*color[:3], alpha))
 
+@functools.lru_cache(maxsize=None)
 def load_font(size, bold=False):
     candidates = [
         f"/System/Library/Fonts/{'SFProDisplay-Bold' if bold else 'SFProDisplay-Regular'}.otf",
@@ -57,6 +62,9 @@ def load_font(size, bold=False):
                 pass
     return ImageFont.load_default()
 
+def bold_font(size):
+    return load_font(size, bold=True)
+
 def centered_text(draw, text, y, font, fill, max_w=900, line_spacing=8):
     words = text.split()
     lines, cur = [], ""
@@ -109,12 +117,10 @@ def draw_faq_card(draw, x, y, w, h, q, a, q_font, a_font):
 img = Image.new("RGBA", (W, H), (0,0,0,255))
 draw_gradient(img)
 
-overlay = Image.new("RGBA", (W, H), (0,0,0,0))
-od = ImageDraw.Draw(overlay)
-draw_grid(od)
-img = Image.alpha_composite(img, overlay)
-
-draw = ImageDraw.Draw(img)
+# Translucent fills blend through the canvas (ImageDraw alone would
+# overwrite the background with their alpha)
+draw = Canvas(img)
+draw_grid(draw)
 
 # decorative glows
 glow_circle(draw, 820, 160, 80, ACCENT2, steps=10)
@@ -130,8 +136,8 @@ draw.rounded_rectangle([(W-bw)//2-2, 52, (W+bw)//2+2, 52+bh],
 draw.text(((W - (bx[2]-bx[0]))//2, 60), badge_text, font=badge_font, fill=WHITE)
 
 # ── Headline ──────────────────────────────────────────────────────────────────
-h1_font = load_font(68, bold=True)
 h1 = "How Does It Work?"
+h1_font = fit_text(h1, bold_font, W - 120, 90, 68, 44, max_lines=1).font
 bx = h1_font.getbbox(h1)
 draw.text(((W-(bx[2]-bx[0]))//2, 110), h1, font=h1_font, fill=WHITE)
 
@@ -143,8 +149,10 @@ sbx = sub_font.getbbox(sub)
 draw.text(((W-(sbx[2]-sbx[0]))//2, sub_y), sub, font=sub_font, fill=GREY)
 
 # ── FAQ Cards ─────────────────────────────────────────────────────────────────
-q_font = load_font(26, bold=True)
-a_font = load_font(24)
+# One size per role for all cards: the largest at which every row fits one line
+text_w = W - 120 - 52 - 20
+q_font = bold_font(min(fit_text(q, bold_font, text_w, 40, 26, 18, max_lines=1).size for q, _ in FAQS))
+a_font = load_font(min(fit_text(a, load_font, text_w, 40, 24, 16, max_lines=1).size for _, a in FAQS))
 card_y = sub_y + 55
 card_h = 110
 gap = 24
@@ -158,8 +166,8 @@ cta_y = card_y + 24
 draw.rounded_rectangle([60, cta_y, W-60, cta_y+72], radius=16,
                         fill=(*ACCENT1[:3], 30),
                         outline=(*ACCENT1[:3], 120), width=2)
-cta_font = load_font(30, bold=True)
 cta_text = "Join the Waitlist  →  neural-engine.tech"
+cta_font = fit_text(cta_text, bold_font, W - 120 - 40, 44, 30, 20, max_lines=1).font
 ctax = cta_font.getbbox(cta_text)
 draw.text(((W-(ctax[2]-ctax[0]))//2, cta_y+18), cta_text, font=cta_font, fill=ACCENT1)
 
@@ -176,7 +184,8 @@ draw.text((W-(dbx[2]-dbx[0])-60, brand_y+4), disc_text, font=disc_font, fill=GRE
 # thin separator line
 draw.line([(60, brand_y-14),(W-60, brand_y-14)], fill=(*ACCENT2[:3], 80), width=1)
 
-img = img.convert("RGB")
+img = draw.flatten().convert("RGB")
 os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
-img.save(OUT_PATH, "PNG")
-print(f"Saved: {OUT_PATH}")
+ig_preview.save(img, OUT_PATH, "PNG")
+if not ig_preview.enabled():
+    print(f"Saved: {OUT_PATH}")
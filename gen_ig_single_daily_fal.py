@@ -2,18 +2,43 @@
 """Neural-Engine IG Single (daily PM) — fal.ai background + Pillow text.
 
 Saves: assets/ig/YYYY-MM-DD-PM-<slug>.png
+       (+ -4x5 / -9x16 / -1080 variants with --formats)
+
+If fal misses the --deadline (or fails) a procedural background
+(ig_procedural.py) is used so the post still ships; the build index marks it
+fallback=true, the late fal result goes to the pool, and the next run
+re-renders with it.
+
+--preview renders a low-res contact sheet (ig_preview.py) with no network.
+--animate gif|apng|frames also writes an animated version per format
+(ig_animate.py), e.g. PNG frames for a Reel.
 """
 
 from __future__ import annotations
 
 import argparse
 import datetime as dt
+import functools
 import os
 import random
-
-from PIL import Image, ImageDraw, ImageFont
-
-from ig_fal import generate_image
+import time
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageFont
+
+import ig_analysis
+import ig_animate
+import ig_bgcache as bgcache
+import ig_compose
+import ig_pool as pool
+import ig_preview as preview
+import ig_procedural as procedural
+from ig_build import BuildIndex, fingerprint, font_id, source_hash, write_png
+from ig_compose import Canvas
+from ig_export import FORMATS, fal_image_size, fal_pixels, out_path, parse_formats
+from ig_fal import call_with_deadline, generate_image
+from ig_text import fit_text
+from ig_trace import run, span
 
 W = H = 1024
 ACCENT1 = (16, 185, 129)   # teal (darker for light bg)
@@ -28,6 +53,7 @@ def pt_today() -> str:
     return dt.datetime.now().strftime("%Y-%m-%d")
 
 
+@functools.lru_cache(maxsize=None)
 def load_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
     candidates = [
         f"/System/Library/Fonts/{'SFProDisplay-Bold' if bold else 'SFProDisplay-Regular'}.otf",
@@ -85,113 +111,266 @@ def build_prompt(theme: str) -> str:
     return prompt
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--date", default=pt_today())
-    ap.add_argument("--slug", default="daily")
-    ap.add_argument("--theme", default="workflow", help="workflow|risk|privacy|myths|features")
-    ap.add_argument("--headline", default="Signals. Not Noise.")
-    ap.add_argument("--sub", default="AI overlay inside TradingView. You stay in control.")
-    args = ap.parse_args()
+# Auto-fit ranges (ig_text.fit_text) on the 1024px reference canvas
+HEADLINE_MIN_PT, HEADLINE_MAX_PT = 40, 72
+HEADLINE_MAX_LINES = 3
+SUB_MIN_PT, SUB_MAX_PT = 20, 28
+SUB_MAX_LINES = 3
+SAFE_TOP = 104
+
+
+def _bold_font(size: int) -> ImageFont.ImageFont:
+    return load_font(size, bold=True)
+
+
+def compose_single(img: Image.Image, theme: str, headline: str, sub: str, text: bool = True) -> Image.Image:
+    """Draw badge, headline, sub pill, CTA and footer onto `img`.
 
-    # Generate Image
-    prompt = build_prompt(theme=args.theme)
-    img = generate_image(prompt=prompt, model="fal-ai/flux/dev", image_size="square_hd")
-    img = img.resize((W, H))
+    Coordinates are authored on the 1024px reference canvas and scaled by
+    the canvas width; top/centre/bottom anchoring keeps 4:5 and 9:16 sane.
+    Headline and sub get the largest size/line breaks that fit (fit_text);
+    the block moves, or gets a scrim / light ink, where ig_analysis finds the
+    background busy or dark. text=False leaves out the headline and sub (the
+    static base of ig_animate).
+    """
 
-    draw = ImageDraw.Draw(img)
+    img_w, img_h = img.size
+    k = img_w / W
 
-    badge_font = load_font(19, bold=True)
-    h_font = load_font(64, bold=True)
-    sub_font = load_font(28, bold=False)
-    footer_font = load_font(21, bold=True)
-    disc_font = load_font(16, bold=False)
+    def px(v: float) -> int:
+        return int(round(v * k))
+
+    bg_stats = ig_analysis.analyze(img)   # before anything is drawn on it
+    canvas = Canvas(img)
+
+    badge_font = load_font(px(19), bold=True)
+    footer_font = load_font(px(21), bold=True)
+    disc_font = load_font(px(16), bold=False)
 
     # Badge (Top)
-    theme_label = args.theme.upper()
+    theme_label = theme.upper()
     badge = f"NEURAL-ENGINE  |  {theme_label}"
     bb = badge_font.getbbox(badge)
-    bw = (bb[2]-bb[0]) + 36
-    bh = 36
-    bx = (W - bw)//2
-    draw.rounded_rectangle([bx, 48, bx+bw, 48+bh], radius=18, fill=(*ACCENT1, 30), outline=(*ACCENT1, 140), width=1)
-    draw.text(((W-(bb[2]-bb[0]))//2, 56), badge, font=badge_font, fill=ACCENT2)
+    bw = (bb[2]-bb[0]) + px(36)
+    bh = px(36)
+    bx = (img_w - bw)//2
+    canvas.rounded_rectangle([bx, px(48), bx+bw, px(48)+bh], radius=px(18), fill=(*ACCENT1, 30), outline=(*ACCENT1, 140), width=1)
+    canvas.text(((img_w-(bb[2]-bb[0]))//2, px(56)), badge, font=badge_font, fill=ACCENT2)
 
     # TEXT LAYOUT (Vertical Center)
+    # Sizes and line breaks are auto-fit: the block is centred between the
+    # badge (SAFE_TOP) and the CTA pill, so the tighter half bounds both ends
+    headline = headline.replace("\\n", "\n") # Handle escaped newlines
+    cta_top = img_h - px(210) - px(24)
+    avail = 2 * min(img_h // 2 - px(SAFE_TOP), cta_top - img_h // 2)
+
+    sub_fit = fit_text(sub, load_font, px(850), avail // 3, px(SUB_MAX_PT), px(SUB_MIN_PT),
+                       line_gap=px(8), max_lines=SUB_MAX_LINES)
+    sub_font = sub_fit.font
+    # Sub lines each carry px(8), plus the pill's px(4) below and px(24) + px(12) above
+    box_h = avail - (sub_fit.height + px(8) + px(4)) - px(24) - px(12)
+    h_fit = fit_text(headline, _bold_font, px(900), box_h, px(HEADLINE_MAX_PT), px(HEADLINE_MIN_PT),
+                     line_gap=px(12), max_lines=HEADLINE_MAX_LINES)
+    if not h_fit.fits:
+        h_fit = fit_text(headline, _bold_font, px(900), box_h, px(HEADLINE_MAX_PT), px(HEADLINE_MIN_PT),
+                         line_gap=px(12))
+    h_font = h_fit.font
+
     total_h = 0
-    headline_lines = args.headline.split("\\n") # Handle escaped newlines
-    if len(headline_lines) == 1:
-         headline_lines = wrap_text(args.headline, h_font, 900)
-
-    # Measure Headline
-    h_metrics = []
-    for line in headline_lines:
-        bb = h_font.getbbox(line)
-        h_metrics.append((line, bb[2]-bb[0], bb[3]-bb[1]))
-        total_h += (bb[3]-bb[1]) + 12
-
-    total_h += 24 # gap to sub
-
-    # Measure Sub
-    sub_lines = wrap_text(args.sub, sub_font, 850)
-    sub_metrics = []
-    for line in sub_lines:
-        sb = sub_font.getbbox(line)
-        sub_metrics.append((line, sb[2]-sb[0], sb[3]-sb[1]))
-        total_h += (sb[3]-sb[1]) + 8
-
-    # Start Y
-    start_y = (H - total_h) // 2
-    
-    # Draw Headline
-    y = start_y
-    for line, w, h in h_metrics:
-        # No shadow needed for clean white bg
-        draw.text(((W - w)//2, y), line, font=h_font, fill=INK)
-        y += h + 12
-
-    # Draw Sub (with pill background)
-    y += 12
-    # Calculate pill size
-    pill_w = max([m[1] for m in sub_metrics]) + 48
-    pill_h = (len(sub_metrics) * (sub_metrics[0][2] + 8)) + 16
-    pill_x = (W - pill_w) // 2
-    
-    draw.rounded_rectangle(
-        [pill_x, y - 12, pill_x + pill_w, y + pill_h - 12],
-        radius=16,
-        fill=(243, 244, 246, 255) # Gray-100
-    )
-    
-    # Draw sub text inside pill
-    for line, w, h in sub_metrics:
-        draw.text(((W - w)//2, y), line, font=sub_font, fill=ACCENT2)
-        y += h + 8
+    h_metrics = list(h_fit.lines)
+    for _line, _w, h in h_metrics:
+        total_h += h + px(12)
+
+    total_h += px(24) # gap to sub
+
+    sub_metrics = list(sub_fit.lines)
+    for _line, _w, h in sub_metrics:
+        total_h += h + px(8)
+
+    # Start Y: centred, unless ig_analysis finds the background busy there
+    start_y = (img_h - total_h) // 2
+    head_w = max((w for _, w, _ in h_metrics), default=0)
+    sub_w = max((w for _, w, _ in sub_metrics), default=0)
+
+    # --headline "" / --sub "" wrap to no lines: nothing to place or draw
+    if text and (h_metrics or sub_metrics):
+        block_w = max(head_w, sub_w + px(48))
+        spot = ig_analysis.place(img, (block_w, total_h + px(4)), start_y, px(SAFE_TOP), cta_top,
+                                 analysis=bg_stats, ink=INK)
+
+        # Draw Headline
+        y = spot.top
+        if spot.scrim and h_metrics:
+            head_h = sum(h + px(12) for _, _, h in h_metrics)
+            hx = (img_w - head_w) // 2
+            canvas.flush()
+            ig_analysis.scrim(img, (hx - px(24), y - px(12), img_w - hx + px(24), y + head_h),
+                              spot.scrim_color, spot.scrim, px(20))
+        for line, w, h in h_metrics:
+            canvas.text(((img_w - w)//2, y), line, font=h_font, fill=spot.ink)
+            y += h + px(12)
+
+        # Draw Sub (with pill background)
+        y += px(12)
+        if sub_metrics:
+            # Calculate pill size
+            pill_w = sub_w + px(48)
+            pill_h = (len(sub_metrics) * (sub_metrics[0][2] + px(8))) + px(16)
+            pill_x = (img_w - pill_w) // 2
+
+            canvas.rounded_rectangle(
+                [pill_x, y - px(12), pill_x + pill_w, y + pill_h - px(12)],
+                radius=px(16),
+                fill=(243, 244, 246, 255) # Gray-100
+            )
+
+        # Draw sub text inside pill
+        for line, w, h in sub_metrics:
+            canvas.text(((img_w - w)//2, y), line, font=sub_font, fill=ACCENT2)
+            y += h + px(8)
 
     # CTA pill (Bottom)
     cta = "Join the waitlist → neural-engine.tech"
-    cta_font = load_font(28, bold=True)
+    cta_font = load_font(px(28), bold=True)
     cb = cta_font.getbbox(cta)
-    cw = (cb[2]-cb[0]) + 44
-    ch = 56
-    cx = (W - cw)//2
-    cy = H - 210
-    draw.rounded_rectangle([cx, cy, cx+cw, cy+ch], radius=18, fill=(*ACCENT2, 35), outline=(*ACCENT2, 140), width=2)
-    draw.text(((W-(cb[2]-cb[0]))//2, cy+14), cta, font=cta_font, fill=INK)
+    cw = (cb[2]-cb[0]) + px(44)
+    ch = px(56)
+    cx = (img_w - cw)//2
+    cy = img_h - px(210)
+    canvas.rounded_rectangle([cx, cy, cx+cw, cy+ch], radius=px(18), fill=(*ACCENT2, 35), outline=(*ACCENT2, 140), width=2)
+    canvas.text(((img_w-(cb[2]-cb[0]))//2, cy+px(14)), cta, font=cta_font, fill=INK)
 
     # Footer
-    brand_y = H - 80
-    draw.line([(52, brand_y - 14), (W - 52, brand_y - 14)], fill=(229, 231, 235, 255), width=1)
-    draw.text((52, brand_y), "NEURAL-ENGINE", font=footer_font, fill=INK)
+    brand_y = img_h - px(80)
+    canvas.line([(px(52), brand_y - px(14)), (img_w - px(52), brand_y - px(14))], fill=(229, 231, 235, 255), width=1)
+    brand_ink = ig_analysis.ink_for(bg_stats, (px(52), brand_y, px(260), brand_y + px(28)))
+    canvas.text((px(52), brand_y), "NEURAL-ENGINE", font=footer_font, fill=brand_ink)
     disc = "Not financial advice. Trade responsibly."
     db = disc_font.getbbox(disc)
-    draw.text((W-(db[2]-db[0])-52, brand_y+4), disc, font=disc_font, fill=GREY)
+    canvas.text((img_w-(db[2]-db[0])-px(52), brand_y+px(4)), disc, font=disc_font, fill=GREY)
+
+    return canvas.flatten()
+
+
+def single_fingerprint(theme: str, headline: str, sub: str, bg_sha: Optional[str], size: Tuple[int, int]) -> str:
+    """Build-index fingerprint of everything that affects the rendered post."""
+
+    return fingerprint(
+        template=source_hash(compose_single, fit_text, ig_analysis, ig_compose), headline=headline, sub=sub, theme=theme,
+        fonts=[font_id(load_font(HEADLINE_MAX_PT, bold=True)), font_id(load_font(SUB_MAX_PT))],
+        bg=bg_sha, size=list(size),
+    )
+
 
-    os.makedirs("assets/ig", exist_ok=True)
-    out = f"assets/ig/{args.date}-PM-{args.slug}.png"
-    img.convert("RGB").save(out, "PNG")
-    print(f"Saved: {out}")
+def render_preview(date: str, slug: str, theme: str, headline: str, sub: str, formats: List[str], scale: float) -> None:
+    """Reduced-scale render into the ig_preview contact sheet (no network, nothing written)."""
 
+    index = BuildIndex("assets/ig")
+    base = f"assets/ig/{date}-PM-{slug}.png"
+    with preview.session(os.path.join(preview.PREVIEW_DIR, f"{date}-PM-{slug}.png"), title=f"{date} PM {slug}"):
+        for fmt in formats:
+            full = FORMATS[fmt][:2]
+            prev = index.get(out_path(base, fmt))
+            sha = prev.get("bg") if prev.get("theme") == theme else None
+            bg = preview.background(sha, full, preview.scaled(full, scale), theme, pool.SINGLE_VARIANT)
+            preview.add(f"{date} PM {slug} {fmt}", compose_single(bg, theme, headline, sub))
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--date", default=pt_today())
+    ap.add_argument("--slug", default="daily")
+    ap.add_argument("--theme", default="workflow", help="workflow|risk|privacy|myths|features")
+    ap.add_argument("--headline", default="Signals. Not Noise.")
+    ap.add_argument("--sub", default="AI overlay inside TradingView. You stay in control.")
+    ap.add_argument("--formats", default="square", help=f"Comma list of {','.join(FORMATS)} (one fal call total)")
+    ap.add_argument("--force", action="store_true", help="Ignore the build index and cached background")
+    ap.add_argument("--no-pool", action="store_true", help="Always call fal instead of using a pre-generated background")
+    ap.add_argument("--deadline", type=float, default=float(os.environ.get("IG_FAL_DEADLINE_S", "90")),
+                    help="Seconds to wait for fal before rendering a procedural background")
+    ap.add_argument("--preview", action="store_true", help="Low-res contact sheet only; no fal calls, no assets written")
+    ap.add_argument("--preview-scale", type=float, default=preview.DEFAULT_SCALE)
+    ap.add_argument("--animate", choices=ig_animate.KINDS,
+                    help="Also write an animated version of each format (ig_animate.py)")
+    ap.add_argument("--anim-seconds", type=float, default=ig_animate.DEFAULT_SECONDS)
+    ap.add_argument("--anim-fps", type=int, default=ig_animate.DEFAULT_FPS)
+    ap.add_argument("--anim-effects", default=",".join(ig_animate.DEFAULT_EFFECTS),
+                    help=f"Comma list of {','.join(ig_animate.EFFECTS)}")
+    ap.add_argument("--anim-workers", type=int, default=ig_animate.DEFAULT_WORKERS,
+                    help="Processes rendering animation frames")
+    args = ap.parse_args(argv)
+    deadline = time.monotonic() + args.deadline
+    formats = parse_formats(args.formats)
+    if args.preview:
+        render_preview(args.date, args.slug, args.theme, args.headline, args.sub, formats, args.preview_scale)
+        return
+
+    index = BuildIndex("assets/ig")
+    base = f"assets/ig/{args.date}-PM-{args.slug}.png"
+    outs = {fmt: out_path(base, fmt) for fmt in formats}
+    prev = next((e for e in map(index.get, outs.values()) if e.get("theme") == args.theme), {})
+    # A procedural fallback background is never reused: the next run upgrades it
+    bg_sha = None if args.force or prev.get("fallback") else prev.get("bg")
+    fallback = False
+
+    def fp_for(fmt: str) -> str:
+        return single_fingerprint(args.theme, args.headline, args.sub, bg_sha, FORMATS[fmt][:2])
+
+    if bg_sha and all(index.fresh(outs[f], fp_for(f)) for f in formats):
+        print(f"Up to date: {base}")
+        if not args.animate:
+            return
+
+    with run("gen_ig_single_daily_fal", date=args.date, slug=args.slug, theme=args.theme):
+        if not bgcache.has(bg_sha):
+            fal_size = fal_image_size(formats)
+            with span("single.background") as a:
+                bg_sha = None if args.no_pool else pool.pop("single", args.theme, pool.SINGLE_VARIANT, fal_size)
+                a["source"] = "pool" if bg_sha else "fal"
+                if bg_sha is None:
+                    # Generate Image
+                    prompt = build_prompt(theme=args.theme)
+
+                    def keep_late(sha: str) -> None:
+                        pool.push("single", args.theme, pool.SINGLE_VARIANT, fal_size, sha)
+                        print("Late fal background added to the pool", flush=True)
+
+                    try:
+                        bg_sha = call_with_deadline(
+                            lambda: bgcache.put(generate_image(prompt=prompt, model="fal-ai/flux/dev", image_size=fal_size)),
+                            deadline - time.monotonic(), on_late=keep_late,
+                        )
+                    except Exception as e:
+                        print(f"fal unavailable ({e}); using a procedural background")
+                        a["source"] = "procedural"
+                        a["error"] = str(e)[:200]
+                        bg_sha = bgcache.put(procedural.render(fal_pixels(fal_size), args.theme))
+                        fallback = True
+
+        os.makedirs("assets/ig", exist_ok=True)
+        try:
+            for fmt in formats:
+                out = outs[fmt]
+                fp = fp_for(fmt)
+                if index.fresh(out, fp):
+                    continue
+                with span("single.composite", format=fmt):
+                    img = compose_single(bgcache.fitted(bg_sha, FORMATS[fmt][:2]), args.theme, args.headline, args.sub)
+
+                with span("single.encode", format=fmt):
+                    sha, changed = write_png(img, out)
+                index.record(out, fp, sha, bg=bg_sha, theme=args.theme, slug=args.slug, date=args.date,
+                             fallback=fallback)
+                print(f"{'Saved' if changed else 'Unchanged'}: {out}{' (procedural fallback)' if fallback else ''}")
+
+            if args.animate:
+                effects = [e.strip() for e in args.anim_effects.split(",") if e.strip()]
+                compose = functools.partial(compose_single, theme=args.theme, headline=args.headline, sub=args.sub)
+                for fmt in formats:
+                    ig_animate.export(index, outs[fmt], bgcache.fitted(bg_sha, FORMATS[fmt][:2]), compose, args.animate,
+                                      args.anim_seconds, args.anim_fps, effects, args.anim_workers, glow_color=ACCENT1)
+        finally:
+            index.save()
 
 if __name__ == "__main__":
     main()
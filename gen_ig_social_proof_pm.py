@@ -4,9 +4,13 @@ Neural-Engine IG Single — 2026-02-26 PM
 Theme: Social Proof — community momentum / waitlist growing
 """
 
-import os, math
+import functools, os, math
 from PIL import Image, ImageDraw, ImageFont
 
+import ig_preview
+from ig_compose import Canvas
+from ig_text import fit_text
+
 OUT_PATH = "assets/ig/2026-02-26-PM-social-proof-community.png"
 W, H = 1024, 1024
 
@@ -42,6 +46,7 @@ def glow_circle(draw, cx, cy, r, color, steps=8):
         box = [cx-radius, cy-radius, cx+radius, cy+radius]
         draw.ellipse(box, fill=(*color[:3], alpha))
 
+@functools.lru_cache(maxsize=None)
 def load_font(size, bold=False):
     candidates = [
         f"/System/Library/Fonts/{'SFProDisplay-Bold' if bold else 'SFProDisplay-Regular'}.otf",
@@ -57,6 +62,9 @@ def load_font(size, bold=False):
                 pass
     return ImageFont.load_default()
 
+def bold_font(size):
+    return load_font(size, bold=True)
+
 def wrap_text(text, font, max_w):
     words = text.split()
     lines, cur = [], ""
@@ -114,12 +122,10 @@ def draw_quote_card(draw, x, y, w, h, quote, author, q_font, a_font):
 img = Image.new("RGBA", (W, H), (0, 0, 0, 255))
 draw_gradient(img)
 
-overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-od = ImageDraw.Draw(overlay)
-draw_grid(od)
-img = Image.alpha_composite(img, overlay)
-
-draw = ImageDraw.Draw(img)
+# Translucent fills blend through the canvas (ImageDraw alone would
+# overwrite the background with their alpha)
+draw = Canvas(img)
+draw_grid(draw)
 
 # decorative glows
 glow_circle(draw, 860, 140, 90, ACCENT2, steps=10)
@@ -138,8 +144,8 @@ draw.rounded_rectangle(
 draw.text(((W - (bx[2]-bx[0]))//2, 56), badge_text, font=badge_font, fill=ACCENT1)
 
 # ── Headline ──────────────────────────────────────────────────────────────────
-h1_font = load_font(62, bold=True)
 h1 = "The Waitlist Is Talking."
+h1_font = fit_text(h1, bold_font, W - 104, 90, 62, 44, max_lines=1).font
 bx = h1_font.getbbox(h1)
 draw.text(((W - (bx[2]-bx[0]))//2, 104), h1, font=h1_font, fill=WHITE)
 
@@ -151,7 +157,9 @@ sbx = sub_font.getbbox(sub)
 draw.text(((W - (sbx[2] - sbx[0]))//2, sub_y), sub, font=sub_font, fill=GREY)
 
 # ── Quote Cards ───────────────────────────────────────────────────────────────
-q_font  = load_font(24, bold=False)
+# Quotes share one size: the largest at which each wraps to 2 lines in its card
+q_font  = load_font(min(fit_text(q, load_font, W - 104 - 80, 64, 24, 18, line_gap=6, max_lines=2).size
+                        for q, _ in QUOTES))
 a_font  = load_font(20, bold=True)
 card_y  = sub_y + 48
 card_h  = 118
@@ -168,8 +176,8 @@ draw.rounded_rectangle(
     radius=16, fill=(*ACCENT2[:3], 25),
     outline=(*ACCENT2[:3], 110), width=2
 )
-ctr_font = load_font(28, bold=True)
 ctr_text = "🚀  Waitlist growing fast — spots are limited"
+ctr_font = fit_text(ctr_text, bold_font, W - 104 - 40, 44, 28, 20, max_lines=1).font
 ctx = ctr_font.getbbox(ctr_text)
 draw.text(((W - (ctx[2]-ctx[0]))//2, counter_y + 18), ctr_text, font=ctr_font, fill=GOLD)
 
@@ -180,8 +188,8 @@ draw.rounded_rectangle(
     radius=16, fill=(*ACCENT1[:3], 28),
     outline=(*ACCENT1[:3], 130), width=2
 )
-cta_font  = load_font(29, bold=True)
 cta_text  = "Join the Waitlist  →  neural-engine.tech"
+cta_font  = fit_text(cta_text, bold_font, W - 104 - 40, 44, 29, 20, max_lines=1).font
 ctx = cta_font.getbbox(cta_text)
 draw.text(((W - (ctx[2]-ctx[0]))//2, cta_y + 18), cta_text, font=cta_font, fill=ACCENT1)
 
@@ -197,7 +205,8 @@ dbx = disc_font.getbbox(disc_text)
 draw.text((W - (dbx[2]-dbx[0]) - 52, brand_y + 4), disc_text, font=disc_font, fill=GREY)
 
 # ── Save ──────────────────────────────────────────────────────────────────────
-img = img.convert("RGB")
+img = draw.flatten().convert("RGB")
 os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
-img.save(OUT_PATH, "PNG")
-print(f"Saved: {OUT_PATH}")
+ig_preview.save(img, OUT_PATH, "PNG")
+if not ig_preview.enabled():
+    print(f"Saved: {OUT_PATH}")
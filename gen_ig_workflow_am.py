@@ -8,6 +8,10 @@ Theme: Workflow — "The Trading Workflow Neural-Engine Fits Into"
 import os, sys, math
 from PIL import Image, ImageDraw, ImageFont
 
+import ig_chart
+import ig_preview
+from ig_compose import Canvas
+
 DATE   = "2026-02-26"
 SLUG   = "workflow-daily-routine"
 W, H   = 1024, 1024
@@ -154,26 +158,10 @@ def draw_centered(draw, text, y, font, fill, max_w=904):
         cur_y += line_h
     return cur_y  # return bottom y
 
-def draw_chart_motif(draw):
-    """Subtle candlestick / line chart in background (right side)."""
-    bars = [
-        (680, 580, 680, 460, 680, 430, 680, 610),  # x_open,y_open,x_close,y_close,x_top,y_top,x_bot,y_bot
-        (730, 500, 730, 410, 730, 385, 730, 530),
-        (780, 420, 780, 510, 780, 395, 780, 540),
-        (830, 380, 830, 290, 830, 270, 830, 410),
-        (880, 310, 880, 200, 880, 180, 880, 335),
-    ]
-    # Draw as simple vertical bars with caps
-    for i, (x, yo, xc, yc, xt, yt, xb, yb) in enumerate(bars):
-        alpha = 25 + i * 8
-        col   = (*ACCENT1[:3], alpha)
-        # wick
-        draw.line([(x, yt), (x, yb)], fill=col, width=2)
-        # body
-        body_top = min(yo, yc)
-        body_bot = max(yo, yc)
-        for px in range(x - 8, x + 9):
-            draw.line([(px, body_top), (px, body_bot)], fill=col, width=1)
+def draw_chart_motif(img):
+    """Subtle candlestick / moving-average chart in background (right side)."""
+    ig_chart.motif(img, (600, 170, 940, 620), seed=26, alpha=48,
+                   up=ACCENT1, down=ACCENT2, volume=False)
 
 def draw_step_number(draw, num_str, accent):
     """Big faint step number in the background."""
@@ -190,12 +178,10 @@ for idx, slide in enumerate(SLIDES, start=1):
     img  = Image.new("RGBA", (W, H), (0, 0, 0, 255))
     draw_gradient(img)
 
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    od = ImageDraw.Draw(overlay)
-    draw_grid(od)
-    img = Image.alpha_composite(img, overlay)
-
-    draw = ImageDraw.Draw(img)
+    # Translucent fills blend through the canvas (ImageDraw alone would
+    # overwrite the background with their alpha)
+    draw = Canvas(img)
+    draw_grid(draw)
 
     # Background glows
     gl_color, gl_x, gl_y = slide["glow_l"]
@@ -205,7 +191,7 @@ for idx, slide in enumerate(SLIDES, start=1):
 
     # Optional chart motif (slide 1)
     if slide.get("chart"):
-        draw_chart_motif(draw)
+        draw_chart_motif(draw.flatten())
 
     # Faint step number
     if slide["number"] != "01":
@@ -221,8 +207,7 @@ for idx, slide in enumerate(SLIDES, start=1):
     bx = (W - bw) // 2
     draw.rounded_rectangle([bx, 52, bx + bw, 52 + bh],
                             radius=18, fill=(*accent[:3], 180))
-    draw.text(((W - text_width(badge_font, bt)) // 2, 60),
-              bt, font=badge_font, fill=WHITE)
+    draw.text(((W - text_width(badge_font, bt)) // 2, 60), bt, font=badge_font, fill=WHITE)
 
     # ── Slide number pill (top-left) ───────────────────────────────────────────
     num_font = load_font(18, bold=True)
@@ -292,12 +277,12 @@ for idx, slide in enumerate(SLIDES, start=1):
               fill=(*ACCENT2[:3], 80), width=1)
     draw.text((60, brand_y), "NEURAL-ENGINE", font=footer_font, fill=ACCENT1)
     disc_text = "Not financial advice. Trade responsibly."
-    draw.text((W - text_width(disc_font, disc_text) - 60, brand_y + 4),
-              disc_text, font=disc_font, fill=GREY)
+    draw.text((W - text_width(disc_font, disc_text) - 60, brand_y + 4), disc_text, font=disc_font, fill=GREY)
 
     # ── Save ───────────────────────────────────────────────────────────────────
     out = f"assets/ig/{DATE}-AM-{SLUG}-S{idx:02d}.png"
-    img.convert("RGB").save(out, "PNG")
-    print(f"Saved: {out}")
+    ig_preview.save(draw.flatten().convert("RGB"), out, "PNG")
+    if not ig_preview.enabled():
+        print(f"Saved: {out}")
 
 print("Done.")
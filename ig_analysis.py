@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Background analysis for adaptive text placement on Neural-Engine slides.
+
+The fal prompts ask for "negative space for text", but nothing checked it:
+dark INK was always drawn centred. One NumPy pass over a downscaled luma copy
+of the background builds summed-area tables (integral images) of luminance,
+luminance^2 and edge magnitude, so the mean luminance, local contrast (std)
+and edge density of ANY box is a handful of lookups:
+
+- `analyze(img)` -> Analysis (a few ms for a 1024px background)
+- `Analysis.region(box)` -> Region(luma, contrast, edges)
+- `place(img, ...)` -> Placement: where to put a text block of a given size
+  (the template's default spot unless it is busy and a calmer one exists),
+  which ink (dark INK or a swap to white on dark areas) and how strong a
+  scrim to lay behind it (0 = none; only where the background is busy)
+- `ink_for(analysis, box)` -> the same dark/light ink swap for small fixed
+  elements (footer brand)
+
+Thresholds are in luma units (0..1) and were tuned on the light procedural
+backgrounds (calm: no change) and on noisy / photographic fal outputs.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+Color = Tuple[int, int, int]
+
+ANALYSIS_W = 256           # backgrounds are analysed at about this width
+BUSY = 0.06                # busyness (edges + contrast) above which text needs help
+DARK = 0.5                 # mean luma below which dark ink swaps to light
+MAX_SCRIM = 170            # scrim alpha at full busyness
+CANDIDATES = 9             # block positions tried between top and bottom
+CENTRE_BIAS = 0.02         # busyness penalty for moving all the way to an edge
+
+INK = (17, 24, 39)
+LIGHT_INK = (255, 255, 255)
+
+
+@dataclass(frozen=True)
+class Region:
+    luma: float       # mean luminance, 0..1
+    contrast: float   # luminance std
+    edges: float      # mean gradient magnitude
+
+    @property
+    def busyness(self) -> float:
+        return self.edges + 0.5 * self.contrast
+
+
+@dataclass(frozen=True)
+class Placement:
+    top: int          # y of the block in image px
+    ink: Color
+    scrim: int        # alpha of the scrim behind the block (0 = none)
+    scrim_color: Color
+    region: Region
+
+
+def _integral(a: np.ndarray) -> np.ndarray:
+    out = np.zeros((a.shape[0] + 1, a.shape[1] + 1), np.float64)
+    np.cumsum(np.cumsum(a, axis=0), axis=1, out=out[1:, 1:])
+    return out
+
+
+class Analysis:
+    """Summed-area tables of one background, queried in full-image coordinates."""
+
+    def __init__(self, img: Image.Image) -> None:
+        self.size = img.size
+        # Integer box reduction of the luma plane: much cheaper than a resize
+        small = img.convert("L").reduce(max(1, img.width // ANALYSIS_W))
+        self.k = small.width / img.width
+        luma = np.asarray(small, np.float32) / 255.0
+        edges = np.zeros_like(luma)
+        edges[:, 1:] += np.abs(np.diff(luma, axis=1))
+        edges[1:, :] += np.abs(np.diff(luma, axis=0))
+        self.sum = _integral(luma)
+        self.sq = _integral(luma * luma)
+        self.edge = _integral(edges)
+
+    def _boxes(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray):
+        h, w = self.sum.shape[0] - 1, self.sum.shape[1] - 1
+        c = lambda v, hi: np.clip(np.round(np.asarray(v) * self.k).astype(int), 0, hi)  # noqa: E731
+        x0, x1, y0, y1 = c(x0, w), c(x1, w), c(y0, h), c(y1, h)
+        x1, y1 = np.maximum(x1, x0 + 1), np.maximum(y1, y0 + 1)
+        x1, y1 = np.minimum(x1, w), np.minimum(y1, h)
+        x0, y0 = np.minimum(x0, x1 - 1), np.minimum(y0, y1 - 1)
+        n = (x1 - x0) * (y1 - y0)
+
+        def box_sum(t: np.ndarray) -> np.ndarray:
+            return t[y1, x1] - t[y0, x1] - t[y1, x0] + t[y0, x0]
+
+        mean = box_sum(self.sum) / n
+        var = np.maximum(box_sum(self.sq) / n - mean * mean, 0.0)
+        return mean, np.sqrt(var), box_sum(self.edge) / n
+
+    def region(self, box: Tuple[int, int, int, int]) -> Region:
+        """Stats of `box` (x0, y0, x1, y1) in image pixels; O(1)."""
+
+        mean, std, edges = self._boxes(*([v] for v in box))
+        return Region(float(mean[0]), float(std[0]), float(edges[0]))
+
+
+def analyze(img: Image.Image) -> Analysis:
+    return Analysis(img)
+
+
+def place(
+    img: Image.Image,
+    block: Tuple[int, int],
+    default_top: int,
+    top: int,
+    bottom: int,
+    analysis: Optional[Analysis] = None,
+    ink: Color = INK,
+) -> Placement:
+    """Where and how to draw a horizontally centred text block of `block` (w, h).
+
+    Keeps `default_top` when that spot is calm. Otherwise tries CANDIDATES
+    positions with the block inside [top, bottom] (vectorised, one lookup
+    each) and takes the calmest, with a small bias towards the default. A
+    scrim is only requested if even that spot is busy; dark ink swaps to
+    light where the chosen region is dark.
+    """
+
+    a = analysis or analyze(img)
+    w, h = block
+    x0 = (img.width - w) // 2
+    x1 = x0 + w
+
+    chosen = default_top
+    mean, std, edges = a._boxes([x0], [default_top], [x1], [default_top + h])
+    region = Region(float(mean[0]), float(std[0]), float(edges[0]))
+    if region.busyness > BUSY and bottom - top > h:
+        tops = np.unique(np.linspace(top, bottom - h, CANDIDATES).astype(int))
+        mean, std, edges = a._boxes(np.full(len(tops), x0), tops, np.full(len(tops), x1), tops + h)
+        span = max(1, bottom - h - top)
+        score = edges + 0.5 * std + CENTRE_BIAS * np.abs(tops - default_top) / span
+        i = int(np.argmin(score))
+        if score[i] < region.busyness:
+            chosen = int(tops[i])
+            region = Region(float(mean[i]), float(std[i]), float(edges[i]))
+
+    light = region.luma < DARK
+    text = LIGHT_INK if light and ink == INK else ink
+    scrim = 0
+    if region.busyness > BUSY:
+        scrim = int(min(1.0, (region.busyness - BUSY) / BUSY) * MAX_SCRIM)
+    scrim_color = (0, 0, 0) if text == LIGHT_INK else (255, 255, 255)
+    return Placement(chosen, text, scrim, scrim_color, region)
+
+
+def ink_for(a: Analysis, box: Tuple[int, int, int, int], ink: Color = INK) -> Color:
+    """`ink`, or LIGHT_INK if it is the dark INK and `box` of the background is dark."""
+
+    return LIGHT_INK if ink == INK and a.region(box).luma < DARK else ink
+
+
+def scrim(img: Image.Image, box: Tuple[int, int, int, int], color: Color, alpha: int, radius: int) -> None:
+    """Alpha-composite a rounded translucent panel over `box` of the RGBA `img`, in place."""
+
+    x0, y0, x1, y1 = box
+    pad = radius
+    layer = Image.new("L", (x1 - x0 + 2 * pad, y1 - y0 + 2 * pad), 0)
+    ImageDraw.Draw(layer).rounded_rectangle([pad, pad, pad + x1 - x0, pad + y1 - y0], radius=radius, fill=alpha)
+    layer = layer.filter(ImageFilter.GaussianBlur(radius / 3))
+    panel = Image.new("RGBA", layer.size, color)
+    panel.putalpha(layer)
+    # alpha_composite() wants a destination inside the image: crop what hangs over
+    dx, dy = x0 - pad, y0 - pad
+    sx, sy = max(0, -dx), max(0, -dy)
+    img.alpha_composite(panel, (dx + sx, dy + sy), (sx, sy, min(panel.width, img.width - dx), min(panel.height, img.height - dy)))
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""Animated exports (GIF / APNG / PNG frame sequences) of Neural-Engine slides.
+
+An animated slide is mostly the still: the background, badge, CTA, slide
+number and footer never change. A Clip is built from two renders of the
+layout: `compose(bg, text=False)` (the static base) and `compose(bg)` (the
+finished slide). After that, a frame is just:
+- a copy of the base
+- the glow pulse and the chart motif drawing in, each one sprite
+  rendered once (the glow's alpha levels are cached)
+- the text block pasted back in line by line as it fades and rises into
+  place. Its pixels are cut from the finished slide, using a mask of where
+  the slide differs from the base. The text is therefore the still's exact
+  raster and is never shaped or rasterized again. The faint part of that
+  difference (the scrim) is added on top rather than pasted, so the glow
+  behind it still shows.
+
+Frames don't depend on each other, so they render in worker processes; the
+Clip is sent to each worker once. GIF frames are also quantized in the
+workers, against one palette taken from a finished frame at the glow's
+peak, so colours don't flicker. Pillow writes GIF and APNG storing only the changed region of each
+frame, and merges repeated frames (the held still, when nothing pulses).
+`frames` writes NNNN.png files for ffmpeg (FFMPEG_HINT); Reels need MP4.
+
+    clip = ig_animate.Clip.build(bg, functools.partial(compose_slide, s=s, idx=1, total=4, theme=theme))
+    ig_animate.render(clip, "assets/ig/2026-03-02-AM-daily-S01.gif", "gif")
+
+The fal generators take `--animate gif|apng|frames` (plus --anim-seconds,
+--anim-fps, --anim-effects, --anim-workers). They use export(), which
+records GIF/APNG outputs in the build index next to their still.
+
+  IG_ANIM_WORKERS   frame-rendering processes (default: all cores)
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageChops
+
+import ig_chart
+from ig_build import BuildIndex, encode_png, file_sha, fingerprint, source_hash, write_bytes_if_changed
+from ig_trace import adopt, handoff, span, traced
+
+KINDS = ("gif", "apng", "frames")
+EFFECTS = ("fade", "glow", "chart")
+DEFAULT_EFFECTS = ("fade", "glow")
+DEFAULT_SECONDS = 4.0
+DEFAULT_FPS = 25                 # 40 ms: a whole number of GIF centiseconds
+DEFAULT_WORKERS = int(os.environ.get("IG_ANIM_WORKERS", str(os.cpu_count() or 1)))
+
+# Timeline (seconds) and look; distances are on the 1024px reference canvas
+TEXT_DELAY_S = 0.3
+TEXT_STAGGER_S = 0.18
+TEXT_FADE_S = 0.6
+TEXT_RISE = 18
+CHART_S = 1.6
+CHART_ALPHA = 56
+GLOW_PERIOD_S = 2.0
+GLOW_ALPHA = 110
+LEVELS = 64                      # quantized alpha steps for cached fade masks / glow sprites
+BAND_GAP = 4                     # text-edge rows closer than this belong to one band
+TEXT_EDGE = 48                   # channel difference that counts as text (scrims stay below it)
+
+FFMPEG_HINT = "ffmpeg -framerate {fps} -i {dir}/%04d.png -c:v libx264 -pix_fmt yuv420p {mp4}"
+
+Box = Tuple[int, int, int, int]
+
+
+def _ease_out(x: float) -> float:
+    x = min(1.0, max(0.0, x))
+    return 1.0 - (1.0 - x) ** 3
+
+
+def _ease_in_out(x: float) -> float:
+    x = min(1.0, max(0.0, x))
+    return x * x * (3.0 - 2.0 * x)
+
+
+@dataclass
+class Band:
+    """One run of text rows, cut from the finished slide.
+
+    Pixels the text block changed strongly (glyphs, opaque pills) are
+    pasted from `full` through `mask`. Faint changes (a scrim's tint) are
+    kept as a signed difference `pos` / `neg`, applied on top of whatever
+    is underneath, so a glow behind the scrim still shows through it.
+    """
+
+    box: Box
+    full: Image.Image                 # RGBA crop of the finished slide
+    mask: Image.Image                 # L, 255 where the text block replaced the base
+    pos: Optional[Image.Image] = None  # RGBA (alpha 0): faint changes that brighten ...
+    neg: Optional[Image.Image] = None  # ... and that darken
+
+
+@dataclass
+class Sprite:
+    img: Image.Image      # RGBA
+    xy: Tuple[int, int]
+
+    @property
+    def box(self) -> Box:
+        return self.xy[0], self.xy[1], self.xy[0] + self.img.width, self.xy[1] + self.img.height
+
+
+def text_bands(base: Image.Image, full: Image.Image) -> List[Band]:
+    """Split what `full` adds to `base` into horizontal bands (headline lines, sub pill).
+
+    Bands are cut halfway between runs of rows with text edges in them, so
+    a faint scrim that spans several lines doesn't merge them into one.
+    """
+
+    diff = np.abs(np.asarray(base, np.int16) - np.asarray(full, np.int16)).max(axis=2)
+    changed = diff > 0
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not rows.size:
+        return []
+    strong = np.flatnonzero((diff > TEXT_EDGE).any(axis=1))
+    cuts = [int(rows[0])]
+    if strong.size:
+        gaps = np.flatnonzero(np.diff(strong) > BAND_GAP)
+        cuts += [int(strong[g] + strong[g + 1] + 1) // 2 for g in gaps]
+    cuts.append(int(rows[-1]) + 1)
+
+    b, f = np.asarray(base, np.int16), np.asarray(full, np.int16)
+    bands = []
+    for y0, y1 in zip(cuts, cuts[1:]):
+        cols = np.flatnonzero(changed[y0:y1].any(axis=0))
+        if not cols.size:
+            continue
+        x0, x1 = int(cols[0]), int(cols[-1]) + 1
+        box = (x0, y0, x1, y1)
+        d = diff[y0:y1, x0:x1]
+        band = Band(box, full.crop(box), Image.fromarray(((d > TEXT_EDGE) * 255).astype(np.uint8), "L"))
+        weak = (d > 0) & (d <= TEXT_EDGE)
+        if weak.any():
+            delta = np.where(weak[..., None], f[y0:y1, x0:x1] - b[y0:y1, x0:x1], 0)
+            delta[..., 3] = 0
+            band.pos = Image.fromarray(np.clip(delta, 0, 255).astype(np.uint8), "RGBA")
+            band.neg = Image.fromarray(np.clip(-delta, 0, 255).astype(np.uint8), "RGBA")
+        bands.append(band)
+    return bands
+
+
+def glow_sprite(size: Tuple[int, int], color: Tuple[int, int, int], alpha: int = GLOW_ALPHA) -> Image.Image:
+    """Soft elliptical glow filling `size`, peaking at `alpha` in the centre."""
+
+    w, h = size
+    yy, xx = np.ogrid[-1.0:1.0:complex(0, h), -1.0:1.0:complex(0, w)]
+    falloff = np.clip(1.0 - (xx * xx + yy * yy), 0.0, 1.0) ** 2
+    rgba = np.empty((h, w, 4), np.uint8)
+    rgba[..., :3] = color
+    rgba[..., 3] = (falloff * alpha).astype(np.uint8)
+    return Image.fromarray(rgba, "RGBA")
+
+
+def _union(boxes: Sequence[Box], size: Tuple[int, int]) -> Box:
+    return (max(0, min(b[0] for b in boxes)), max(0, min(b[1] for b in boxes)),
+            min(size[0], max(b[2] for b in boxes)), min(size[1], max(b[3] for b in boxes)))
+
+
+def _composite(img: Image.Image, im: Image.Image, xy: Tuple[int, int], width: Optional[int] = None) -> None:
+    """alpha_composite the first `width` columns of `im` at `xy`, clipped to `img`."""
+
+    x, y = xy
+    sx, sy = max(0, -x), max(0, -y)
+    sw = min(im.width if width is None else width, img.width - x)
+    sh = min(im.height, img.height - y)
+    if sw > sx and sh > sy:
+        img.alpha_composite(im, (x + sx, y + sy), (sx, sy, sw, sh))
+
+
+State = Tuple[int, ...]   # glow level, chart columns, per-band alpha level
+
+
+@dataclass
+class Clip:
+    """Everything needed to render any frame of one animated slide (see module docstring).
+
+    Only `dirty` (the union of everything that moves) is re-rendered per
+    frame; the rest of each frame is the static base. A frame is a pure
+    function of its State, so repeated states are rendered once.
+    """
+
+    base: Image.Image
+    bands: List[Band]
+    glow: Optional[Sprite] = None
+    chart: Optional[Sprite] = None
+    fade: bool = True
+    rise: int = 0
+    dirty: Box = field(init=False)
+    _base_rgb: Optional[Image.Image] = field(default=None, init=False, repr=False)
+    _masks: Dict[Tuple[int, str, int], Image.Image] = field(default_factory=dict, init=False, repr=False)
+    _glows: Dict[int, Image.Image] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        boxes = [(b.box[0], b.box[1], b.box[2], b.box[3] + self.rise) for b in self.bands]
+        boxes += [s.box for s in (self.glow, self.chart) if s is not None]
+        self.dirty = _union(boxes, self.base.size) if boxes else (0, 0, 0, 0)
+
+    @classmethod
+    def build(cls, bg: Image.Image, compose: Callable[..., Image.Image], effects: Sequence[str] = DEFAULT_EFFECTS,
+              glow_color: Tuple[int, int, int] = ig_chart.UP, seed: int = 0) -> "Clip":
+        """`compose(img, text=...)` draws the layout onto `img`; `text=False` leaves out the text block."""
+
+        bad = [e for e in effects if e not in EFFECTS]
+        if bad:
+            raise ValueError(f"Unknown effect {bad[0]!r} (choose from {', '.join(EFFECTS)})")
+        bg = bg.convert("RGBA")
+        base = compose(bg.copy(), text=False)
+        full = compose(bg.copy())
+        bands = text_bands(base, full)
+        w, h = base.size
+        k = w / 1024
+
+        glow = None
+        if "glow" in effects and bands:
+            # Behind the headline: centred on the first text band
+            x0, y0, x1, y1 = bands[0].box
+            gw, gh = int(w * 0.9), int(h * 0.45)
+            glow = Sprite(glow_sprite((gw, gh), glow_color), ((x0 + x1 - gw) // 2, (y0 + y1 - gh) // 2))
+        chart = None
+        if "chart" in effects:
+            box = (0, int(h * 0.58), w, int(h * 0.86))
+            size = (box[2] - box[0], box[3] - box[1])
+            chart = Sprite(ig_chart.layer(size, max(20, size[0] // 6), seed, CHART_ALPHA, volume=False), box[:2])
+        return cls(base, bands, glow, chart, fade="fade" in effects, rise=int(round(TEXT_RISE * k)))
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.base.size
+
+    @property
+    def settled_s(self) -> float:
+        """Time after which only the glow still moves."""
+
+        text = TEXT_DELAY_S + TEXT_STAGGER_S * max(len(self.bands) - 1, 0) + TEXT_FADE_S if self.fade else 0.0
+        return max(text, CHART_S if self.chart else 0.0)
+
+    @property
+    def showcase_s(self) -> float:
+        """First time everything is on screen with the glow at its brightest."""
+
+        return (math.ceil(self.settled_s / GLOW_PERIOD_S - 0.5) + 0.5) * GLOW_PERIOD_S
+
+    def state(self, t: float) -> State:
+        glow = int(round(LEVELS * (0.5 - 0.5 * math.cos(2 * math.pi * t / GLOW_PERIOD_S)))) if self.glow else 0
+        chart = int(self.chart.img.width * _ease_in_out(t / CHART_S)) if self.chart else 0
+        bands = [int(round(LEVELS * _ease_out((t - TEXT_DELAY_S - i * TEXT_STAGGER_S) / TEXT_FADE_S)))
+                 if self.fade else LEVELS for i in range(len(self.bands))]
+        return (glow, chart, *bands)
+
+    def _scaled(self, i: int, part: str, level: int) -> Image.Image:
+        """Band i's mask / pos / neg at `level`/LEVELS strength (cached)."""
+
+        key = (i, part, level)
+        im = self._masks.get(key)
+        if im is None:
+            im = getattr(self.bands[i], part)
+            if level < LEVELS:
+                im = im.point(lambda v: v * level // LEVELS)
+            self._masks[key] = im
+        return im
+
+    def _glow(self, level: int) -> Image.Image:
+        g = self._glows.get(level)
+        if g is None:
+            g = self.glow.img.copy()
+            g.putalpha(g.getchannel("A").point(lambda v: v * level // LEVELS))
+            self._glows[level] = g
+        return g
+
+    def patch(self, state: State) -> Image.Image:
+        """The `dirty` region of the frame in `state`, as RGBA."""
+
+        x0, y0 = self.dirty[:2]
+        img = self.base.crop(self.dirty)
+        glow, chart, *levels = state
+        if glow:
+            _composite(img, self._glow(glow), (self.glow.xy[0] - x0, self.glow.xy[1] - y0))
+        if chart:
+            _composite(img, self.chart.img, (self.chart.xy[0] - x0, self.chart.xy[1] - y0), chart)
+        for i, (band, level) in enumerate(zip(self.bands, levels)):
+            if not level:
+                continue
+            dy = int(round(self.rise * (1.0 - level / LEVELS)))
+            x, y = band.box[0] - x0, band.box[1] + dy - y0
+            if band.pos is not None:
+                box = (x, y, x + band.full.width, y + band.full.height)
+                under = ImageChops.subtract(img.crop(box), self._scaled(i, "neg", level))
+                img.paste(ImageChops.add(under, self._scaled(i, "pos", level)), box[:2])
+            img.paste(band.full, (x, y), self._scaled(i, "mask", level))
+        return img
+
+    @property
+    def base_rgb(self) -> Image.Image:
+        if self._base_rgb is None:
+            self._base_rgb = self.base.convert("RGB")
+        return self._base_rgb
+
+    def frame(self, t_or_state: Any) -> Image.Image:
+        """The RGB frame at time `t` (seconds) or in a State."""
+
+        state = t_or_state if isinstance(t_or_state, tuple) else self.state(t_or_state)
+        img = self.base_rgb.copy()
+        img.paste(self.patch(state).convert("RGB"), self.dirty[:2])
+        return img
+
+
+# Worker state: set once per process by the pool initializer
+_clip: Optional[Clip] = None
+_palette: Optional[Image.Image] = None
+_base_q: Optional[Image.Image] = None
+
+
+def _init(clip: Clip, palette: Optional[Image.Image]) -> None:
+    global _clip, _palette, _base_q
+    _clip, _palette, _base_q = clip, palette, None
+
+
+def _frame_rgb(state: State) -> Image.Image:
+    return _clip.frame(state)
+
+
+def _frame_gif(state: State) -> Image.Image:
+    # The static part is quantized once per worker; frames only quantize `dirty`
+    global _base_q
+    if _base_q is None:
+        _base_q = _clip.base_rgb.quantize(palette=_palette)
+    img = _base_q.copy()
+    img.paste(_clip.patch(state).convert("RGB").quantize(palette=_palette), _clip.dirty[:2])
+    return img
+
+
+def _frame_png(job: Tuple[State, List[str]]) -> int:
+    state, outs = job
+    data = encode_png(_clip.frame(state), compress_level=1)   # ffmpeg input: fast zlib
+    return sum(write_bytes_if_changed(data, out)[1] for out in outs)
+
+
+def _map(clip: Clip, fn: Callable[[Any], Any], items: Sequence[Any], workers: int,
+         palette: Optional[Image.Image] = None) -> List[Any]:
+    if workers <= 1 or len(items) < 2:
+        _init(clip, palette)
+        return [fn(x) for x in items]
+    chunk = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(clip, palette)) as ex:
+        out = []
+        for result, spans in ex.map(functools.partial(traced, handoff(), fn), items, chunksize=chunk):
+            adopt(spans)
+            out.append(result)
+        return out
+
+
+def out_path(still: str, kind: str) -> str:
+    """Where the `kind` animation of the still at `still` goes (frames: a directory)."""
+
+    stem = os.path.splitext(still)[0]
+    return {"gif": f"{stem}.gif", "apng": f"{stem}.apng", "frames": f"{stem}-frames"}[kind]
+
+
+def render(clip: Clip, out: str, kind: str, seconds: float = DEFAULT_SECONDS, fps: int = DEFAULT_FPS,
+           workers: int = DEFAULT_WORKERS) -> Optional[str]:
+    """Render `clip` to `out` as `kind`; returns the file's sha256 (None for frames)."""
+
+    states = [clip.state(i / fps) for i in range(max(1, int(round(seconds * fps))))]
+    unique = list(dict.fromkeys(states))
+    with span("anim.render", out=out, kind=kind, frames=len(states), unique=len(unique), workers=workers) as a:
+        if kind == "frames":
+            os.makedirs(out, exist_ok=True)
+            paths: Dict[State, List[str]] = {st: [] for st in unique}
+            for i, st in enumerate(states):
+                paths[st].append(os.path.join(out, f"{i + 1:04d}.png"))
+            a["changed"] = sum(_map(clip, _frame_png, list(paths.items()), workers))
+            # Frames left over from a longer clip would end up in the video
+            for name in os.listdir(out):
+                if name.endswith(".png") and name[:-4].isdigit() and int(name[:-4]) > len(states):
+                    os.remove(os.path.join(out, name))
+            return None
+
+        if kind == "gif":
+            # One palette for every frame, taken once everything is on screen and
+            # the glow is brightest, so its greens get palette entries
+            palette = clip.frame(clip.showcase_s).quantize(256)
+            rendered = _map(clip, _frame_gif, unique, workers, palette)
+            # optimize=True re-derives transparency for every frame in Python
+            # (~10x slower here); frames are already cropped to what changed
+            save_kw: Dict[str, Any] = {"format": "GIF", "optimize": False}
+        elif kind == "apng":
+            rendered = _map(clip, _frame_rgb, unique, workers)
+            save_kw = {"format": "PNG"}
+        else:
+            raise ValueError(f"Unknown animation kind {kind!r} (choose from {', '.join(KINDS)})")
+        by_state = dict(zip(unique, rendered))
+        frames = [by_state[st] for st in states]
+
+        with span("anim.encode", kind=kind):
+            os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+            tmp = f"{out}.{os.getpid()}.tmp"
+            frames[0].save(tmp, save_all=True, append_images=frames[1:], duration=int(round(1000 / fps)), loop=0,
+                           **save_kw)
+            os.replace(tmp, out)
+        return file_sha(out)
+
+
+def export(index: BuildIndex, still: str, bg: Image.Image, compose: Callable[..., Image.Image], kind: str,
+           seconds: float = DEFAULT_SECONDS, fps: int = DEFAULT_FPS, effects: Sequence[str] = DEFAULT_EFFECTS,
+           workers: int = DEFAULT_WORKERS, glow_color: Tuple[int, int, int] = ig_chart.UP, seed: int = 0) -> Optional[str]:
+    """Animate the built still at `still`, skipping GIF/APNG outputs that are up to date.
+
+    The fingerprint chains to the still's own, so a copy, layout or
+    background change re-renders the animation too. Returns the output
+    path, or None if the still has not been built.
+    """
+
+    entry = index.get(still)
+    if not entry:
+        return None
+    out = out_path(still, kind)
+    fp = fingerprint(still=entry.get("fingerprint"), kind=kind, seconds=seconds, fps=fps, effects=sorted(effects),
+                     glow=list(glow_color), seed=seed, template=source_hash(Clip, render, text_bands, glow_sprite, _frame_gif))
+    if kind != "frames" and index.fresh(out, fp):
+        print(f"Up to date: {out}")
+        return out
+    clip = Clip.build(bg, compose, effects, glow_color, seed)
+    sha = render(clip, out, kind, seconds, fps, workers)
+    if sha is not None:
+        meta = {k: v for k, v in entry.items() if k not in ("fingerprint", "sha256")}
+        index.record(out, fp, sha, still=still, **meta)
+    print(f"Animated: {out}" + (f"  ({FFMPEG_HINT.format(fps=fps, dir=out, mp4=out[:-len('-frames')] + '.mp4')})"
+                                if kind == "frames" else ""))
+    return out
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Content-addressed background cache for Neural-Engine media.
+
+Backgrounds returned by fal.ai are stored once under
+  $IG_CACHE_DIR/bg/<sha256>.png     (default IG_CACHE_DIR=.cache/ig)
+keyed by the hash of their decoded RGBA pixels, so a slide can be
+re-rendered later (new headline, footer tweak) without a new fal call.
+
+A small in-process LRU keeps recently used backgrounds decoded, which
+matters for long-running processes (ig_daemon). Images returned by get()
+are shared: treat them as read-only (ig_export.cover() copies).
+
+fitted(sha, size) is what the renderers use: the background already
+cover-cropped to an export size, stored once as a raw RGBA file
+  $IG_CACHE_DIR/raw/<sha>-<w>x<h>.rgba
+and memory-mapped on later uses (ig_rawimg), so repeat renders skip PNG
+decode, convert and resize entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import Image
+
+import ig_rawimg
+
+MEM_ENTRIES = 16
+
+_mem_lock = threading.Lock()
+_mem: "OrderedDict[str, Image.Image]" = OrderedDict()
+
+
+def _remember(sha: str, img: Image.Image) -> None:
+    with _mem_lock:
+        _mem[sha] = img
+        _mem.move_to_end(sha)
+        while len(_mem) > MEM_ENTRIES:
+            _mem.popitem(last=False)
+
+
+def cache_dir(*parts: str) -> str:
+    root = os.environ.get("IG_CACHE_DIR", ".cache/ig")
+    return os.path.join(root, *parts)
+
+
+def image_sha(img: Image.Image) -> str:
+    h = hashlib.sha256()
+    h.update(f"{img.mode}:{img.width}x{img.height}:".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def path_for(sha: str) -> str:
+    return cache_dir("bg", f"{sha}.png")
+
+
+def put(img: Image.Image) -> str:
+    """Store `img` (RGBA) if new; return its sha."""
+
+    img = img if img.mode == "RGBA" else img.convert("RGBA")
+    sha = image_sha(img)
+    p = path_for(sha)
+    if not os.path.exists(p):
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        img.save(tmp, "PNG", compress_level=1)
+        os.replace(tmp, p)
+    _remember(sha, img)
+    return sha
+
+
+def has(sha: Optional[str]) -> bool:
+    if not sha:
+        return False
+    with _mem_lock:
+        if sha in _mem:
+            return True
+    return os.path.exists(path_for(sha))
+
+
+def get(sha: Optional[str]) -> Optional[Image.Image]:
+    """Load a cached background as RGBA, or None if missing."""
+
+    if not sha:
+        return None
+    with _mem_lock:
+        hit = _mem.get(sha)
+        if hit is not None:
+            _mem.move_to_end(sha)
+            return hit
+    p = path_for(sha)
+    if not os.path.exists(p):
+        return None
+    with Image.open(p) as im:
+        img = im.convert("RGBA")
+    _remember(sha, img)
+    return img
+
+
+def raw_path_for(sha: str, size: Tuple[int, int]) -> str:
+    return cache_dir("raw", f"{sha}-{size[0]}x{size[1]}.rgba")
+
+
+def fitted(sha: Optional[str], size: Tuple[int, int]) -> Optional[Image.Image]:
+    """Background `sha` cover-cropped to `size` as a read-only, memory-mapped RGBA image.
+
+    The first call per (sha, size) decodes and crops the PNG and writes the
+    raw file; later calls (any process) only map it. None if `sha` is unknown.
+    """
+
+    if not sha:
+        return None
+    rp = raw_path_for(sha, size)
+    if os.path.exists(rp):
+        try:
+            return ig_rawimg.load(rp)
+        except (OSError, ValueError):
+            pass  # truncated or foreign file: rebuild it below
+    from ig_export import cover
+
+    bg = get(sha)
+    if bg is None:
+        return None
+    img = cover(bg, size)
+    ig_rawimg.save(img, rp)
+    return img
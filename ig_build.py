@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Make-style incremental rebuild index for Neural-Engine slides.
+
+Every rendered output gets an entry in a sidecar index
+  assets/ig/.build-index.json
+  {"<out path>": {"fingerprint": ..., "sha256": ..., "bg": ..., ...}}
+
+- `fingerprint(...)` hashes a slide's inputs (template source, text, fonts,
+  background sha, canvas size) in canonical JSON
+- `BuildIndex.fresh(out, fp)` is True when the entry matches AND the file on
+  disk still has the recorded bytes -> skip the slide
+- `write_png(img, out)` only touches the file when the encoded bytes differ,
+  so unchanged slides keep their mtime/bytes (no git/CDN churn)
+
+The index also remembers which cached background (ig_bgcache) and A/B variant
+each slide used, so re-rendering after a copy edit needs no fal call.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+from io import BytesIO
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+INDEX_NAME = ".build-index.json"
+
+
+def fingerprint(**inputs: Any) -> str:
+    blob = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def source_hash(*fns: Callable[..., Any]) -> str:
+    """Hash of the template functions' source: any layout edit invalidates."""
+
+    h = hashlib.sha256()
+    for fn in fns:
+        h.update(inspect.getsource(fn).encode())
+    return h.hexdigest()[:16]
+
+
+def font_id(font: Any) -> str:
+    path = getattr(font, "path", None)
+    if not isinstance(path, str):
+        return f"default:{getattr(font, 'size', '')}"
+    try:
+        st = os.stat(path)
+        return f"{path}:{st.st_size}"
+    except OSError:
+        return path
+
+
+def file_sha(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def encode_png(img: Image.Image, **save_kw: Any) -> bytes:
+    buf = BytesIO()
+    img.convert("RGB").save(buf, "PNG", **save_kw)
+    return buf.getvalue()
+
+
+def write_bytes_if_changed(data: bytes, out: str) -> Tuple[str, bool]:
+    """Write `data` to `out` unless identical. Returns (sha256, changed)."""
+
+    sha = hashlib.sha256(data).hexdigest()
+    if file_sha(out) == sha:
+        return sha, False
+    d = os.path.dirname(out)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, out)
+    return sha, True
+
+
+def write_png(img: Image.Image, out: str, **save_kw: Any) -> Tuple[str, bool]:
+    return write_bytes_if_changed(encode_png(img, **save_kw), out)
+
+
+class BuildIndex:
+    """Sidecar index of rendered outputs, stored next to them."""
+
+    def __init__(self, out_dir: str = "assets/ig") -> None:
+        self.path = os.path.join(out_dir, INDEX_NAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+
+    def get(self, out: str) -> Dict[str, Any]:
+        return self.entries.get(out, {})
+
+    def fresh(self, out: str, fp: str) -> bool:
+        e = self.entries.get(out)
+        if not e or e.get("fingerprint") != fp:
+            return False
+        return file_sha(out) == e.get("sha256")
+
+    def record(self, out: str, fp: str, sha: str, **meta: Any) -> None:
+        entry = {"fingerprint": fp, "sha256": sha, **meta}
+        if self.entries.get(out) != entry:
+            self.entries[out] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, self.path)
+        self._dirty = False
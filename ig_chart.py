@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Procedural candlestick chart motif for Neural-Engine backgrounds.
+
+- `ohlc(n, seed)` is a seeded random-walk OHLC + volume series
+- `layer(size, ...)` rasterizes hundreds of candles (wicks + bodies), moving
+  average lines and volume bars into ONE transparent RGBA layer
+
+Rasterization is a single NumPy pass: every primitive is a vertical span per
+pixel column, so each element type is one broadcast comparison of the row
+index against per-column top/bottom arrays instead of per-candle draw calls.
+Layers are cached by their arguments; treat the returned image as read-only
+and composite it (Image.alpha_composite / img.alpha_composite(layer, xy)).
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+Color = Tuple[int, int, int]
+
+UP = (16, 185, 129)       # teal
+DOWN = (99, 102, 241)     # indigo
+MA_COLORS = ((251, 191, 36), (139, 92, 246))   # gold, violet
+
+
+def ohlc(n: int, seed: int = 0, start: float = 100.0, vol: float = 0.018, drift: float = 0.0006) -> Dict[str, np.ndarray]:
+    """Seeded random-walk candles: open/high/low/close/volume arrays of length n."""
+
+    rng = np.random.default_rng(seed)
+    # Volatility clusters a little, like real markets
+    sigma = vol * np.exp(np.convolve(rng.normal(0, 0.35, n), np.ones(8) / 8, mode="same"))
+    rets = drift + sigma * rng.standard_normal(n)
+    close = start * np.exp(np.cumsum(rets))
+    open_ = np.concatenate([[start], close[:-1]]) * np.exp(sigma * 0.15 * rng.standard_normal(n))
+    hi_ext = np.abs(rng.normal(0, sigma * 0.6, n))
+    lo_ext = np.abs(rng.normal(0, sigma * 0.6, n))
+    high = np.maximum(open_, close) * np.exp(hi_ext)
+    low = np.minimum(open_, close) * np.exp(-lo_ext)
+    volume = (1.0 + np.abs(rets) / vol) * rng.lognormal(0.0, 0.35, n)
+    return {"open": open_, "high": high, "low": low, "close": close, "volume": volume}
+
+
+def moving_average(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean; the first window-1 values average what is available."""
+
+    c = np.cumsum(np.insert(x, 0, 0.0))
+    idx = np.arange(1, len(x) + 1)
+    lo = np.maximum(0, idx - window)
+    return (c[idx] - c[lo]) / (idx - lo)
+
+
+def _spans(yy: np.ndarray, top: np.ndarray, bot: np.ndarray, on: np.ndarray) -> np.ndarray:
+    """(H, W) mask of rows top..bot (inclusive) in the columns where `on`."""
+
+    return (yy >= top[None, :]) & (yy <= bot[None, :]) & on[None, :]
+
+
+@functools.lru_cache(maxsize=32)
+def layer(
+    size: Tuple[int, int],
+    n: int = 160,
+    seed: int = 0,
+    alpha: int = 70,
+    up: Color = UP,
+    down: Color = DOWN,
+    ma_windows: Tuple[int, ...] = (20, 50),
+    volume: bool = True,
+    fade_left: bool = True,
+) -> Image.Image:
+    """Transparent RGBA chart of `n` candles filling `size` (w, h)."""
+
+    w, h = size
+    k = max(1.0, min(w, h) / 512.0)
+    d = ohlc(n, seed)
+
+    vol_h = int(h * 0.18) if volume else 0
+    price_top, price_bot = int(h * 0.04), h - vol_h - int(h * 0.04)
+    lo, hi = float(d["low"].min()), float(d["high"].max())
+
+    def to_y(p: np.ndarray) -> np.ndarray:
+        return price_bot - (p - lo) / (hi - lo) * (price_bot - price_top)
+
+    # Column -> candle geometry
+    pitch = w / n
+    xs = np.arange(w)
+    ci = np.minimum((xs / pitch).astype(int), n - 1)
+    offset = xs - (ci + 0.5) * pitch
+    body_on = np.abs(offset) <= max(1.0, pitch * 0.32)
+    wick_on = np.abs(offset) <= max(0.5, k * 0.6)
+    rising = (d["close"] >= d["open"])[ci]
+
+    yy = np.arange(h)[:, None]
+    o_y, c_y = to_y(d["open"])[ci], to_y(d["close"])[ci]
+    wick = _spans(yy, to_y(d["high"])[ci], to_y(d["low"])[ci], wick_on)
+    body = _spans(yy, np.minimum(o_y, c_y), np.maximum(o_y, c_y) + 1, body_on)
+
+    rgba = np.zeros((h, w, 4), np.uint8)
+    col = np.where(rising[:, None], np.array(up, np.uint8), np.array(down, np.uint8))   # (W, 3)
+
+    if volume:
+        v_top = h - 1 - d["volume"][ci] / d["volume"].max() * (vol_h - 2)
+        vmask = _spans(yy, v_top, np.full(w, h - 1.0), body_on)
+        rgba[vmask, :3] = np.broadcast_to(col[None], (h, w, 3))[vmask]
+        rgba[vmask, 3] = alpha // 2
+
+    candles = wick | body
+    rgba[candles, :3] = np.broadcast_to(col[None], (h, w, 3))[candles]
+    rgba[candles, 3] = alpha
+
+    # Moving averages: per column, span between this and the next column's y
+    half = max(1.0, k * 0.9)
+    for window, ma_col in zip(ma_windows, MA_COLORS):
+        ma_y = np.interp(xs / pitch - 0.5, np.arange(n), to_y(moving_average(d["close"], window)))
+        nxt = np.concatenate([ma_y[1:], ma_y[-1:]])
+        mask = _spans(yy, np.minimum(ma_y, nxt) - half, np.maximum(ma_y, nxt) + half, np.ones(w, bool))
+        rgba[mask, :3] = ma_col
+        rgba[mask, 3] = min(255, int(alpha * 1.3))
+
+    if fade_left:
+        ramp = np.clip(xs / (w * 0.35), 0.0, 1.0)
+        rgba[..., 3] = (rgba[..., 3] * ramp[None, :]).astype(np.uint8)
+
+    return Image.fromarray(rgba, "RGBA")
+
+
+def motif(img: Image.Image, box: Tuple[int, int, int, int], seed: int = 0, alpha: int = 70,
+          n: Optional[int] = None, **kw) -> None:
+    """Composite a chart layer into `box` (x0, y0, x1, y1) of the RGBA `img`, in place."""
+
+    x0, y0, x1, y1 = box
+    size = (x1 - x0, y1 - y0)
+    img.alpha_composite(layer(size, n or max(20, size[0] // 6), seed, alpha, **kw), (x0, y0))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Layered alpha compositing for the Neural-Engine Pillow renderers.
+
+`ImageDraw.Draw(rgba_img)` REPLACES pixels: `fill=(*ACCENT2, 40)` writes
+alpha 40 into the slide instead of blending a 16% tint over it, and the final
+`.convert("RGB")` then shows a solid colour. The usual fix (draw on a
+full-canvas transparent overlay, `Image.alpha_composite` the whole canvas)
+is correct but costs full-canvas passes per overlay.
+
+`Canvas` is an ImageDraw-compatible drawing surface that blends correctly
+and only touches what was drawn:
+
+- opaque elements (3-tuples or alpha 255) go straight onto the base image,
+  which is exactly what blending them would give
+- translucent elements go onto ONE scratch layer, which records the dirty
+  bounding box of each element; the layer is composited onto the base only
+  inside those boxes (`alpha_composite(..., dest, source)`), then cleared
+  there for reuse
+- the layer is flushed only when needed for correct ordering: before an
+  element that overlaps a pending dirty box, and at flatten()
+
+Within one layer the dirty boxes never overlap, so compositing them one by
+one is exact. Text goes through ig_text's cached masks.
+
+    canvas = Canvas(img)               # RGBA, modified in place
+    canvas.rounded_rectangle(box, radius=18, fill=(*ACCENT2, 40), outline=(*ACCENT2, 140))
+    canvas.text(xy, "NEURAL-ENGINE", font=f, fill=INK)
+    img = canvas.flatten()
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+import ig_text
+
+Box = Tuple[int, int, int, int]   # x0, y0, x1, y1 (exclusive)
+
+
+def _opaque(color: Any) -> bool:
+    if color is None:
+        return True
+    if isinstance(color, tuple):
+        return len(color) < 4 or color[3] >= 255
+    return True   # ints / names: no alpha
+
+
+def _normalize(xy: Any) -> Tuple[float, float, float, float]:
+    if len(xy) == 2:
+        (x0, y0), (x1, y1) = xy
+    else:
+        x0, y0, x1, y1 = xy
+    return x0, y0, x1, y1
+
+
+def _points(xy: Sequence[Any]) -> List[Tuple[float, float]]:
+    if xy and isinstance(xy[0], (tuple, list)):
+        return [tuple(p) for p in xy]
+    return list(zip(xy[0::2], xy[1::2]))
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class Canvas:
+    """Blending draw surface over an RGBA image (see module docstring)."""
+
+    def __init__(self, img: Image.Image) -> None:
+        if img.mode != "RGBA":
+            raise ValueError(f"Canvas needs an RGBA image, got {img.mode}")
+        self.img = img
+        self._base = ImageDraw.Draw(img)
+        self._layer: Optional[Image.Image] = None
+        self._layer_draw: Optional[ImageDraw.ImageDraw] = None
+        self._dirty: List[Box] = []
+        self.stats: Dict[str, int] = {"flushes": 0, "composited_px": 0, "direct": 0, "layered": 0}
+
+    # ── plumbing ────────────────────────────────────────────────────────────
+    def _clip(self, box: Tuple[float, float, float, float], pad: float = 0) -> Optional[Box]:
+        x0 = max(0, int(box[0] - pad))
+        y0 = max(0, int(box[1] - pad))
+        x1 = min(self.img.width, int(box[2] + pad) + 2)   # Pillow's x1/y1 are inclusive
+        y1 = min(self.img.height, int(box[3] + pad) + 2)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+    def _target(self, box: Optional[Box], opaque: bool) -> Optional[ImageDraw.ImageDraw]:
+        """Where an element covering `box` should be drawn (None: off-canvas)."""
+
+        if box is None:
+            return None
+        if any(_overlaps(box, d) for d in self._dirty):
+            self.flush()
+        if opaque:
+            self.stats["direct"] += 1
+            return self._base
+        if self._layer is None:
+            self._layer = Image.new("RGBA", self.img.size, (0, 0, 0, 0))
+            self._layer_draw = ImageDraw.Draw(self._layer)
+        self._dirty.append(box)
+        self.stats["layered"] += 1
+        return self._layer_draw
+
+    def flush(self) -> None:
+        """Composite the pending layer's dirty boxes onto the base and clear them."""
+
+        if not self._dirty:
+            return
+        for box in self._dirty:
+            self.img.alpha_composite(self._layer, box[:2], box)
+            self._layer.paste((0, 0, 0, 0), box)
+            self.stats["composited_px"] += (box[2] - box[0]) * (box[3] - box[1])
+        self._dirty.clear()
+        self.stats["flushes"] += 1
+
+    def flatten(self) -> Image.Image:
+        """Finish all pending blending; returns the (same) base image."""
+
+        self.flush()
+        return self.img
+
+    # ── ImageDraw-compatible primitives ─────────────────────────────────────
+    def rectangle(self, xy: Any, fill: Any = None, outline: Any = None, width: int = 1) -> None:
+        d = self._target(self._clip(_normalize(xy), width), _opaque(fill) and _opaque(outline))
+        if d is not None:
+            d.rectangle(xy, fill=fill, outline=outline, width=width)
+
+    def rounded_rectangle(self, xy: Any, radius: float = 0, fill: Any = None, outline: Any = None,
+                          width: int = 1, **kw: Any) -> None:
+        d = self._target(self._clip(_normalize(xy), width), _opaque(fill) and _opaque(outline))
+        if d is not None:
+            d.rounded_rectangle(xy, radius=radius, fill=fill, outline=outline, width=width, **kw)
+
+    def ellipse(self, xy: Any, fill: Any = None, outline: Any = None, width: int = 1) -> None:
+        d = self._target(self._clip(_normalize(xy), width), _opaque(fill) and _opaque(outline))
+        if d is not None:
+            d.ellipse(xy, fill=fill, outline=outline, width=width)
+
+    def line(self, xy: Any, fill: Any = None, width: int = 0, **kw: Any) -> None:
+        pts = _points(xy)
+        xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+        d = self._target(self._clip((min(xs), min(ys), max(xs), max(ys)), width / 2 + 1), _opaque(fill))
+        if d is not None:
+            d.line(xy, fill=fill, width=width, **kw)
+
+    def text(self, xy: Tuple[float, float], text: str, fill: Any = None,
+             font: Optional[ImageFont.ImageFont] = None, **kw: Any) -> None:
+        font = font or ImageFont.load_default()
+        if "\n" in text or kw:
+            x0, y0, x1, y1 = self._base.multiline_textbbox(xy, text, font=font, **kw)
+        else:
+            bx0, by0, bx1, by1 = ig_text.text_bbox(text, font)
+            x0, y0, x1, y1 = xy[0] + bx0, xy[1] + by0, xy[0] + bx1, xy[1] + by1
+        opaque = _opaque(fill)
+        d = self._target(self._clip((x0, y0, x1, y1), 1), opaque)
+        if d is None:
+            return
+        if kw or not isinstance(fill, tuple):
+            d.text(xy, text, fill=fill, font=font, **kw)
+        else:
+            ig_text.draw_text(self.img if opaque else self._layer, (int(xy[0]), int(xy[1])), text, font, fill, d)
+
+    def composite(self, im: Image.Image, xy: Tuple[int, int] = (0, 0)) -> None:
+        """Blend a pre-rendered RGBA image (chart layer, scrim) at `xy`."""
+
+        box = self._clip((xy[0], xy[1], xy[0] + im.width - 2, xy[1] + im.height - 2))
+        if box is None:
+            return
+        if any(_overlaps(box, d) for d in self._dirty):
+            self.flush()
+        sx, sy = box[0] - xy[0], box[1] - xy[1]
+        self.img.alpha_composite(im, box[:2], (sx, sy, sx + box[2] - box[0], sy + box[3] - box[1]))
+        self.stats["composited_px"] += (box[2] - box[0]) * (box[3] - box[1])
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""Warm scheduler daemon for Neural-Engine IG jobs.
+
+Replaces the cold per-run cron invocations: one long-lived process keeps
+Pillow, loaded fonts, cached text masks, the fal/Graph HTTP keep-alive pools
+and the in-memory background cache warm, and runs jobs in-process.
+
+Run:
+  python3 ig_daemon.py serve [--am 09:00] [--pm 17:00] [--no-publish] [--config daemon.json]
+
+Enqueue ad-hoc jobs over the local control socket:
+  python3 ig_daemon.py enqueue carousel -- --theme risk --slug risk-101
+  python3 ig_daemon.py enqueue publish_single -- assets/ig/x.png "caption"
+  python3 ig_daemon.py status
+
+Jobs are the existing CLIs' main(argv): carousel, single,
+publish_single, publish_carousel, pool. The default schedule tops up the
+background pool off-peak, renders the AM carousel and PM single, and
+publishes each one at --am-publish / --pm-publish. By then the renders
+must be public at ig_graph.RAW_BASE. The theme rotates per day like
+`ig_queue.py backfill` (slug = theme); the PM single uses the theme's
+closing slide.
+
+--config is a JSON list of
+  {"at": "H:MM", "job": "<name>", "args": [...], "name": "<id>", "after": "<id>"}
+that replaces the default schedule. In args, {date} {theme} {slug}
+{caption_am} {headline_pm} {sub_pm} {caption_pm} are filled in per day,
+and a lone "{slides}" becomes that day's carousel stills. An entry with
+"after" runs only if the named entry ran that day and succeeded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import importlib
+import itertools
+import json
+import os
+import queue
+import re
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RC_KEEP = 500
+
+JOBS: Dict[str, str] = {
+    "carousel": "gen_ig_carousel_daily_fal",
+    "single": "gen_ig_single_daily_fal",
+    "publish_single": "publish_ig_single",
+    "publish_carousel": "publish_ig_carousel",
+    "pool": "ig_pool",
+}
+
+
+THEMES = ("workflow", "risk", "privacy", "myths", "features")   # rotated per day, as in ig_queue backfill
+DISCLAIMER = "Not financial advice. Trade responsibly."
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def parse_at(value: str) -> dt.time:
+    """'9:00' / '09:00' (local time) -> datetime.time; ValueError otherwise."""
+
+    try:
+        h, m = value.strip().split(":")
+        return dt.time(int(h), int(m))
+    except ValueError:
+        raise ValueError(f"bad schedule time {value!r} (want H:MM)") from None
+
+
+def load_schedule(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Check a schedule and parse its times; unknown jobs and dangling `after`s are errors."""
+
+    names = {e["name"] for e in entries if e.get("name")}
+    out = []
+    for e in entries:
+        if e.get("job") not in JOBS:
+            raise ValueError(f"unknown job {e.get('job')!r} in schedule; choose from {', '.join(JOBS)}")
+        if e.get("after") and e["after"] not in names:
+            raise ValueError(f"schedule entry {e['job']!r} runs after unknown entry {e['after']!r}")
+        out.append(dict(e, at=parse_at(e["at"])))
+    return out
+
+
+def default_schedule(pool_at: str, am: str, pm: str, am_publish: str, pm_publish: str,
+                     publish: bool = True) -> List[Dict[str, Any]]:
+    day = ["--date", "{date}", "--theme", "{theme}", "--slug", "{slug}"]
+    schedule = [
+        {"at": pool_at, "job": "pool", "args": ["fill"]},
+        {"name": "am", "at": am, "job": "carousel", "args": day},
+        {"name": "pm", "at": pm, "job": "single", "args": day + ["--headline", "{headline_pm}", "--sub", "{sub_pm}"]},
+    ]
+    if publish:
+        schedule += [
+            {"at": am_publish, "job": "publish_carousel", "after": "am", "args": ["{caption_am}", "{slides}"]},
+            {"at": pm_publish, "job": "publish_single", "after": "pm",
+             "args": ["assets/ig/{date}-PM-{slug}.png", "{caption_pm}"]},
+        ]
+    return schedule
+
+
+def day_context(day: dt.date, themes: Sequence[str] = THEMES) -> Dict[str, str]:
+    """Placeholder values for one day's scheduled jobs."""
+
+    from gen_ig_carousel_daily_fal import DEFAULT_SLIDES, THEMES as SLIDES
+
+    theme = themes[day.toordinal() % len(themes)]
+    slides = SLIDES.get(theme) or DEFAULT_SLIDES
+    first, last = slides[0], slides[-1]
+    am_headline, pm_headline = first.headline.replace("\n", " "), last.headline.replace("\n", " ")
+    return {
+        "date": day.isoformat(),
+        "theme": theme,
+        "slug": theme,
+        "caption_am": f"{am_headline} {first.sub}\n\n{DISCLAIMER}",
+        "headline_pm": pm_headline,
+        "sub_pm": last.sub,
+        "caption_pm": f"{pm_headline} {last.sub}\n\n{DISCLAIMER}",
+    }
+
+
+def expand(args: List[str], ctx: Dict[str, str]) -> List[str]:
+    """Fill the day's placeholders into a job's argv (at run time, so {slides} sees the renders)."""
+
+    out: List[str] = []
+    for a in args:
+        if a == "{slides}":
+            pat = re.compile(rf"^{re.escape(ctx['date'])}-AM-{re.escape(ctx['slug'])}-S\d+\.png$")
+            out += sorted(f"assets/ig/{n}" for n in os.listdir("assets/ig") if pat.match(n))
+        else:
+            out.append(_PLACEHOLDER.sub(lambda m: ctx.get(m[1], m[0]), a))
+    return out
+
+
+def default_socket() -> str:
+    return os.environ.get("IG_DAEMON_SOCKET", os.path.join(HERE, ".cache", "ig", "daemon.sock"))
+
+
+def log(msg: str) -> None:
+    print(f"[{dt.datetime.now().isoformat(timespec='seconds')}] {msg}", flush=True)
+
+
+def warm_up() -> None:
+    """Import the job modules once and pre-rasterize the shared boilerplate."""
+
+    import ig_text
+
+    for mod_name in JOBS.values():
+        importlib.import_module(mod_name)
+
+    for mod_name in ("gen_ig_carousel_daily_fal", "gen_ig_single_daily_fal"):
+        mod = sys.modules[mod_name]
+        ig_text.prewarm(mod.load_font(21, bold=True), "NEURAL-ENGINE")
+        ig_text.prewarm(mod.load_font(16), "Not financial advice. Trade responsibly.")
+
+
+class Daemon:
+    def __init__(self, schedule: List[Dict[str, Any]]) -> None:
+        self.schedule = schedule
+        self.jobs: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.stop = threading.Event()
+        self.ids = itertools.count(1)
+        self.history: List[Dict[str, Any]] = []
+        self.current: Optional[Dict[str, Any]] = None
+        self.rcs: Dict[int, Any] = {}     # job id -> rc, for `after` (last RC_KEEP jobs)
+        self.fired: Dict[str, Any] = {}   # schedule entry name -> (date, job id) of its last run
+
+    # ── queue ────────────────────────────────────────────────────────────────
+    def enqueue(self, job: str, args: List[str], source: str = "socket", ctx: Optional[Dict[str, str]] = None,
+                after: Optional[int] = None) -> int:
+        if job not in JOBS:
+            raise ValueError(f"unknown job {job!r}; choose from {', '.join(JOBS)}")
+        jid = next(self.ids)
+        log(f"queued #{jid} {job} {args} ({source})")
+        self.jobs.put({"id": jid, "job": job, "args": list(args), "source": source, "ctx": ctx,
+                       "after": after, "queued": time.time()})
+        return jid
+
+    def _done(self, item: Dict[str, Any]) -> None:
+        self.rcs[item["id"]] = item["rc"]
+        self.rcs.pop(item["id"] - RC_KEEP, None)
+        self.history = (self.history + [item])[-50:]
+
+    def _run_one(self, item: Dict[str, Any]) -> None:
+        main: Callable[[Optional[List[str]]], Any] = sys.modules[JOBS[item["job"]]].main
+        # One worker runs jobs in queue order, so a dependency has finished by now
+        if item["after"] is not None and self.rcs.get(item["after"]) != 0:
+            item.update(rc="skipped", seconds=0.0)
+            self._done(item)
+            log(f"skipped #{item['id']} {item['job']}: #{item['after']} did not succeed")
+            return
+        if item["ctx"]:
+            item["args"] = expand(item["args"], item["ctx"])
+        self.current = item
+        t0 = time.perf_counter()
+        rc: Any = 0
+        try:
+            rc = main(item["args"]) or 0
+        except SystemExit as e:
+            rc = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            rc = 1
+        finally:
+            self.current = None
+        item.update(rc=rc, seconds=round(time.perf_counter() - t0, 3))
+        self._done(item)
+        log(f"done #{item['id']} {item['job']} rc={rc} in {item['seconds']}s")
+
+    def worker(self) -> None:
+        while not self.stop.is_set():
+            try:
+                item = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._run_one(item)
+
+    # ── schedule ─────────────────────────────────────────────────────────────
+    def fire(self, entry: Dict[str, Any], day: dt.date) -> Optional[int]:
+        """Queue one schedule entry for `day`; entries whose dependency did not run that day are skipped."""
+
+        after = None
+        if entry.get("after"):
+            dep_day, after = self.fired.get(entry["after"], (None, None))
+            if dep_day != day:
+                log(f"skipped {entry['job']} at {entry['at']:%H:%M}: {entry['after']!r} did not run today")
+                return None
+        jid = self.enqueue(entry["job"], entry.get("args", []), source=f"schedule {entry['at']:%H:%M}",
+                           ctx=day_context(day), after=after)
+        if entry.get("name"):
+            self.fired[entry["name"]] = (day, jid)
+        return jid
+
+    def scheduler(self) -> None:
+        # Slots that already passed before startup are not back-filled
+        now = dt.datetime.now()
+        last_fired: Dict[int, Optional[dt.date]] = {
+            i: now.date() if now.time() >= e["at"] else None for i, e in enumerate(self.schedule)
+        }
+        while not self.stop.is_set():
+            now = dt.datetime.now()
+            for i, entry in enumerate(self.schedule):
+                if now.time() >= entry["at"] and last_fired[i] != now.date():
+                    last_fired[i] = now.date()
+                    self.fire(entry, now.date())
+            self.stop.wait(20)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "queued": self.jobs.qsize(),
+            "current": self.current,
+            "schedule": self.schedule,
+            "history": self.history[-10:],
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    daemon_ref: Daemon
+
+    def handle(self) -> None:
+        try:
+            req = json.loads(self.rfile.readline().decode() or "{}")
+            cmd = req.get("cmd", "enqueue")
+            if cmd == "status":
+                resp: Dict[str, Any] = {"ok": True, **self.daemon_ref.status()}
+            elif cmd == "enqueue":
+                jid = self.daemon_ref.enqueue(req["job"], req.get("args", []))
+                resp = {"ok": True, "id": jid}
+            elif cmd == "shutdown":
+                self.daemon_ref.stop.set()
+                resp = {"ok": True}
+            else:
+                resp = {"ok": False, "error": f"unknown cmd {cmd!r}"}
+        except Exception as e:
+            resp = {"ok": False, "error": str(e)}
+        self.wfile.write((json.dumps(resp, default=str) + "\n").encode())
+
+
+def serve(args: argparse.Namespace) -> int:
+    os.chdir(args.workdir)
+    if args.config:
+        with open(args.config, "r") as f:
+            entries = json.load(f)
+    else:
+        entries = default_schedule(args.pool_at, args.am, args.pm, args.am_publish, args.pm_publish,
+                                   publish=not args.no_publish)
+    try:
+        schedule = load_schedule(entries)
+    except (KeyError, ValueError) as e:
+        print(f"Bad schedule: {e}", file=sys.stderr)
+        return 2
+
+    t0 = time.perf_counter()
+    warm_up()
+    slots = ", ".join(f"{e['at']:%H:%M} {e['job']}" for e in schedule)
+    log(f"warm in {time.perf_counter() - t0:.2f}s; schedule: {slots}")
+
+    d = Daemon(schedule)
+    sock_path = args.socket
+    os.makedirs(os.path.dirname(sock_path), exist_ok=True)
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+    handler = type("Handler", (_Handler,), {"daemon_ref": d})
+    server = socketserver.ThreadingUnixStreamServer(sock_path, handler)
+    os.chmod(sock_path, 0o600)
+
+    threads = [
+        threading.Thread(target=d.worker, name="ig-worker", daemon=True),
+        threading.Thread(target=d.scheduler, name="ig-scheduler", daemon=True),
+        threading.Thread(target=server.serve_forever, name="ig-control", daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    log(f"listening on {sock_path}")
+    try:
+        while not d.stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        d.stop.set()
+    server.shutdown()
+    server.server_close()
+    os.unlink(sock_path)
+    log("stopped")
+    return 0
+
+
+def request(sock_path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(sock_path)
+        s.sendall((json.dumps(payload) + "\n").encode())
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    return json.loads(buf.decode())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--socket", default=default_socket())
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve")
+    sp.add_argument("--am", default="09:00", help="AM carousel render time (H:MM, local)")
+    sp.add_argument("--pm", default="17:00", help="PM single render time (H:MM, local)")
+    sp.add_argument("--am-publish", default="09:30", help="AM carousel publish time (H:MM, local)")
+    sp.add_argument("--pm-publish", default="17:30", help="PM single publish time (H:MM, local)")
+    sp.add_argument("--no-publish", action="store_true", help="Render on schedule but never publish")
+    sp.add_argument("--pool-at", default="03:00", help="Off-peak background pool top-up (H:MM, local)")
+    sp.add_argument("--config", help="JSON schedule file (overrides --am/--pm/--*-publish)")
+    sp.add_argument("--workdir", default=HERE)
+
+    ep = sub.add_parser("enqueue")
+    ep.add_argument("job", choices=sorted(JOBS))
+    ep.add_argument("job_args", nargs=argparse.REMAINDER)
+
+    sub.add_parser("status")
+    sub.add_parser("shutdown")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "serve":
+        return serve(args)
+
+    if args.cmd == "enqueue":
+        job_args = args.job_args[1:] if args.job_args[:1] == ["--"] else args.job_args
+        resp = request(args.socket, {"cmd": "enqueue", "job": args.job, "args": job_args})
+    else:
+        resp = request(args.socket, {"cmd": args.cmd})
+    print(json.dumps(resp, indent=2, default=str))
+    return 0 if resp.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
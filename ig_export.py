@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Multi-format export helpers for Neural-Engine IG posts.
+
+One fal.ai background + one text layout -> several aspect ratios/sizes.
+
+- FORMATS maps a name to (width, height, filename suffix)
+- `fal_image_size(formats)` picks ONE fal request size that covers them all
+  (the square-only default stays on fal's "square_hd" preset)
+- `cover(bg, size)` centre-crops/resizes the decoded background per format
+
+"square" keeps the historical 1024x1024 output name with no suffix, so
+existing cron jobs and publish paths are unchanged.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple, Union
+
+from PIL import Image, ImageOps
+
+FORMATS: Dict[str, Tuple[int, int, str]] = {
+    "square": (1024, 1024, ""),
+    "square1080": (1080, 1080, "-1080"),
+    "portrait": (1080, 1350, "-4x5"),
+    "story": (1080, 1920, "-9x16"),
+}
+
+
+def parse_formats(spec: str) -> List[str]:
+    """'square,story' -> ['square', 'story'] (order kept, duplicates dropped)."""
+
+    out: List[str] = []
+    for name in (p.strip() for p in spec.split(",")):
+        if not name:
+            continue
+        if name not in FORMATS:
+            raise ValueError(f"unknown format {name!r}; choose from {', '.join(FORMATS)}")
+        if name not in out:
+            out.append(name)
+    return out or ["square"]
+
+
+def _round16(v: int) -> int:
+    return (v + 15) // 16 * 16
+
+
+def fal_image_size(formats: Iterable[str]) -> Union[str, Dict[str, int]]:
+    """Smallest fal size every format can be cover-cropped from without upscaling."""
+
+    sizes = [FORMATS[f][:2] for f in formats]
+    if all(s == (1024, 1024) for s in sizes):
+        return "square_hd"
+    return {
+        "width": _round16(max(w for w, _ in sizes)),
+        "height": _round16(max(h for _, h in sizes)),
+    }
+
+
+def fal_pixels(image_size: Union[str, Dict[str, int]]) -> Tuple[int, int]:
+    """Pixel dimensions of a fal_image_size() result."""
+
+    if isinstance(image_size, str):
+        return FORMATS["square"][:2]
+    return image_size["width"], image_size["height"]
+
+
+def cover(bg: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Centre-crop `bg` to the target aspect and resize (always a new image)."""
+
+    if bg.size == size:
+        return bg.copy()
+    return ImageOps.fit(bg, size, method=Image.Resampling.BICUBIC)
+
+
+def out_path(base: str, fmt: str) -> str:
+    """assets/ig/x-S01.png + 'story' -> assets/ig/x-S01-9x16.png"""
+
+    root, ext = base.rsplit(".", 1)
+    return f"{root}{FORMATS[fmt][2]}.{ext}"
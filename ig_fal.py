@@ -4,24 +4,76 @@
 Uses synchronous Model Endpoint API via https://fal.run/<model>.
 Auth: reads FAL_KEY (preferred) or FAL_API_KEY.
 
-Returns downloaded image as PIL.Image.
+generate_image() returns one downloaded image as PIL.Image;
+generate_images() returns several samples of one prompt from a single
+`num_images` call, downloading them concurrently. call_with_deadline() bounds
+how long a run waits for them (the generators then fall back to
+ig_procedural) without throwing away a late result.
+
+Concurrent identical requests (model, prompt, size, seed, extra) are
+coalesced: the first caller makes the upstream call and download, the
+others wait for it and get a copy of the same image. Pass coalesce=False
+when distinct samples are wanted; a seedless request then gets its own
+random seed so the sample is distinct (and reproducible from the trace).
 """
 
 from __future__ import annotations
 
+import contextvars
+import json
 import os
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
 
 import requests
 from PIL import Image
 
+from ig_trace import span
+
+
+# fal's per-request cap on `num_images` (flux/dev)
+MAX_NUM_IMAGES = 4
+
 
 class FalError(RuntimeError):
     pass
 
 
+class DeadlineExceeded(FalError):
+    pass
+
+
+_session_obj: Optional[requests.Session] = None
+
+T = TypeVar("T")
+
+_inflight_lock = threading.Lock()
+_inflight: Dict[str, "_Flight"] = {}
+
+
+class _Flight:
+    """One upstream generation that identical concurrent callers wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.image: Optional[Image.Image] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+def _session() -> requests.Session:
+    """Keep-alive HTTP pool shared by all calls in this process."""
+
+    global _session_obj
+    if _session_obj is None:
+        _session_obj = requests.Session()
+    return _session_obj
+
+
 def _get_fal_key() -> str:
     key = os.environ.get("FAL_KEY") or os.environ.get("FAL_API_KEY")
     if not key:
@@ -29,17 +81,144 @@ def _get_fal_key() -> str:
     return key
 
 
+def call_with_deadline(fn: Callable[[], T], deadline_s: float,
+                       on_late: Optional[Callable[[T], None]] = None) -> T:
+    """Run `fn` in a worker thread and return its result within `deadline_s` seconds.
+
+    Raises DeadlineExceeded otherwise. The worker keeps going: if `fn` succeeds
+    after the deadline, `on_late(result)` is called from the worker, and the
+    (non-daemon) thread holds interpreter exit until then, so a late result
+    still lands in the cache even when the caller has already finished.
+    """
+
+    done = threading.Event()
+    box: Dict[str, Any] = {}
+    lock = threading.Lock()
+
+    def worker() -> None:
+        try:
+            result = fn()
+        except BaseException as e:
+            box["error"] = e
+            done.set()
+            return
+        with lock:
+            box["result"] = result
+            late = box.get("abandoned", False)
+        done.set()
+        if late and on_late is not None:
+            on_late(result)
+
+    # The copied context keeps the worker's spans in the caller's ig_trace run
+    threading.Thread(target=contextvars.copy_context().run, args=(worker,), name="fal-deadline", daemon=False).start()
+    finished = done.wait(max(0.0, deadline_s))
+    with lock:
+        if not finished and "result" not in box:
+            box["abandoned"] = True
+            raise DeadlineExceeded(f"no result within {deadline_s:.0f}s")
+    done.wait()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
+
+
 def generate_image(
     *,
     prompt: str,
     model: str = "fal-ai/flux/dev",
-    image_size: str = "square_hd",
+    image_size: Union[str, Dict[str, int]] = "square_hd",
     seed: Optional[int] = None,
     extra: Optional[Dict[str, Any]] = None,
     timeout_s: int = 120,
+    coalesce: bool = True,
 ) -> Image.Image:
-    """Generate one image with fal.ai and return it as a PIL Image."""
+    """Generate one image with fal.ai and return it as a PIL Image.
+
+    image_size is a fal preset ("square_hd") or {"width": .., "height": ..}.
+    With coalesce=False the call never shares a result and a missing seed
+    is replaced by a random one.
+    """
+
+    if not coalesce:
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**31)
+        return _generate(prompt, model, image_size, seed, extra, timeout_s)[0]
+
+    req = json.dumps([model, prompt, image_size, seed, extra or {}], sort_keys=True, default=str)
+    with _inflight_lock:
+        flight = _inflight.get(req)
+        leader = flight is None
+        if leader:
+            flight = _inflight[req] = _Flight()
+        else:
+            flight.waiters += 1
 
+    if not leader:
+        with span("fal.coalesced", model=model):
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.image.copy()
+
+    try:
+        flight.image = _generate(prompt, model, image_size, seed, extra, timeout_s)[0]
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[req]
+            shared = flight.waiters > 0
+        flight.done.set()
+    # Waiters copy from flight.image, so the leader must not hand it out mutable
+    return flight.image.copy() if shared else flight.image
+
+
+def generate_images(
+    *,
+    prompt: str,
+    num_images: int,
+    model: str = "fal-ai/flux/dev",
+    image_size: Union[str, Dict[str, int]] = "square_hd",
+    seed: Optional[int] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    timeout_s: int = 120,
+) -> List[Image.Image]:
+    """Generate `num_images` distinct samples of one prompt in as few fal calls as possible.
+
+    Requests are made MAX_NUM_IMAGES at a time (fal's `num_images`); all
+    returned URLs of a call are downloaded concurrently. Never coalesced.
+    """
+
+    images: List[Image.Image] = []
+    while len(images) < num_images:
+        n = min(MAX_NUM_IMAGES, num_images - len(images))
+        batch_seed = None if seed is None else seed + len(images)
+        images += _generate(prompt, model, image_size, batch_seed, extra, timeout_s, n)
+    return images
+
+
+def _download(url: str, timeout_s: int) -> bytes:
+    dl = _session().get(url, timeout=timeout_s)
+    if dl.status_code >= 400:
+        raise FalError(f"image download error {dl.status_code}: {url}")
+
+    # give CDN a beat if needed
+    if not dl.content:
+        time.sleep(0.5)
+        dl = _session().get(url, timeout=timeout_s)
+    return dl.content
+
+
+def _generate(
+    prompt: str,
+    model: str,
+    image_size: Union[str, Dict[str, int]],
+    seed: Optional[int],
+    extra: Optional[Dict[str, Any]],
+    timeout_s: int,
+    num_images: int = 1,
+) -> List[Image.Image]:
     key = _get_fal_key()
     url = f"https://fal.run/{model}"
 
@@ -47,17 +226,21 @@ def generate_image(
         "prompt": prompt,
         "image_size": image_size,
     }
+    if num_images > 1:
+        payload["num_images"] = num_images
     if seed is not None:
         payload["seed"] = seed
     if extra:
         payload.update(extra)
 
-    resp = requests.post(
-        url,
-        headers={"Authorization": f"Key {key}"},
-        json=payload,
-        timeout=timeout_s,
-    )
+    with span("fal.inference", model=model, image_size=image_size, seed=seed, num_images=num_images) as a:
+        resp = _session().post(
+            url,
+            headers={"Authorization": f"Key {key}"},
+            json=payload,
+            timeout=timeout_s,
+        )
+        a["http.status_code"] = resp.status_code
     if resp.status_code >= 400:
         raise FalError(f"fal.run error {resp.status_code}: {resp.text[:500]}")
 
@@ -66,18 +249,18 @@ def generate_image(
     if not images:
         raise FalError(f"fal.run returned no images. keys={list(data.keys())}")
 
-    img_url = images[0].get("url")
-    if not img_url:
-        raise FalError(f"fal.run response missing images[0].url")
-
-    # Download
-    dl = requests.get(img_url, timeout=timeout_s)
-    if dl.status_code >= 400:
-        raise FalError(f"image download error {dl.status_code}: {img_url}")
+    urls = [im.get("url") for im in images]
+    if not all(urls):
+        raise FalError(f"fal.run response missing images[].url")
 
-    # give CDN a beat if needed
-    if not dl.content:
-        time.sleep(0.5)
-        dl = requests.get(img_url, timeout=timeout_s)
+    # Download (all URLs of the batch at once over the shared keep-alive pool)
+    with span("fal.download", images=len(urls)) as a:
+        if len(urls) == 1:
+            blobs = [_download(urls[0], timeout_s)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(urls)) as ex:
+                blobs = list(ex.map(lambda u: _download(u, timeout_s), urls))
+        a["bytes"] = sum(len(b) for b in blobs)
 
-    return Image.open(BytesIO(dl.content)).convert("RGBA")
+    with span("image.decode", images=len(blobs)):
+        return [Image.open(BytesIO(b)).convert("RGBA") for b in blobs]
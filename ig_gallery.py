@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Incremental static gallery for assets/ig.
+
+Scans the rendered assets (PNG/JPEG in assets/ig), makes a small thumbnail
+per image and writes a paginated index:
+
+  assets/ig/index.html, index-2.html, ...     newest posts first
+  assets/ig/thumbs/<name>.webp                 (JPEG if Pillow lacks WebP)
+  assets/ig/thumbs/.gallery.json               per-source size/mtime/dims
+
+thumbs/ and the index-N.html pages are local build output and are not
+checked in (see .gitignore): mtimes differ per checkout, so a committed
+manifest would be stale on every clone.
+
+Only new or changed sources (size or mtime differ from .gallery.json) are
+thumbnailed, in a process pool; a re-run after one new post is a directory
+stat plus those few thumbnails. Pages are only rewritten when their HTML
+changes. Files are grouped into posts by their name
+(<date>-<AM|PM>-<slug>[-S<nn>][-<format>]); captions come from prompts.json
+and fallback backgrounds are flagged from the build index (ig_build).
+
+  python3 ig_gallery.py [--out-dir assets/ig] [--per-page 30] [--workers 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, features
+
+from ig_build import INDEX_NAME, write_bytes_if_changed
+from ig_export import FORMATS
+
+THUMB_DIR = "thumbs"
+MANIFEST_NAME = ".gallery.json"
+THUMB_WIDTH = 360
+SOURCE_EXTS = (".png", ".jpg", ".jpeg")
+
+_SUFFIX_FORMAT = {suffix[1:]: name for name, (_, _, suffix) in FORMATS.items() if suffix}
+NAME_RE = re.compile(
+    r"^(?P<date>\d{4}-\d{2}-\d{2})-(?P<slot>AM|PM)-(?P<slug>.+?)"
+    r"(?:-S(?P<slide>\d+))?(?:-(?P<fmt>" + "|".join(map(re.escape, _SUFFIX_FORMAT)) + r"))?$"
+)
+
+
+def thumb_ext() -> str:
+    return ".webp" if features.check("webp") else ".jpg"
+
+
+def make_thumb(src: str, dst: str, width: int) -> Tuple[int, int]:
+    """Write a `width`-wide thumbnail of `src` to `dst`; returns the source size."""
+
+    with Image.open(src) as im:
+        size = im.size
+        box = (width, max(1, round(size[1] * width / size[0])))
+        im.draft("RGB", box)   # JPEG: decode at reduced scale
+        im = im.convert("RGB")
+        im.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        if dst.endswith(".webp"):
+            im.save(tmp, "WEBP", quality=80, method=4)
+        else:
+            im.save(tmp, "JPEG", quality=82, optimize=True, progressive=True)
+    os.replace(tmp, dst)
+    return size
+
+
+def parse_name(name: str) -> Dict[str, Any]:
+    stem = os.path.splitext(name)[0]
+    m = NAME_RE.match(stem)
+    if not m:
+        return {"date": "", "slot": "", "slug": stem, "slide": 0, "format": "square"}
+    return {
+        "date": m["date"],
+        "slot": m["slot"],
+        "slug": m["slug"],
+        "slide": int(m["slide"] or 0),
+        "format": _SUFFIX_FORMAT.get(m["fmt"] or "", "square"),
+    }
+
+
+def _load_json(path: str, default: Any) -> Any:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class Gallery:
+    def __init__(self, out_dir: str = "assets/ig") -> None:
+        self.out_dir = out_dir
+        self.thumb_dir = os.path.join(out_dir, THUMB_DIR)
+        self.manifest_path = os.path.join(self.thumb_dir, MANIFEST_NAME)
+        self.entries: Dict[str, Dict[str, Any]] = _load_json(self.manifest_path, {})
+
+    def scan(self) -> Dict[str, os.stat_result]:
+        found = {}
+        with os.scandir(self.out_dir) as it:
+            for e in it:
+                if e.is_file() and e.name.lower().endswith(SOURCE_EXTS) and not e.name.startswith("."):
+                    found[e.name] = e.stat()
+        return found
+
+    def stale(self, found: Dict[str, os.stat_result], ext: str) -> List[str]:
+        todo = []
+        for name, st in found.items():
+            e = self.entries.get(name)
+            if (not e or e.get("size") != st.st_size or e.get("mtime_ns") != st.st_mtime_ns
+                    or not e.get("thumb", "").endswith(ext)
+                    or not os.path.exists(os.path.join(self.thumb_dir, e["thumb"]))):
+                todo.append(name)
+        return todo
+
+    def update(self, workers: int = 4) -> Tuple[int, int]:
+        """Thumbnail new/changed sources and drop removed ones; returns (made, removed)."""
+
+        ext = thumb_ext()
+        found = self.scan()
+        todo = self.stale(found, ext)
+        removed = [n for n in self.entries if n not in found]
+        for name in removed:
+            thumb = self.entries.pop(name).get("thumb")
+            if thumb:
+                try:
+                    os.unlink(os.path.join(self.thumb_dir, thumb))
+                except FileNotFoundError:
+                    pass
+
+        if todo:
+            os.makedirs(self.thumb_dir, exist_ok=True)
+            jobs = [(os.path.join(self.out_dir, n), os.path.join(self.thumb_dir, os.path.splitext(n)[0] + ext))
+                    for n in todo]
+            if len(jobs) == 1 or workers <= 1:
+                sizes = [make_thumb(src, dst, THUMB_WIDTH) for src, dst in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+                    sizes = list(ex.map(make_thumb, *zip(*jobs), [THUMB_WIDTH] * len(jobs), chunksize=4))
+            for name, (_, dst), (w, h) in zip(todo, jobs, sizes):
+                st = found[name]
+                self.entries[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                      "thumb": os.path.basename(dst), "w": w, "h": h}
+
+        if todo or removed:
+            os.makedirs(self.thumb_dir, exist_ok=True)
+            blob = json.dumps(self.entries, indent=1, sort_keys=True) + "\n"
+            write_bytes_if_changed(blob.encode(), self.manifest_path)
+        return len(todo), len(removed)
+
+    def posts(self) -> List[Dict[str, Any]]:
+        """Entries grouped by (date, slot, slug), newest first."""
+
+        captions = {e.get("file"): e.get("prompt", "")
+                    for e in _load_json(os.path.join(self.out_dir, "prompts.json"), [])
+                    if isinstance(e, dict)}
+        built = _load_json(os.path.join(self.out_dir, INDEX_NAME), {})
+
+        groups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for name, e in self.entries.items():
+            meta = parse_name(name)
+            key = (meta["date"], meta["slot"], meta["slug"])
+            post = groups.setdefault(key, {"date": meta["date"], "slot": meta["slot"], "slug": meta["slug"],
+                                           "images": [], "caption": ""})
+            b = built.get(os.path.join(self.out_dir, name), {})
+            post["images"].append({"name": name, **meta, **e, "fallback": bool(b.get("fallback"))})
+
+        fmt_order = {f: i for i, f in enumerate(FORMATS)}
+        for post in groups.values():
+            post["images"].sort(key=lambda i: (fmt_order.get(i["format"], 99), i["slide"], i["name"]))
+            post["caption"] = next((captions[i["name"]] for i in post["images"] if captions.get(i["name"])), "")
+        return sorted(groups.values(), key=lambda p: (p["date"], p["slot"], p["slug"]), reverse=True)
+
+
+PAGE_CSS = """\
+  :root { color-scheme: dark; }
+  body { margin: 24px; font: 14px/1.4 ui-sans-serif, system-ui; background: #0b0f14; color: #e8edf2; }
+  h1 { font-size: 18px; margin: 0 0 16px; }
+  h2 { font-size: 15px; margin: 0 0 8px; }
+  h2 small { color: #7d8a97; font-weight: normal; }
+  section { margin: 0 0 20px; padding: 12px; border: 1px solid #1e2a36; border-radius: 14px; background: #0f1620; }
+  .row { display: flex; gap: 10px; overflow-x: auto; align-items: flex-start; }
+  figure { margin: 0; flex: 0 0 auto; }
+  img { width: 180px; height: auto; border-radius: 8px; display: block; }
+  figcaption { margin-top: 4px; color: #b7c2cc; font-size: 12px; }
+  .fallback { color: #fbbf24; }
+  p.caption { color: #b7c2cc; margin: 8px 0 0; }
+  nav { margin: 16px 0; }
+  nav a, nav span { margin-right: 8px; color: #9cd1ff; }
+  nav span { color: #e8edf2; }
+"""
+
+
+def page_name(n: int) -> str:
+    return "index.html" if n == 1 else f"index-{n}.html"
+
+
+def _nav(page: int, pages: int) -> str:
+    if pages <= 1:
+        return ""
+    links = [f"<span>{n}</span>" if n == page else f'<a href="{page_name(n)}">{n}</a>'
+             for n in range(1, pages + 1)]
+    return f"<nav>{''.join(links)}</nav>"
+
+
+def render_page(posts: List[Dict[str, Any]], page: int, pages: int, total: int) -> str:
+    esc = html.escape
+    out = [
+        "<!doctype html>",
+        '<meta charset="utf-8" />',
+        '<meta name="viewport" content="width=device-width, initial-scale=1" />',
+        "<title>Neural-Engine media</title>",
+        f"<style>\n{PAGE_CSS}</style>",
+        f"<h1>Neural-Engine media <small>({total} posts, page {page}/{pages})</small></h1>",
+        _nav(page, pages),
+    ]
+    for post in posts:
+        title = " ".join(p for p in (post["date"], post["slot"]) if p)
+        out.append(f"<section>\n<h2>{esc(post['slug'])} <small>{esc(title)}</small></h2>\n<div class=\"row\">")
+        for im in post["images"]:
+            label = f"S{im['slide']:02d}" if im["slide"] else ""
+            label = " ".join(p for p in (label, im["format"] if im["format"] != "square" else "") if p)
+            flag = ' <span class="fallback">fallback bg</span>' if im["fallback"] else ""
+            tw = THUMB_WIDTH
+            th = max(1, round(im["h"] * tw / im["w"]))
+            out.append(
+                f'<figure><a href="{esc(im["name"])}"><img src="{THUMB_DIR}/{esc(im["thumb"])}" '
+                f'width="{tw}" height="{th}" loading="lazy" alt="{esc(im["name"])}" /></a>'
+                f"<figcaption>{esc(label) or '&nbsp;'}{flag}</figcaption></figure>"
+            )
+        out.append("</div>")
+        if post["caption"]:
+            out.append(f'<p class="caption">{esc(post["caption"])}</p>')
+        out.append("</section>")
+    out.append(_nav(page, pages))
+    return "\n".join(out) + "\n"
+
+
+def write_pages(gallery: Gallery, per_page: int) -> Tuple[int, int]:
+    """Write index.html, index-2.html, ...; returns (pages, pages rewritten)."""
+
+    posts = gallery.posts()
+    pages = max(1, (len(posts) + per_page - 1) // per_page)
+    changed = 0
+    for n in range(1, pages + 1):
+        doc = render_page(posts[(n - 1) * per_page:n * per_page], n, pages, len(posts))
+        changed += write_bytes_if_changed(doc.encode(), os.path.join(gallery.out_dir, page_name(n)))[1]
+    # Pages left over from a longer gallery
+    n = pages + 1
+    while os.path.exists(os.path.join(gallery.out_dir, page_name(n))):
+        os.unlink(os.path.join(gallery.out_dir, page_name(n)))
+        n += 1
+    return pages, changed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out-dir", default="assets/ig")
+    ap.add_argument("--per-page", type=int, default=30, help="Posts per index page")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    gallery = Gallery(args.out_dir)
+    made, removed = gallery.update(args.workers)
+    pages, changed = write_pages(gallery, args.per_page)
+    print(f"gallery: {len(gallery.entries)} image(s), {made} thumbnailed, {removed} removed, "
+          f"{changed}/{pages} page(s) written in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Instagram Graph API helper for Neural-Engine publishing.
+
+Shared by publish_ig_single.py / publish_ig_carousel.py.
+Auth: reads META_ACCESS_TOKEN and INSTAGRAM_IG_BUSINESS_ID when first needed
+(importing this module has no side effects and does not import `requests`).
+
+Errors are raised as GraphError; the CLIs turn them into exit code 1.
+Rate limits (see ig_ratelimit): every call takes a token from the shared
+bucket; short rate-limit blocks are waited out and retried, longer ones and a
+used-up publishing quota raise GraphError with `retry_at` set, which the
+publishers turn into a queued job instead of a failure.
+
+META_GRAPH_BASE overrides the API root (e.g. a local fake_graph.py server).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import ig_ratelimit as ratelimit
+from ig_trace import span
+
+BASE = "https://graph.facebook.com/v22.0"
+RAW_BASE = "https://cdn.jsdelivr.net/gh/Navid-Aghaebrahim/neural-engine-media@main"
+
+# Graph error codes for call-rate limits (app, user, page, custom, IG business use case)
+RATE_LIMIT_CODES = {4, 17, 32, 613, 80002}
+PUBLISH_LIMIT_SUBCODE = 2207042
+MAX_INLINE_WAIT_S = 120.0
+BATCH_MAX = 50   # requests per Graph batch call
+
+_session_obj = None
+
+
+class GraphError(RuntimeError):
+    def __init__(self, message: str, error: Optional[Dict[str, Any]] = None, status: int = 0,
+                 retry_at: Optional[float] = None):
+        super().__init__(message)
+        self.error = error or {}
+        self.status = status
+        # Set when the call is expected to succeed if repeated at this epoch time
+        self.retry_at = retry_at
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.error.get("code") in RATE_LIMIT_CODES or self.publish_limited
+
+    @property
+    def publish_limited(self) -> bool:
+        return self.error.get("error_subcode") == PUBLISH_LIMIT_SUBCODE
+
+
+def _env(name: str) -> str:
+    v = os.environ.get(name)
+    if not v:
+        raise GraphError(f"Missing env {name}")
+    return v
+
+
+def ig_id() -> str:
+    return _env("INSTAGRAM_IG_BUSINESS_ID")
+
+
+def base_url() -> str:
+    return os.environ.get("META_GRAPH_BASE", BASE).rstrip("/")
+
+
+def session():
+    """One keep-alive HTTP session per process (requests imported lazily)."""
+
+    global _session_obj
+    if _session_obj is None:
+        import requests
+
+        _session_obj = requests.Session()
+    return _session_obj
+
+
+def api(method: str, path: str, retries: int = 2, cost: int = 1, **kwargs: Any) -> Any:
+    """Call Graph; `cost` is how many calls it counts as against the rate limit."""
+
+    url = f"{base_url()}/{path}" if path else base_url()
+    params = kwargs.setdefault("params", {})
+    params["access_token"] = _env("META_ACCESS_TOKEN")
+    for attempt in range(retries + 1):
+        with span(f"graph.{method}", endpoint=path.rsplit("/", 1)[-1] or "batch") as a:
+            a["rate.wait_s"] = round(ratelimit.bucket().acquire(cost), 3)
+            r = session().request(method.upper(), url, **kwargs)
+            a["http.status_code"] = r.status_code
+            pct, regain_s = ratelimit.observe(r.headers)
+            a["rate.usage_pct"] = pct
+            data = r.json()
+        if "error" not in data:
+            return data
+        err = GraphError(f"API ERROR: {data['error']}", data["error"], r.status_code)
+        if not err.rate_limited or err.publish_limited:
+            raise err
+        # Call-rate block: the bucket is already paused for `regain_s`; wait it
+        # out in-process when it is short, otherwise hand the caller a retry time
+        wait_s = max(regain_s, 60.0)
+        if wait_s > MAX_INLINE_WAIT_S or attempt == retries:
+            err.retry_at = time.time() + wait_s
+            raise err
+        print(f"  rate limited ({pct:.0f}% usage); retrying in {wait_s:.0f}s")
+        ratelimit.bucket().pause(wait_s)
+    raise AssertionError("unreachable")
+
+
+def batch(relative_urls: Sequence[str]) -> List[Dict[str, Any]]:
+    """GET many `relative_urls` with one Graph batch call per BATCH_MAX of them.
+
+    Returns one decoded body per URL, in order. A failed item comes back as
+    {"error": {...}} instead of raising, so one deleted post does not sink the
+    rest. Graph counts every item against the call rate, and so does the bucket.
+    """
+
+    bodies: List[Dict[str, Any]] = []
+    for i in range(0, len(relative_urls), BATCH_MAX):
+        chunk = relative_urls[i:i + BATCH_MAX]
+        items = api("post", "", cost=len(chunk), data={
+            "batch": json.dumps([{"method": "GET", "relative_url": u} for u in chunk]),
+            "include_headers": "false",
+        })
+        for item in items:
+            # null items timed out on Graph's side; they can simply be asked for again
+            body = json.loads(item.get("body") or "{}") if item else {"error": {"message": "batch item timed out"}}
+            bodies.append(body)
+    return bodies
+
+
+def publish_slot() -> float:
+    """Earliest epoch time the account's publishing quota allows another post."""
+
+    data = api("get", f"{ig_id()}/content_publishing_limit", params={"fields": "quota_usage,config"})
+    entry = (data.get("data") or [{}])[0]
+    config = entry.get("config") or {}
+    return ratelimit.next_publish_time(
+        int(entry.get("quota_usage", 0)),
+        int(config.get("quota_total", 50)),
+        float(config.get("quota_duration", 86400)),
+    )
+
+
+def require_publish_slot(max_wait_s: float = 0.0) -> None:
+    """Return when a post may be published now (waiting up to `max_wait_s`).
+
+    Raises GraphError with `retry_at` when the quota frees up later than that.
+    """
+
+    at = publish_slot()
+    wait_s = at - time.time()
+    if wait_s > max_wait_s:
+        raise GraphError(
+            f"Publishing quota used up; next slot at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(at))}",
+            {"error_subcode": PUBLISH_LIMIT_SUBCODE}, retry_at=at,
+        )
+    if wait_s > 0:
+        time.sleep(wait_s)
+
+
+def publish_container(container_id: str) -> str:
+    """media_publish a FINISHED container; returns media_id and logs it against the quota."""
+
+    try:
+        pub = api("post", f"{ig_id()}/media_publish", data={"creation_id": container_id})
+    except GraphError as e:
+        if e.publish_limited and e.retry_at is None:
+            e.retry_at = publish_slot()
+        raise
+    ratelimit.record_publish(pub["id"])
+    return pub["id"]
+
+
+def wait_container(container_id: str, label: str, max_attempts: int = 24, sleep_s: int = 5) -> None:
+    with span("graph.wait_container", label=label) as a:
+        for attempt in range(max_attempts):
+            a["attempts"] = attempt + 1
+            status = api("get", container_id, params={"fields": "status_code"})
+            sc = status.get("status_code", "UNKNOWN")
+            print(f"  {label} status_code: {sc}")
+            if sc == "FINISHED":
+                return
+            if sc == "ERROR":
+                raise GraphError(f"{label} container error — aborting.")
+            time.sleep(sleep_s)
+        raise GraphError(f"{label} container never became FINISHED.")
+
+
+def to_public_url(image_url_or_path: str) -> str:
+    if image_url_or_path.startswith("http://") or image_url_or_path.startswith("https://"):
+        return image_url_or_path
+    p = image_url_or_path.lstrip("/")
+    return f"{RAW_BASE}/{p}"
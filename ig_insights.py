@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Post-publish insights for Neural-Engine posts, kept in a local SQLite store.
+
+publish_ig_single / publish_ig_carousel call record_post() for every post
+they publish. It stores the media id and permalink, plus the theme, A/B
+variant, slug and date from the build index entry (assets/ig/.build-index.json)
+of the post's first image. sync() then:
+- lists the account's media published since the last sync (paged, 100 per
+  call), so posts made outside these scripts get a row too (without manifest
+  fields)
+- fetches insights for every post that has none yet or was last fetched
+  before it was SETTLE_DAYS old; after that its numbers are final and it is
+  never asked for again
+- asks for all METRICS of a post in one request, and sends the requests as
+  Graph batch calls of up to ig_graph.BATCH_MAX posts, instead of one call
+  per post per metric
+
+State lives in $IG_CACHE_DIR/insights.db (WAL mode). report() averages the
+metrics per theme / variant / slug / kind, which shows how the THEMES and
+build_prompt variants perform.
+
+  python3 ig_insights.py sync [--days 30]
+  python3 ig_insights.py report --by theme variant
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime as dt
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from ig_graph import RAW_BASE, GraphError, api, batch, ig_id
+from ig_trace import run, span
+
+METRICS = ("reach", "views", "likes", "comments", "shares", "saved", "total_interactions")
+SETTLE_DAYS = 7
+DISCOVER_DAYS = 30           # how far back the first sync looks for media
+SYNC_OVERLAP_S = 3600        # re-list a little before the last sync (clock skew, late timestamps)
+PAGE_SIZE = 100
+GROUPS = ("theme", "variant", "slug", "kind")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    media_id     TEXT PRIMARY KEY,
+    permalink    TEXT,
+    kind         TEXT,            -- single|carousel, or Graph's media_type for posts found by sync
+    caption      TEXT,
+    images       TEXT,            -- JSON list of repo paths / URLs
+    theme        TEXT,            -- from the build index entry of the first image
+    variant      TEXT,
+    slug         TEXT,
+    date         TEXT,
+    published_at REAL NOT NULL,
+    fetched_at   REAL             -- last successful insights fetch
+);
+CREATE INDEX IF NOT EXISTS posts_due ON posts(fetched_at, published_at);
+CREATE TABLE IF NOT EXISTS metrics (
+    media_id TEXT NOT NULL,
+    metric   TEXT NOT NULL,
+    value    INTEGER NOT NULL,
+    PRIMARY KEY (media_id, metric)
+);
+CREATE TABLE IF NOT EXISTS state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def db_path() -> str:
+    return os.path.join(os.environ.get("IG_CACHE_DIR", ".cache/ig"), "insights.db")
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or db_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def _tx(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def asset_path(src: str) -> str:
+    """Repo path of a published image (RAW_BASE URLs are mapped back to it)."""
+
+    prefix = RAW_BASE + "/"
+    return src[len(prefix):] if src.startswith(prefix) else src
+
+
+def manifest(images: Sequence[str]) -> Dict[str, Any]:
+    """Build index entry of the first image that has one ({} if none do)."""
+
+    from ig_build import BuildIndex
+
+    index = BuildIndex("assets/ig")
+    for src in images:
+        entry = index.get(asset_path(src))
+        if entry:
+            return entry
+    return {}
+
+
+def record_post(media_id: str, permalink: str, kind: str, images: Sequence[str], caption: str = "",
+                conn: Optional[sqlite3.Connection] = None) -> None:
+    """Remember a post we just published. Never raises: the post is already live."""
+
+    try:
+        paths = [asset_path(s) for s in images]
+        meta = manifest(paths)
+        conn = conn or connect()
+        with _tx(conn):
+            conn.execute(
+                "INSERT INTO posts (media_id, permalink, kind, caption, images, theme, variant, slug, date, published_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(media_id) DO UPDATE SET permalink = excluded.permalink, kind = excluded.kind,"
+                " caption = excluded.caption, images = excluded.images, theme = excluded.theme,"
+                " variant = excluded.variant, slug = excluded.slug, date = excluded.date",
+                (media_id, permalink, kind, caption, json.dumps(paths), meta.get("theme"), meta.get("variant"),
+                 meta.get("slug"), meta.get("date"), time.time()),
+            )
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"Warning: could not record {media_id} for insights: {e}", file=sys.stderr)
+
+
+def _state(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def _parse_ts(ts: str) -> float:
+    return dt.datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S%z").timestamp()
+
+
+def discover(conn: sqlite3.Connection, since: float) -> int:
+    """Add the account's media published after `since`; returns how many were new."""
+
+    params: Dict[str, Any] = {"fields": "id,timestamp,permalink,media_type", "since": int(since), "limit": PAGE_SIZE}
+    new = 0
+    while True:
+        page = api("get", f"{ig_id()}/media", params=dict(params))
+        with _tx(conn):
+            for m in page.get("data", []):
+                cur = conn.execute(
+                    "INSERT INTO posts (media_id, permalink, kind, published_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(media_id) DO NOTHING",
+                    (m["id"], m.get("permalink"), (m.get("media_type") or "").lower() or None, _parse_ts(m["timestamp"])),
+                )
+                new += cur.rowcount
+        paging = page.get("paging") or {}
+        after = (paging.get("cursors") or {}).get("after")
+        if not paging.get("next") or not after:
+            return new
+        params["after"] = after
+
+
+def due(conn: sqlite3.Connection) -> List[str]:
+    """Media ids whose insights may still change: never fetched, or last fetched before they settled."""
+
+    rows = conn.execute(
+        "SELECT media_id FROM posts WHERE fetched_at IS NULL OR fetched_at < published_at + ? ORDER BY published_at",
+        (SETTLE_DAYS * 86400,),
+    ).fetchall()
+    return [r["media_id"] for r in rows]
+
+
+def _values(body: Dict[str, Any]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for m in body.get("data", []):
+        # Lifetime metrics come as values[0].value, newer ones as total_value.value
+        v = (m.get("total_value") or {}).get("value")
+        if v is None and m.get("values"):
+            v = m["values"][0].get("value")
+        if isinstance(v, (int, float)):
+            out[m["name"]] = int(v)
+    return out
+
+
+def sync(conn: Optional[sqlite3.Connection] = None, days: int = DISCOVER_DAYS,
+         metrics: Sequence[str] = METRICS) -> Dict[str, int]:
+    """List new media, then refresh insights for every post that is due. Returns counts."""
+
+    check_metrics(metrics)
+    conn = conn or connect()
+    started = time.time()
+    last = _state(conn, "last_sync")
+    since = float(last) - SYNC_OVERLAP_S if last else started - days * 86400
+    with span("insights.sync") as a:
+        a["discovered"] = discover(conn, since)
+        ids = due(conn)
+        a["due"] = len(ids)
+        bodies = batch([f"{mid}/insights?metric={','.join(metrics)}" for mid in ids]) if ids else []
+        failed = 0
+        now = time.time()
+        with _tx(conn):
+            for mid, body in zip(ids, bodies):
+                if "error" in body:
+                    failed += 1
+                    print(f"  {mid}: {body['error'].get('message', body['error'])}", file=sys.stderr)
+                    continue
+                conn.executemany(
+                    "INSERT INTO metrics (media_id, metric, value) VALUES (?, ?, ?)"
+                    " ON CONFLICT(media_id, metric) DO UPDATE SET value = excluded.value",
+                    [(mid, k, v) for k, v in _values(body).items()],
+                )
+                conn.execute("UPDATE posts SET fetched_at = ? WHERE media_id = ?", (now, mid))
+            conn.execute("INSERT INTO state (key, value) VALUES ('last_sync', ?)"
+                         " ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(started),))
+        a["failed"] = failed
+    return {"discovered": a["discovered"], "fetched": len(ids) - failed, "failed": failed}
+
+
+def check_metrics(metrics: Sequence[str]) -> None:
+    bad = [k for k in metrics if k not in METRICS]
+    if bad:
+        raise ValueError(f"Unknown metric {bad[0]!r} (choose from {', '.join(METRICS)})")
+
+
+def report(conn: sqlite3.Connection, by: Sequence[str] = ("theme",),
+           metrics: Sequence[str] = METRICS) -> List[sqlite3.Row]:
+    """Per-group post count and average of each metric, best reach first."""
+
+    check_metrics(metrics)
+    bad = [g for g in by if g not in GROUPS]
+    if bad:
+        raise ValueError(f"Unknown group {bad[0]!r} (choose from {', '.join(GROUPS)})")
+    # Only GROUPS / METRICS names reach the SQL text (as identifiers); metric values are bound
+    keys = ", ".join(f"COALESCE(p.{g}, '-') AS {g}" for g in by)
+    avgs = ", ".join(f"AVG(CASE WHEN m.metric = ? THEN m.value END) AS {k}" for k in metrics)
+    return conn.execute(
+        f"SELECT {keys}, COUNT(DISTINCT p.media_id) AS posts, {avgs}"
+        " FROM posts p JOIN metrics m ON m.media_id = p.media_id"
+        f" GROUP BY {', '.join(by)} ORDER BY {'reach' if 'reach' in metrics else 'posts'} DESC",
+        list(metrics),
+    ).fetchall()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("sync", help="Fetch insights for new and not yet settled posts")
+    s.add_argument("--days", type=int, default=DISCOVER_DAYS, help="First sync: look back this many days")
+    s.add_argument("--metrics", default=",".join(METRICS))
+    r = sub.add_parser("report", help="Average metrics per group")
+    r.add_argument("--by", nargs="+", choices=GROUPS, default=["theme"])
+    r.add_argument("--metrics", default=",".join(METRICS))
+    args = ap.parse_args(argv)
+    metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+    try:
+        check_metrics(metrics)
+    except ValueError as e:
+        ap.error(str(e))
+
+    conn = connect()
+    if args.cmd == "sync":
+        with run("ig_insights.sync"):
+            try:
+                counts = sync(conn, args.days, metrics)
+            except GraphError as e:
+                print(str(e), file=sys.stderr)
+                return 1
+        print(f"{counts['discovered']} new posts, {counts['fetched']} refreshed, {counts['failed']} failed")
+        return 1 if counts["failed"] else 0
+
+    rows = report(conn, args.by, metrics)
+    cols = [*args.by, "posts", *metrics]
+    print("  ".join(f"{c:>12s}" for c in cols))
+    for row in rows:
+        cells = [str(row[c]) if c in args.by or c == "posts" else ("-" if row[c] is None else f"{row[c]:.1f}")
+                 for c in cols]
+        print("  ".join(f"{c:>12s}" for c in cells))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Pre-generated background pool for Neural-Engine media.
+
+Backgrounds only depend on the prompt (theme + A/B variant, or the single-post
+theme) and the fal image size, not on the day's copy, so they can be made
+off-peak. The pool keeps up to N ready backgrounds per key on disk:
+
+  $IG_CACHE_DIR/pool/<kind>-<theme>-<variant>-<size>/<sha>
+
+Each entry is an empty marker; the pixels live in the background cache
+(ig_bgcache, already cropped to the requested formats as raw memory-mapped
+files), so a popped entry is just a bgcache.fitted(sha, size). pop() claims an
+entry by unlinking its marker, which only one process can win.
+
+The generators pop from the pool and fall back to a live fal call when it is
+empty; ig_daemon tops the pool up off-peak.
+
+  python3 ig_pool.py fill [--themes workflow,risk] [--target 4] [--formats square]
+  python3 ig_pool.py status
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import ig_bgcache as bgcache
+from ig_trace import run
+
+ImageSize = Union[str, Dict[str, int]]
+
+CAROUSEL_VARIANTS = ("A", "B")
+SINGLE_VARIANT = "S"
+
+
+def size_key(image_size: ImageSize) -> str:
+    if isinstance(image_size, str):
+        return image_size
+    return f"{image_size['width']}x{image_size['height']}"
+
+
+def pool_dir(kind: str, theme: str, variant: str, image_size: ImageSize) -> str:
+    return bgcache.cache_dir("pool", f"{kind}-{theme}-{variant}-{size_key(image_size)}")
+
+
+def level(kind: str, theme: str, variant: str, image_size: ImageSize) -> int:
+    d = pool_dir(kind, theme, variant, image_size)
+    return len(os.listdir(d)) if os.path.isdir(d) else 0
+
+
+def pop(kind: str, theme: str, variant: str, image_size: ImageSize) -> Optional[str]:
+    """Claim one pooled background; returns its bgcache sha, or None if the pool is empty."""
+
+    d = pool_dir(kind, theme, variant, image_size)
+    try:
+        names = sorted(os.listdir(d), key=lambda n: os.path.getmtime(os.path.join(d, n)))
+    except OSError:
+        return None
+    for name in names:
+        try:
+            os.unlink(os.path.join(d, name))
+        except FileNotFoundError:
+            continue  # another process claimed it
+        if os.path.exists(bgcache.path_for(name)):
+            return name
+    return None
+
+
+def push(kind: str, theme: str, variant: str, image_size: ImageSize, sha: str) -> None:
+    d = pool_dir(kind, theme, variant, image_size)
+    os.makedirs(d, exist_ok=True)
+    open(os.path.join(d, sha), "wb").close()
+
+
+def prompt_for(kind: str, theme: str, variant: str) -> str:
+    if kind == "single":
+        from gen_ig_single_daily_fal import build_prompt as single_prompt
+
+        return single_prompt(theme=theme)
+    from gen_ig_carousel_daily_fal import build_prompt
+
+    return build_prompt(theme=theme, variant=variant)
+
+
+def _generate(kind: str, theme: str, variant: str, image_size: ImageSize, count: int,
+              prebake: Sequence[Tuple[int, int]]) -> int:
+    from ig_fal import generate_images
+
+    # One batched (num_images) request per key; the samples are distinct
+    images = generate_images(prompt=prompt_for(kind, theme, variant), model="fal-ai/flux/dev",
+                             image_size=image_size, num_images=count)
+    for bg in images:
+        sha = bgcache.put(bg)
+        for size in prebake:
+            bgcache.fitted(sha, size)
+        push(kind, theme, variant, image_size, sha)
+    return len(images)
+
+
+def keys(themes: List[str], kinds: Tuple[str, ...] = ("carousel", "single")) -> List[Tuple[str, str, str]]:
+    out = []
+    for theme in themes:
+        if "carousel" in kinds:
+            out += [("carousel", theme, v) for v in CAROUSEL_VARIANTS]
+        if "single" in kinds:
+            out.append(("single", theme, SINGLE_VARIANT))
+    return out
+
+
+def top_up(themes: List[str], image_size: ImageSize, target: int, workers: int = 4,
+           kinds: Tuple[str, ...] = ("carousel", "single"), prebake: Sequence[Tuple[int, int]] = ()) -> int:
+    """Generate backgrounds until every key has `target` entries; returns how many were made.
+
+    `prebake` export sizes are cropped and written as raw files up front, so
+    the render that pops the entry only memory-maps them.
+    """
+
+    todo = [(k, target - level(*k, image_size)) for k in keys(themes, kinds)]
+    todo = [(k, n) for k, n in todo if n > 0]
+    if not todo:
+        return 0
+    made = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        # each thread joins the fill's trace (a Context can only be entered by one thread at a time)
+        futures = [(k, ex.submit(contextvars.copy_context().run, _generate, *k, image_size, n, prebake))
+                   for k, n in todo]
+        for (kind, theme, variant), fut in futures:
+            try:
+                made += fut.result()
+            except Exception as e:
+                print(f"pool: {kind}/{theme}/{variant} failed: {e}", file=sys.stderr)
+    return made
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from gen_ig_carousel_daily_fal import THEMES
+    from ig_export import FORMATS, fal_image_size, parse_formats
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("cmd", choices=["fill", "status"])
+    ap.add_argument("--themes", default=",".join(THEMES))
+    ap.add_argument("--formats", default="square", help="Formats the pooled backgrounds must cover")
+    ap.add_argument("--target", type=int, default=int(os.environ.get("IG_POOL_TARGET", "4")),
+                    help="Backgrounds to keep per (kind, theme, variant)")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args(argv)
+
+    themes = [t.strip() for t in args.themes.split(",") if t.strip()]
+    formats = parse_formats(args.formats)
+    image_size = fal_image_size(formats)
+    if args.cmd == "fill":
+        with run("ig_pool.fill", themes=",".join(themes), target=args.target) as attrs:
+            made = top_up(themes, image_size, args.target, args.workers, prebake=[FORMATS[f][:2] for f in formats])
+            attrs["made"] = made
+        print(f"pool: generated {made} background(s)")
+    for kind, theme, variant in keys(themes):
+        print(f"  {kind:8s} {theme:10s} {variant} {size_key(image_size):12s} {level(kind, theme, variant, image_size)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
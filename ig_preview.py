@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Fast, offline preview of Neural-Engine posts as one contact sheet.
+
+Preview mode renders at reduced scale (default 0.25) with the background a
+slide was last built with (from the cache) or a procedural placeholder, and
+never calls fal, touches the pool or writes the build index. Every rendered
+slide becomes a tile; the outermost session() writes one contact sheet PNG
+(fast zlib level, no optimize) to assets/ig/preview/.
+
+- fal generators: `--preview [--preview-scale 0.25]`
+- module-level scripts (gen_ig_workflow_am.py, gen_ig_faq_pm.py,
+  gen_ig_social_proof_pm.py): IG_PREVIEW=1; their save() calls become tiles
+- a whole week (AM carousel + PM single per day), plus the module-level
+  scripts with --legacy, in one process:
+
+  python3 ig_preview.py --start 2026-03-02 --days 7 [--legacy] [--formats square,story]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime as dt
+import os
+import runpy
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+PREVIEW_DIR = "assets/ig/preview"
+DEFAULT_SCALE = 0.25
+
+_tiles: List[Tuple[str, Image.Image]] = []
+_depth = 0
+
+
+def enabled() -> bool:
+    return _depth > 0 or os.environ.get("IG_PREVIEW", "") not in ("", "0")
+
+
+def scale() -> float:
+    return float(os.environ.get("IG_PREVIEW_SCALE", DEFAULT_SCALE))
+
+
+def scaled(size: Tuple[int, int], k: Optional[float] = None) -> Tuple[int, int]:
+    k = scale() if k is None else k
+    return max(1, int(round(size[0] * k))), max(1, int(round(size[1] * k)))
+
+
+def background(sha: Optional[str], full: Tuple[int, int], size: Tuple[int, int],
+               theme: str, variant: str = "A", seed: int = 0) -> Image.Image:
+    """Cached background `sha` (if any) or a procedural placeholder, at preview `size`."""
+
+    import ig_bgcache as bgcache
+
+    if sha and bgcache.has(sha):
+        fitted = bgcache.fitted(sha, full)
+        if fitted is not None:
+            return fitted.resize(size, Image.Resampling.BILINEAR)
+    import ig_procedural
+
+    return ig_procedural.render(size, theme, variant, seed)
+
+
+def add(label: str, img: Image.Image) -> None:
+    """Add a (preview-sized) rendered slide to the current contact sheet."""
+
+    _tiles.append((label, img.convert("RGB")))
+
+
+def save(img: Image.Image, out: str, *args, **kw) -> None:
+    """img.save() for module-level scripts: a contact-sheet tile in preview mode."""
+
+    if not enabled():
+        img.save(out, *args, **kw)
+        return
+    # These scripts lay out on a fixed full-size canvas; shrink the result
+    add(os.path.basename(out), img.resize(scaled(img.size), Image.Resampling.BILINEAR))
+    if _depth == 0:
+        # Standalone IG_PREVIEW=1 run of a script: one small file per image
+        path = os.path.join(PREVIEW_DIR, os.path.basename(out))
+        os.makedirs(PREVIEW_DIR, exist_ok=True)
+        _tiles.pop()[1].save(path, "PNG", compress_level=1)
+        print(f"Preview: {path}")
+
+
+def contact_sheet(tiles: List[Tuple[str, Image.Image]], cols: int = 5, title: str = "") -> Image.Image:
+    font = ImageFont.load_default()
+    cell_w = max(t.width for _, t in tiles)
+    cell_h = max(t.height for _, t in tiles)
+    pad, label_h, head = 12, 16, 28 if title else 0
+    rows = (len(tiles) + cols - 1) // cols
+    sheet = Image.new("RGB", (pad + cols * (cell_w + pad), head + pad + rows * (cell_h + label_h + pad)), (30, 32, 40))
+    draw = ImageDraw.Draw(sheet)
+    if title:
+        draw.text((pad, 8), title, font=font, fill=(235, 235, 245))
+    for i, (label, tile) in enumerate(tiles):
+        x = pad + (i % cols) * (cell_w + pad)
+        y = head + pad + (i // cols) * (cell_h + label_h + pad)
+        sheet.paste(tile, (x + (cell_w - tile.width) // 2, y + (cell_h - tile.height) // 2))
+        draw.text((x, y + cell_h + 3), label, font=font, fill=(190, 195, 210))
+    return sheet
+
+
+@contextlib.contextmanager
+def session(sheet_path: str, title: str = "", cols: int = 5) -> Iterator[None]:
+    """Collect tiles; the outermost session writes them as one contact sheet."""
+
+    global _depth
+    _depth += 1
+    start = len(_tiles)
+    try:
+        yield
+    finally:
+        _depth -= 1
+        if _depth == 0:
+            tiles = _tiles[start:]
+            del _tiles[start:]
+            if tiles:
+                os.makedirs(os.path.dirname(sheet_path) or ".", exist_ok=True)
+                contact_sheet(tiles, cols, title).save(sheet_path, "PNG", compress_level=1)
+                print(f"Contact sheet: {sheet_path} ({len(tiles)} tiles)")
+
+
+LEGACY_SCRIPTS = ["gen_ig_workflow_am.py", "gen_ig_faq_pm.py", "gen_ig_social_proof_pm.py"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import gen_ig_carousel_daily_fal as carousel
+    import gen_ig_single_daily_fal as single
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--start", default=dt.date.today().isoformat())
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--themes", default="workflow,risk,privacy,myths,features", help="Rotated per day")
+    ap.add_argument("--formats", default="square")
+    ap.add_argument("--scale", type=float, default=DEFAULT_SCALE)
+    ap.add_argument("--legacy", action="store_true", help="Also preview the module-level Pillow scripts")
+    ap.add_argument("--out", help=f"Contact sheet path (default {PREVIEW_DIR}/week-<start>.png)")
+    args = ap.parse_args(argv)
+
+    os.environ["IG_PREVIEW_SCALE"] = str(args.scale)
+    themes = [t.strip() for t in args.themes.split(",") if t.strip()]
+    start = dt.date.fromisoformat(args.start)
+    out = args.out or os.path.join(PREVIEW_DIR, f"week-{start.isoformat()}.png")
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    t0 = time.perf_counter()
+    with session(out, title=f"Neural-Engine preview {start} +{args.days}d", cols=5 * len(args.formats.split(","))):
+        for i in range(args.days):
+            day = start + dt.timedelta(days=i)
+            theme = themes[day.toordinal() % len(themes)]
+            common = ["--date", day.isoformat(), "--slug", theme, "--theme", theme,
+                      "--formats", args.formats, "--preview", "--preview-scale", str(args.scale)]
+            carousel.main(common)
+            single.main(common)
+        if args.legacy:
+            for script in LEGACY_SCRIPTS:
+                runpy.run_path(os.path.join(here, script), run_name="__main__")
+    print(f"Preview rendered in {time.perf_counter() - t0:.2f}s (no network)")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run through the importable module so the generators share its session state
+    import ig_preview
+
+    sys.exit(ig_preview.main())
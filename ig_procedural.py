@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Procedural fallback backgrounds for Neural-Engine media.
+
+Used when fal.ai misses the run's deadline: the gradient / grid / glow /
+chart-motif look of gen_ig_workflow_am.py, but in the light palette the
+fal generators' dark text is designed for. Rendering takes milliseconds
+and needs no network.
+
+Deterministic per (theme, variant, seed) so a re-run reproduces the image.
+"""
+
+from __future__ import annotations
+
+import random
+import zlib
+from typing import Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+import ig_chart
+
+BG_TOP  = (248, 250, 252)   # slate-50
+BG_BOT  = (224, 231, 255)   # indigo-100
+GRID    = (15, 23, 42, 14)
+ACCENT1 = (16, 185, 129)    # teal
+ACCENT2 = (99, 102, 241)    # indigo
+
+
+def draw_gradient(img: Image.Image, top: Tuple[int, int, int], bot: Tuple[int, int, int]) -> None:
+    w, h = img.size
+    mask = Image.linear_gradient("L").resize((w, h))
+    img.paste(Image.composite(Image.new("RGB", (w, h), bot), Image.new("RGB", (w, h), top), mask))
+
+
+def draw_grid(draw: ImageDraw.ImageDraw, size: Tuple[int, int], step: int) -> None:
+    w, h = size
+    for x in range(0, w, step):
+        draw.line([(x, 0), (x, h)], fill=GRID, width=1)
+    for y in range(0, h, step):
+        draw.line([(0, y), (w, y)], fill=GRID, width=1)
+
+
+def glow(img: Image.Image, cx: int, cy: int, r: int, color: Tuple[int, int, int], alpha: int) -> None:
+    layer = Image.new("L", img.size, 0)
+    ImageDraw.Draw(layer).ellipse([cx - r, cy - r, cx + r, cy + r], fill=alpha)
+    layer = layer.filter(ImageFilter.GaussianBlur(r / 2))
+    img.paste(Image.new("RGB", img.size, color), (0, 0), layer)
+
+
+def render(size: Tuple[int, int], theme: str = "", variant: str = "A", seed: int = 0) -> Image.Image:
+    """Light procedural background of `size` as RGBA."""
+
+    w, h = size
+    k = min(w, h) / 1024.0
+    rng = random.Random(zlib.crc32(f"{theme}:{variant}:{seed}".encode()))
+
+    img = Image.new("RGB", size)
+    draw_gradient(img, BG_TOP, BG_BOT)
+    draw = ImageDraw.Draw(img, "RGBA")
+    draw_grid(draw, size, max(16, int(64 * k)))
+
+    a, b = (ACCENT1, ACCENT2) if variant == "A" else (ACCENT2, ACCENT1)
+    glow(img, int(w * rng.uniform(0.1, 0.3)), int(h * rng.uniform(0.7, 0.9)), int(170 * k), a, 70)
+    glow(img, int(w * rng.uniform(0.7, 0.9)), int(h * rng.uniform(0.1, 0.3)), int(140 * k), b, 60)
+
+    # Faint chart across the lower part, clear of the centred text block
+    img = img.convert("RGBA")
+    ig_chart.motif(img, (int(w * 0.3), int(h * 0.66), w, int(h * 0.94)), seed=rng.randrange(1 << 30),
+                   alpha=60, up=ACCENT1, down=ACCENT2)
+    return img
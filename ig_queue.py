@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""Durable SQLite job queue + worker pool for Neural-Engine media jobs.
+
+Job types (payloads are JSON):
+  generate_background  {theme, variant, image_size[, num_images]}
+                                                              -> {"bgs": [sha, ...]}
+  render_slide         {kind: carousel|single, date, slug, theme, idx, total,
+                        headline, sub, formats, sample}  (after a generate_background;
+                        renders onto its bgs[sample])
+                                                              -> {"outputs": [...]}
+  publish_single       {image, caption}                       -> {"media_id", "permalink"}
+  publish_carousel     {caption, images}                      -> {"media_id", "permalink"}
+
+Jobs can depend on other jobs (edges in `deps`); a job only runs once all of
+its dependencies are done, and fails if one of them failed. Workers are
+threads with per-type concurrency limits, so fal inference can fan out while
+publishing stays serial. State lives in $IG_CACHE_DIR/queue.db (WAL mode);
+jobs left "running" by a killed process are re-queued on the next start.
+Jobs blocked by Graph rate limits or the publishing quota (errors carrying
+`retry_at`) are deferred to that time without using up an attempt; `work`
+sleeps until the first deferred job is due and exits once nothing is left.
+
+  python3 ig_queue.py backfill --start 2026-03-01 --end 2026-03-07
+  python3 ig_queue.py work --workers 6 --limit generate_background=4
+  python3 ig_queue.py status
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime as dt
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import ig_bgcache as bgcache
+import ig_trace as trace
+
+DEFAULT_LIMITS: Dict[str, int] = {
+    "generate_background": 4,
+    "render_slide": 2,
+    "publish_single": 1,
+    "publish_carousel": 1,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    type         TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    state        TEXT NOT NULL DEFAULT 'pending',   -- pending|running|done|failed
+    result       TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    not_before   REAL NOT NULL DEFAULT 0,
+    created      REAL NOT NULL,
+    updated      REAL NOT NULL,
+    worker       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, not_before, id);
+CREATE TABLE IF NOT EXISTS deps (
+    job_id INTEGER NOT NULL,
+    dep_id INTEGER NOT NULL,
+    PRIMARY KEY (job_id, dep_id)
+);
+"""
+
+
+def db_path() -> str:
+    return bgcache.cache_dir("queue.db")
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or db_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def _tx(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def enqueue(
+    conn: sqlite3.Connection,
+    job_type: str,
+    payload: Dict[str, Any],
+    after: Iterable[int] = (),
+    max_attempts: int = 3,
+    not_before: float = 0.0,
+) -> int:
+    if job_type not in DEFAULT_LIMITS:
+        raise ValueError(f"unknown job type {job_type!r}")
+    now = time.time()
+    with _tx(conn):
+        cur = conn.execute(
+            "INSERT INTO jobs(type, payload, max_attempts, not_before, created, updated) VALUES (?,?,?,?,?,?)",
+            (job_type, json.dumps(payload), max_attempts, not_before, now, now),
+        )
+        jid = int(cur.lastrowid)
+        conn.executemany("INSERT OR IGNORE INTO deps(job_id, dep_id) VALUES (?,?)", [(jid, d) for d in after])
+    return jid
+
+
+def recover(conn: sqlite3.Connection) -> int:
+    """Re-queue jobs a dead process left in 'running'."""
+
+    with _tx(conn):
+        cur = conn.execute("UPDATE jobs SET state='pending', worker=NULL, updated=? WHERE state='running'", (time.time(),))
+    return cur.rowcount
+
+
+def claim(conn: sqlite3.Connection, limits: Dict[str, int], worker: str) -> Optional[sqlite3.Row]:
+    """Atomically pick the next runnable job respecting per-type limits."""
+
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            """UPDATE jobs SET state='failed', error='dependency failed', updated=?
+               WHERE state='pending' AND EXISTS (
+                 SELECT 1 FROM deps d JOIN jobs p ON p.id=d.dep_id
+                 WHERE d.job_id=jobs.id AND p.state='failed')""",
+            (now,),
+        )
+        running = dict(conn.execute("SELECT type, COUNT(*) FROM jobs WHERE state='running' GROUP BY type").fetchall())
+        rows = conn.execute(
+            """SELECT * FROM jobs j WHERE state='pending' AND not_before <= ?
+               AND NOT EXISTS (SELECT 1 FROM deps d JOIN jobs p ON p.id=d.dep_id
+                               WHERE d.job_id=j.id AND p.state!='done')
+               ORDER BY not_before, id LIMIT 200""",
+            (now,),
+        ).fetchall()
+        for row in rows:
+            if running.get(row["type"], 0) < limits.get(row["type"], 1):
+                conn.execute(
+                    "UPDATE jobs SET state='running', attempts=attempts+1, worker=?, updated=? WHERE id=?",
+                    (worker, now, row["id"]),
+                )
+                # Hand back the claimed row, with this attempt counted
+                row = conn.execute("SELECT * FROM jobs WHERE id=?", (row["id"],)).fetchone()
+                conn.execute("COMMIT")
+                return row
+        conn.execute("COMMIT")
+        return None
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def finish(conn: sqlite3.Connection, row: sqlite3.Row, result: Optional[Dict[str, Any]] = None,
+           error: Optional[str] = None, retry_in: Optional[float] = None) -> None:
+    now = time.time()
+    with _tx(conn):
+        if error is None:
+            conn.execute("UPDATE jobs SET state='done', result=?, error=NULL, updated=? WHERE id=?",
+                         (json.dumps(result or {}), now, row["id"]))
+        elif retry_in is not None and row["attempts"] < row["max_attempts"]:
+            conn.execute("UPDATE jobs SET state='pending', error=?, not_before=?, worker=NULL, updated=? WHERE id=?",
+                         (error, now + retry_in, now, row["id"]))
+        else:
+            conn.execute("UPDATE jobs SET state='failed', error=?, updated=? WHERE id=?", (error, now, row["id"]))
+
+
+def defer(conn: sqlite3.Connection, row: sqlite3.Row, until: float, reason: str) -> None:
+    """Put a job back to wait until `until` without spending one of its attempts."""
+
+    with _tx(conn):
+        conn.execute(
+            "UPDATE jobs SET state='pending', attempts=attempts-1, error=?, not_before=?, worker=NULL, updated=? WHERE id=?",
+            (reason, until, time.time(), row["id"]),
+        )
+
+
+def dep_results(conn: sqlite3.Connection, job_id: int) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT p.type, p.result FROM deps d JOIN jobs p ON p.id=d.dep_id WHERE d.job_id=? ORDER BY p.id", (job_id,)
+    ).fetchall()
+    return [dict(json.loads(r["result"] or "{}"), type=r["type"]) for r in rows]
+
+
+# ── handlers ─────────────────────────────────────────────────────────────────
+_index_lock = threading.Lock()
+
+
+def h_generate_background(conn: sqlite3.Connection, job_id: int, p: Dict[str, Any]) -> Dict[str, Any]:
+    from ig_fal import generate_images
+
+    if p.get("kind") == "single":
+        from gen_ig_single_daily_fal import build_prompt as single_prompt
+
+        prompt = single_prompt(theme=p["theme"])
+    else:
+        from gen_ig_carousel_daily_fal import build_prompt
+
+        prompt = build_prompt(theme=p["theme"], variant=p.get("variant", "A"))
+    # One sample per slide of this variant, MAX_NUM_IMAGES per fal call
+    images = generate_images(prompt=prompt, num_images=p.get("num_images", 1), model="fal-ai/flux/dev",
+                             image_size=p.get("image_size", "square_hd"), seed=p.get("seed"))
+    return {"bgs": [bgcache.put(img) for img in images], "variant": p.get("variant")}
+
+
+def h_render_slide(conn: sqlite3.Connection, job_id: int, p: Dict[str, Any]) -> Dict[str, Any]:
+    from ig_build import BuildIndex, write_png
+    from ig_export import FORMATS, out_path
+
+    bg_info = next((r for r in dep_results(conn, job_id) if r["type"] == "generate_background"), {})
+    # "bg": results of jobs enqueued before backgrounds were batched per variant
+    bgs = bg_info.get("bgs") or [bg_info.get("bg")]
+    bg_sha = bgs[p.get("sample", 0)] or p.get("bg")
+    if not bgcache.has(bg_sha):
+        raise RuntimeError("background not in cache")
+
+    formats = p.get("formats", ["square"])
+    if p.get("kind") == "single":
+        import gen_ig_single_daily_fal as gen
+
+        base = f"assets/ig/{p['date']}-PM-{p['slug']}.png"
+        compose = lambda img: gen.compose_single(img, p["theme"], p["headline"], p["sub"])  # noqa: E731
+        fp_for = lambda size: gen.single_fingerprint(p["theme"], p["headline"], p["sub"], bg_sha, size)  # noqa: E731
+    else:
+        import gen_ig_carousel_daily_fal as gen
+
+        base = f"assets/ig/{p['date']}-AM-{p['slug']}-S{p['idx']:02d}.png"
+        slide = gen.Slide(p["idx"], p["headline"], p["sub"])
+        compose = lambda img: gen.compose_slide(img, slide, p["idx"], p["total"], p["theme"])  # noqa: E731
+        fp_for = lambda size: gen.slide_fingerprint(slide, p["idx"], p["total"], p["theme"], bg_sha, size)  # noqa: E731
+
+    outputs = []
+    for fmt in formats:
+        out = out_path(base, fmt)
+        size = FORMATS[fmt][:2]
+        sha, _changed = write_png(compose(bgcache.fitted(bg_sha, size)), out)
+        with _index_lock:
+            index = BuildIndex("assets/ig")
+            index.record(out, fp_for(size), sha, bg=bg_sha, variant=bg_info.get("variant"),
+                         theme=p["theme"], slug=p["slug"], date=p["date"], slide=p.get("idx"))
+            index.save()
+        outputs.append(out)
+        print(f"Saved: {out}")
+    return {"outputs": outputs}
+
+
+def h_publish_single(conn: sqlite3.Connection, job_id: int, p: Dict[str, Any]) -> Dict[str, Any]:
+    from publish_ig_single import publish
+
+    return publish(p["image"], p["caption"])
+
+
+def h_publish_carousel(conn: sqlite3.Connection, job_id: int, p: Dict[str, Any]) -> Dict[str, Any]:
+    from ig_graph import to_public_url
+    from publish_ig_carousel import publish
+
+    images = p.get("images") or [o for r in dep_results(conn, job_id) for o in r.get("outputs", [])[:1]]
+    return publish(p["caption"], [to_public_url(u) for u in images])
+
+
+HANDLERS: Dict[str, Callable[[sqlite3.Connection, int, Dict[str, Any]], Dict[str, Any]]] = {
+    "generate_background": h_generate_background,
+    "render_slide": h_render_slide,
+    "publish_single": h_publish_single,
+    "publish_carousel": h_publish_carousel,
+}
+
+
+# ── worker pool ──────────────────────────────────────────────────────────────
+def next_due(conn: sqlite3.Connection) -> Optional[float]:
+    """When there may be work again: now while jobs run, else the earliest not_before of a
+    pending job whose dependencies are done. None once nothing is left to run."""
+
+    now = time.time()
+    if conn.execute("SELECT 1 FROM jobs WHERE state='running' LIMIT 1").fetchone():
+        return now
+    row = conn.execute(
+        """SELECT MIN(not_before) FROM jobs j WHERE state='pending'
+           AND NOT EXISTS (SELECT 1 FROM deps d JOIN jobs p ON p.id=d.dep_id
+                           WHERE d.job_id=j.id AND p.state!='done')"""
+    ).fetchone()
+    return None if row[0] is None else max(now, row[0])
+
+
+def _worker(name: str, limits: Dict[str, int], stop: threading.Event, drain: bool, path: Optional[str]) -> None:
+    conn = connect(path)
+    while not stop.is_set():
+        row = claim(conn, limits, name)
+        if row is None:
+            due = next_due(conn) if drain else None
+            if drain and due is None:
+                return
+            # Only deferred jobs left (rate limit, quota, retry backoff): sleep until the first is due
+            stop.wait(max(0.5, due - time.time()) if due is not None else 0.5)
+            continue
+        payload = json.loads(row["payload"])
+        t0 = time.perf_counter()
+        try:
+            with trace.run(f"ig_queue.{row['type']}", job=row["id"]):
+                result = HANDLERS[row["type"]](conn, row["id"], payload)
+            finish(conn, row, result=result)
+            print(f"[{name}] #{row['id']} {row['type']} done in {time.perf_counter() - t0:.1f}s", flush=True)
+        except Exception as e:
+            retry_at = getattr(e, "retry_at", None)
+            if retry_at is not None:
+                # Rate limit / publishing quota: not a failure, just not yet
+                defer(conn, row, retry_at, f"deferred: {e}")
+                when = dt.datetime.fromtimestamp(retry_at).isoformat(timespec="seconds")
+                print(f"[{name}] #{row['id']} {row['type']} deferred to {when}: {e}", flush=True)
+                continue
+            traceback.print_exc()
+            # publish jobs are not blindly retried: a partial publish must be checked by hand
+            retry = None if row["type"].startswith("publish_") else 10.0 * row["attempts"]
+            finish(conn, row, error=f"{type(e).__name__}: {e}", retry_in=retry)
+            print(f"[{name}] #{row['id']} {row['type']} failed: {e}", flush=True)
+
+
+def work(workers: int, limits: Dict[str, int], drain: bool = True, path: Optional[str] = None) -> None:
+    recover(connect(path))
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_worker, args=(f"w{i}", limits, stop, drain, path), daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+# ── backfill ─────────────────────────────────────────────────────────────────
+def enqueue_day(conn: sqlite3.Connection, date: str, theme: str, formats: List[str], rng: Any) -> List[int]:
+    """One AM carousel (one bg job per variant + render per slide) and one PM single for `date`."""
+
+    from gen_ig_carousel_daily_fal import THEMES, DEFAULT_SLIDES
+    from ig_export import fal_image_size
+
+    size = fal_image_size(formats)
+    slides = THEMES.get(theme) or DEFAULT_SLIDES
+    variants = ["A" if rng.random() < 0.7 else "B" for _ in slides]
+    bgs = {
+        v: enqueue(conn, "generate_background",
+                   {"theme": theme, "variant": v, "image_size": size, "num_images": variants.count(v)})
+        for v in sorted(set(variants))
+    }
+    ids = []
+    for i, (s, variant) in enumerate(zip(slides, variants)):
+        ids.append(enqueue(conn, "render_slide", {
+            "kind": "carousel", "date": date, "slug": theme, "theme": theme, "idx": s.number,
+            "total": len(slides), "headline": s.headline, "sub": s.sub, "formats": formats,
+            "sample": variants[:i].count(variant),
+        }, after=[bgs[variant]]))
+    bg = enqueue(conn, "generate_background", {"kind": "single", "theme": theme, "image_size": size})
+    ids.append(enqueue(conn, "render_slide", {
+        "kind": "single", "date": date, "slug": theme, "theme": theme,
+        "headline": "Signals. Not Noise.", "sub": "AI overlay inside TradingView. You stay in control.",
+        "formats": formats,
+    }, after=[bg]))
+    return ids
+
+
+def _parse_limits(items: List[str]) -> Dict[str, int]:
+    limits = dict(DEFAULT_LIMITS)
+    for item in items:
+        k, v = item.split("=", 1)
+        for t in limits:
+            if t == k or (k.endswith("*") and t.startswith(k[:-1])):
+                limits[t] = int(v)
+    return limits
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import random
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=None, help="Queue DB (default $IG_CACHE_DIR/queue.db)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    bp = sub.add_parser("backfill", help="Enqueue AM carousel + PM single for a date range")
+    bp.add_argument("--start", required=True)
+    bp.add_argument("--end", required=True)
+    bp.add_argument("--themes", default="workflow,risk,privacy,myths,features", help="Rotated per day")
+    bp.add_argument("--formats", default="square")
+    bp.add_argument("--seed", type=int, default=None)
+
+    ep = sub.add_parser("add", help="Enqueue one job")
+    ep.add_argument("type", choices=sorted(DEFAULT_LIMITS))
+    ep.add_argument("payload", help="JSON payload")
+    ep.add_argument("--after", default="", help="Comma list of job ids this depends on")
+
+    wp = sub.add_parser("work", help="Run a worker pool")
+    wp.add_argument("--workers", type=int, default=6)
+    wp.add_argument("--limit", action="append", default=[], help="type=N (publish_*=1 works)")
+    wp.add_argument("--forever", action="store_true", help="Keep polling instead of exiting when drained")
+
+    sub.add_parser("status")
+
+    args = ap.parse_args(argv)
+    conn = connect(args.db)
+
+    if args.cmd == "backfill":
+        from ig_export import parse_formats
+
+        themes = [t.strip() for t in args.themes.split(",") if t.strip()]
+        formats = parse_formats(args.formats)
+        rng = random.Random(args.seed)
+        day = dt.date.fromisoformat(args.start)
+        end = dt.date.fromisoformat(args.end)
+        n = 0
+        while day <= end:
+            theme = themes[day.toordinal() % len(themes)]
+            n += len(enqueue_day(conn, day.isoformat(), theme, formats, rng))
+            day += dt.timedelta(days=1)
+        print(f"Enqueued {n} render jobs (+ backgrounds) for {args.start}..{args.end}")
+    elif args.cmd == "add":
+        after = [int(x) for x in args.after.split(",") if x.strip()]
+        print(enqueue(conn, args.type, json.loads(args.payload), after=after))
+    elif args.cmd == "work":
+        work(args.workers, _parse_limits(args.limit), drain=not args.forever, path=args.db)
+    else:
+        for row in conn.execute("SELECT type, state, COUNT(*) n FROM jobs GROUP BY type, state ORDER BY type, state"):
+            print(f"  {row['type']:20s} {row['state']:8s} {row['n']}")
+        for row in conn.execute("SELECT id, type, error FROM jobs WHERE state='failed' ORDER BY id DESC LIMIT 10"):
+            print(f"  failed #{row['id']} {row['type']}: {row['error']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Instagram Graph call-rate and publishing-quota bookkeeping for Neural-Engine.
+
+Two separate limits apply to the publishers:
+
+- API call rate. Graph reports usage as percentages in the X-App-Usage and
+  X-Business-Use-Case-Usage response headers. ig_graph.api() takes a token
+  from bucket() before every request and feeds the headers back through
+  observe(), which pauses the bucket as usage nears 100% (or for as long as
+  Graph says access is blocked).
+- Publishing quota: N posts per rolling window, reported by
+  GET /{ig-user-id}/content_publishing_limit. Our own publishes are logged in
+  $IG_CACHE_DIR/publish-ledger.json so that, when the quota is used up, the
+  earliest legal time for the next post can be computed instead of failing.
+
+Tuning: IG_GRAPH_CALLS_PER_HOUR (default 200), IG_GRAPH_BURST (default 20).
+Importing this module is cheap (stdlib only), like ig_graph.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+SLOW_DOWN_PCT = 90.0
+LEDGER_KEEP_S = 7 * 86400
+
+_bucket: Optional["TokenBucket"] = None
+_bucket_lock = threading.Lock()
+_ledger_lock = threading.Lock()
+
+last_usage: Dict[str, float] = {"pct": 0.0, "regain_s": 0.0}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_s: float, capacity: float) -> None:
+        self.rate = rate_per_s
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1.0) -> float:
+        """Take `n` tokens now (possibly on credit); return how long to wait before using them."""
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def acquire(self, n: float = 1.0) -> float:
+        wait = self.reserve(n)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def bucket() -> TokenBucket:
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            per_hour = float(os.environ.get("IG_GRAPH_CALLS_PER_HOUR", "200"))
+            burst = float(os.environ.get("IG_GRAPH_BURST", "20"))
+            _bucket = TokenBucket(per_hour / 3600.0, burst)
+        return _bucket
+
+
+def usage_from_headers(headers: Mapping[str, str]) -> Tuple[float, float]:
+    """Return (highest usage %, seconds until access is regained) from Graph usage headers."""
+
+    pct = 0.0
+    regain_s = 0.0
+    app = headers.get("X-App-Usage")
+    if app:
+        try:
+            pct = max([pct] + [float(v) for v in json.loads(app).values() if isinstance(v, (int, float))])
+        except ValueError:
+            pass
+    buc = headers.get("X-Business-Use-Case-Usage")
+    if buc:
+        try:
+            for entries in json.loads(buc).values():
+                for e in entries:
+                    pct = max(pct, *(float(e.get(k, 0) or 0) for k in ("call_count", "total_cputime", "total_time")))
+                    regain_s = max(regain_s, 60.0 * float(e.get("estimated_time_to_regain_access", 0) or 0))
+        except (ValueError, AttributeError, TypeError):
+            pass
+    return pct, regain_s
+
+
+def observe(headers: Mapping[str, str]) -> Tuple[float, float]:
+    """Record usage headers from a Graph response and slow the bucket down if needed."""
+
+    pct, regain_s = usage_from_headers(headers)
+    last_usage.update(pct=pct, regain_s=regain_s)
+    if regain_s > 0:
+        bucket().pause(regain_s)
+    elif pct >= SLOW_DOWN_PCT:
+        # Linear back-off: 0s at 90% up to 60s at 100%
+        bucket().pause(6.0 * (pct - SLOW_DOWN_PCT))
+    return pct, regain_s
+
+
+# ── publishing quota ─────────────────────────────────────────────────────────
+def ledger_path() -> str:
+    return os.path.join(os.environ.get("IG_CACHE_DIR", ".cache/ig"), "publish-ledger.json")
+
+
+def load_ledger() -> List[Dict[str, Any]]:
+    try:
+        with open(ledger_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def record_publish(media_id: str, ts: Optional[float] = None) -> None:
+    ts = time.time() if ts is None else ts
+    path = ledger_path()
+    with _ledger_lock:
+        entries = [e for e in load_ledger() if e.get("t", 0) > ts - LEDGER_KEEP_S]
+        entries.append({"t": ts, "media_id": media_id})
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp, path)
+
+
+def next_publish_time(usage: int, total: int, duration_s: float, now: Optional[float] = None,
+                      ledger: Optional[List[Dict[str, Any]]] = None) -> float:
+    """Earliest epoch time a new post fits in the rolling quota window (`now` if it fits already)."""
+
+    now = time.time() if now is None else now
+    if usage < total:
+        return now
+    ledger = load_ledger() if ledger is None else ledger
+    window = sorted(e["t"] for e in ledger if e.get("t", 0) > now - duration_s)
+    # usage - total + 1 posts have to age out of the window before one more fits
+    k = usage - total
+    if k < len(window):
+        return window[k] + duration_s
+    # Posts we have no record of (published elsewhere): re-check in an hour at most
+    return now + min(duration_s, 3600.0)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Memory-mapped raw RGBA image files for Neural-Engine backgrounds.
+
+Layout (little-endian):
+  0   8s  magic b"IGRAW1\\0\\0"
+  8   u32 width
+  12  u32 height
+  16  ... zero padding up to HEADER bytes
+  64  width * height * 4 bytes of RGBA pixels, row-major
+
+load() maps the file read-only and wraps it with Image.frombuffer, so there is
+no PNG decode, no convert() and no resize(), and no copy: pages are read on
+demand and shared between processes through the OS page cache. The returned
+image is read-only; Pillow copies it the first time it is drawn on
+(ImageDraw.Draw, paste, alpha_composite), which is exactly one copy per slide.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+
+from PIL import Image
+
+MAGIC = b"IGRAW1\0\0"
+HEADER = 64
+_HEAD = struct.Struct("<8sII")
+
+
+def save(img: Image.Image, path: str) -> None:
+    """Write `img` (converted to RGBA) to `path` atomically."""
+
+    img = img if img.mode == "RGBA" else img.convert("RGBA")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEAD.pack(MAGIC, img.width, img.height).ljust(HEADER, b"\0"))
+        f.write(img.tobytes())
+    os.replace(tmp, path)
+
+
+def load(path: str) -> Image.Image:
+    """Map `path` and return a read-only RGBA image backed by the mapping."""
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, w, h = _HEAD.unpack_from(mm)
+    if magic != MAGIC or len(mm) != HEADER + w * h * 4:
+        mm.close()
+        raise ValueError(f"{path}: not an IGRAW1 image (or truncated)")
+    # The image keeps the memoryview (and so the mapping) alive
+    return Image.frombuffer("RGBA", (w, h), memoryview(mm)[HEADER:], "raw", "RGBA", 0, 1)
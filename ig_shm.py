@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Zero-copy handoff of decoded images to worker processes.
+
+Passing a PIL.Image to a process pool pickles its pixels (about 4 MB of
+RGBA per 1024px slide, more for 4:5 / 9:16) and unpickles them again on
+the other side, per job. Here the parent copies the decoded pixels once
+into a named shared-memory block, and only a tiny picklable Handle (block
+name + size) travels to the worker. The worker maps the block and wraps it
+with Image.frombuffer, so it reads the same pages with no copy:
+
+    # parent
+    with ig_shm.share(bg) as shared:
+        ex.submit(render, shared.handle, ...).result()
+
+    # worker
+    with ig_shm.attached(handle) as shared:  # read-only RGBA image
+        bg = shared.copy()                  # the slide's one copy; drawing needs it anyway
+    img = compose(bg, ...)
+
+The owner (parent) unlinks the block on close; workers only map it while
+attached. The attached image is only valid inside the block: on exit it is
+closed (Image.close) before the mapping is released, so copy() whatever
+must outlive it.
+
+Call prepare() before starting the worker pool: before Python 3.13 every
+attach registers the block with multiprocessing's resource tracker, and a
+worker forked before the tracker was running starts its own, which unlinks
+(and warns about) blocks it only attached when the worker exits.
+"""
+
+from __future__ import annotations
+
+import contextlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, NamedTuple, Tuple
+
+from PIL import Image
+
+
+class Handle(NamedTuple):
+    name: str
+    size: Tuple[int, int]
+
+
+class SharedImage:
+    """An RGBA image's pixels in a shared-memory block owned by this process."""
+
+    def __init__(self, img: Image.Image) -> None:
+        img = img if img.mode == "RGBA" else img.convert("RGBA")
+        n = img.width * img.height * 4
+        self._shm = shared_memory.SharedMemory(create=True, size=n)
+        self._shm.buf[:n] = img.tobytes()
+        self.handle = Handle(self._shm.name, img.size)
+
+    def close(self) -> None:
+        """Release and unlink the block (workers still attached keep their mapping)."""
+
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "SharedImage":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def prepare() -> None:
+    """Start the resource tracker here so pool workers forked later share it."""
+
+    resource_tracker.ensure_running()
+
+
+def share(img: Image.Image) -> SharedImage:
+    return SharedImage(img)
+
+
+@contextlib.contextmanager
+def attached(handle: Handle) -> Iterator[Image.Image]:
+    """Map a shared image in this process as a read-only RGBA image (no copy), valid inside the block."""
+
+    w, h = handle.size
+    shm = shared_memory.SharedMemory(name=handle.name)
+    view = shm.buf[:w * h * 4]
+    img = Image.frombuffer("RGBA", (w, h), view, "raw", "RGBA", 0, 1)
+    try:
+        yield img
+    finally:
+        img.close()   # drops Pillow's hold on the buffer; later use of `img` raises ValueError
+        view.release()
+        shm.close()
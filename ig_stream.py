@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Streaming, memory-bounded batch rendering for Neural-Engine slides.
+
+render() consumes Jobs lazily and yields each one as soon as its PNG is
+written, so only the slides currently in flight are alive, never the
+batch:
+
+    for job, sha, changed in ig_stream.render(jobs, workers=4, budget_mb=256):
+        index.record(job.out, ...)
+
+In flight, a slide costs about BYTES_PER_PX bytes per output pixel:
+- its background (mapped from the raw cache, or shared with a worker via
+  ig_shm)
+- the compositor's working copy and the ig_compose layer
+- the RGB copy that PNG encoding makes
+
+That is about 31 MB for a 1080x1920 story. Jobs are admitted while the
+in-flight total stays within the budget, and one is always admitted.
+Peak memory therefore follows the budget, not the batch size; `workers`
+only caps how many slides render at once. Results arrive in completion
+order.
+
+  IG_RENDER_BUDGET_MB   default budget (512)
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from PIL import Image
+
+import ig_shm
+from ig_build import write_png
+from ig_trace import adopt, handoff, span, traced
+
+BYTES_PER_PX = 4 + 4 + 4 + 3   # background, working copy, compositor layer, RGB for encode
+DEFAULT_BUDGET_MB = int(os.environ.get("IG_RENDER_BUDGET_MB", "512"))
+
+
+@dataclass
+class Job:
+    out: str
+    size: Tuple[int, int]                     # output pixels (for the memory estimate)
+    render: Callable[..., Image.Image]        # render(background, *args); module-level, so workers can run it
+    background: Callable[[], Image.Image]     # called in this process when the job is admitted
+    args: Tuple[Any, ...] = ()
+    meta: Any = None                          # caller's data, passed through untouched
+
+    @property
+    def cost(self) -> int:
+        return self.size[0] * self.size[1] * BYTES_PER_PX
+
+
+def _encode(img: Image.Image, out: str) -> Tuple[str, bool]:
+    with span("slide.encode", out=out):
+        return write_png(img, out)
+
+
+def _run_shared(render: Callable[..., Image.Image], handle: ig_shm.Handle, args: Tuple[Any, ...], out: str) -> Tuple[str, bool]:
+    """Worker side: copy the shared background out, render onto the copy, encode."""
+
+    with ig_shm.attached(handle) as shared:
+        bg = shared.copy()   # releases the mapping before the render
+    img = render(bg, *args)
+    return _encode(img, out)
+
+
+def render(jobs: Iterable[Job], workers: int = 1, budget_mb: Optional[int] = None) -> Iterator[Tuple[Job, str, bool]]:
+    """Render and write `jobs`; yields (job, sha, changed) per job as it finishes."""
+
+    if workers <= 1:
+        for job in jobs:
+            img = job.render(job.background(), *job.args)
+            sha, changed = _encode(img, job.out)
+            del img
+            yield job, sha, changed
+        return
+
+    budget = (DEFAULT_BUDGET_MB if budget_mb is None else budget_mb) << 20
+    pending: Dict[Future, Tuple[Job, ig_shm.SharedImage]] = {}
+    in_flight = 0
+    todo = iter(jobs)
+    nxt = next(todo, None)
+    ig_shm.prepare()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        try:
+            while nxt is not None or pending:
+                while nxt is not None and len(pending) < workers and (not pending or in_flight + nxt.cost <= budget):
+                    shared = ig_shm.share(nxt.background())
+                    fut = ex.submit(traced, handoff(), _run_shared, nxt.render, shared.handle, nxt.args, nxt.out)
+                    pending[fut] = (nxt, shared)
+                    in_flight += nxt.cost
+                    nxt = next(todo, None)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    job, shared = pending.pop(fut)
+                    shared.close()
+                    in_flight -= job.cost
+                    (sha, changed), spans = fut.result()
+                    adopt(spans)
+                    yield job, sha, changed
+        finally:
+            for fut, (_, shared) in pending.items():
+                fut.cancel()
+                shared.close()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Cached text rasterization for Neural-Engine slides.
+
+The badge, footer, disclaimer and CTA strings are drawn at the same
+(font, size) on every slide of every generator. `draw_text()` keeps the
+FreeType coverage mask of a string once it has been seen twice and pastes
+it with the fill colour afterwards — pixel-identical to `ImageDraw.text`
+(which does the same mask paste internally) minus the shaping/raster work.
+
+- First sighting of a string: plain `draw.text` (no cache cost for one-offs)
+- Repeat sighting: rasterize once into an "L" mask, then `img.paste(fill, box, mask)`
+- Multiline strings, stroke text, non-RGB(A) targets: always `draw.text`
+
+`text_bbox()` / `wrap()` memoize the measurements layout needs (the same
+lines are measured by the pre-flight fit check, the wrap and the render),
+so laying out a slide is dictionary lookups after the first pass.
+`fit_text()` binary-searches the largest font size whose wrapped lines fit a
+box on top of those metrics, and caches the result per (fonts, text, box).
+
+Pure Pillow, no display / fontconfig needed, safe in headless cron.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+MAX_MASKS = 512
+MAX_METRICS = 8192
+MAX_FITS = 1024
+MAX_SEEN = 4096      # strings seen once (not cached yet), so a long-running daemon stays bounded
+
+_lock = threading.Lock()
+_masks: "OrderedDict[Hashable, Tuple[Image.Image, Tuple[int, int]]]" = OrderedDict()
+_seen: "OrderedDict[Hashable, None]" = OrderedDict()
+_metrics: "OrderedDict[Hashable, Tuple[int, int, int, int]]" = OrderedDict()
+_fits: "OrderedDict[Hashable, Fit]" = OrderedDict()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "fallback": 0, "metric_hits": 0, "metric_misses": 0,
+                          "fit_hits": 0, "fit_probes": 0}
+
+
+def font_key(font: Any) -> Hashable:
+    """Stable identity for a loaded font: (path, size, face index, layout)."""
+
+    path = getattr(font, "path", None)
+    if not isinstance(path, (str, bytes)):
+        # load_default() / in-memory fonts: identity is the object itself
+        return ("id", id(font))
+    return (path, getattr(font, "size", None), getattr(font, "index", 0), getattr(font, "layout_engine", None))
+
+
+def text_bbox(text: str, font: ImageFont.ImageFont) -> Tuple[int, int, int, int]:
+    """Memoized `font.getbbox(text)`."""
+
+    key = (font_key(font), text)
+    with _lock:
+        bb = _metrics.get(key)
+        if bb is not None:
+            _stats["metric_hits"] += 1
+            return bb
+    bb = tuple(int(v) for v in font.getbbox(text))
+    with _lock:
+        _stats["metric_misses"] += 1
+        _metrics[key] = bb
+        if len(_metrics) > MAX_METRICS:
+            _metrics.popitem(last=False)
+    return bb
+
+
+def text_width(text: str, font: ImageFont.ImageFont) -> int:
+    x0, _, x1, _ = text_bbox(text, font)
+    return x1 - x0
+
+
+def wrap(text: str, font: ImageFont.ImageFont, max_w: int) -> List[str]:
+    """Greedy word wrap of `text` to `max_w` px; explicit newlines are kept as breaks.
+
+    A single word wider than `max_w` gets a line of its own (callers that
+    care check the widths).
+    """
+
+    lines: List[str] = []
+    for para in text.split("\n"):
+        cur = ""
+        for word in para.split():
+            test = f"{cur} {word}" if cur else word
+            if not cur or text_width(test, font) <= max_w:
+                cur = test
+            else:
+                lines.append(cur)
+                cur = word
+        if cur:
+            lines.append(cur)
+    return lines
+
+
+@dataclass(frozen=True)
+class Fit:
+    """Result of fit_text(): the chosen size/font and the measured lines."""
+
+    size: int
+    font: Any
+    lines: Tuple[Tuple[str, int, int], ...]   # (text, width, height)
+    height: int                               # line heights + gaps
+    fits: bool                                # False: even min_size overflows
+
+
+def _measure_lines(text: str, font: Any, box_w: int, line_gap: int) -> Tuple[Tuple[Tuple[str, int, int], ...], int]:
+    lines = []
+    for line in wrap(text, font, box_w):
+        x0, y0, x1, y1 = text_bbox(line, font)
+        lines.append((line, x1 - x0, y1 - y0))
+    height = sum(h for _, _, h in lines) + line_gap * max(0, len(lines) - 1)
+    return tuple(lines), height
+
+
+def fit_text(
+    text: str,
+    font_for: Callable[[int], Any],
+    box_w: int,
+    box_h: int,
+    max_size: int,
+    min_size: int,
+    line_gap: int = 0,
+    max_lines: int = 0,
+) -> Fit:
+    """Largest size in [min_size, max_size] at which `text` wraps into (box_w, box_h).
+
+    `font_for(size)` loads the font (should be memoized by the caller);
+    explicit newlines stay line breaks; `max_lines` (0 = any) caps the wrap.
+    Binary search over sizes, each probe a wrap on memoized metrics; the
+    result is cached. When nothing fits, returns the min_size layout with
+    fits=False so the caller can report it.
+    """
+
+    key = (font_key(font_for(max_size)), font_key(font_for(min_size)), text, box_w, box_h,
+           max_size, min_size, line_gap, max_lines)
+    with _lock:
+        hit = _fits.get(key)
+        if hit is not None:
+            _fits.move_to_end(key)
+            _stats["fit_hits"] += 1
+            return hit
+
+    def probe(size: int) -> Fit:
+        font = font_for(size)
+        lines, height = _measure_lines(text, font, box_w, line_gap)
+        ok = (height <= box_h and all(w <= box_w for _, w, _ in lines)
+              and (max_lines <= 0 or len(lines) <= max_lines))
+        with _lock:
+            _stats["fit_probes"] += 1
+        return Fit(size, font, lines, height, ok)
+
+    # Most copy fits at the template size: one probe
+    best = probe(max_size)
+    lo, hi = min_size, max_size - 1
+    if best.fits:
+        lo = hi + 1
+    else:
+        best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        f = probe(mid)
+        if f.fits:
+            best, lo = f, mid + 1
+        else:
+            hi = mid - 1
+    if best is None:
+        best = probe(min_size)
+
+    with _lock:
+        _fits[key] = best
+        if len(_fits) > MAX_FITS:
+            _fits.popitem(last=False)
+    return best
+
+
+def _rasterize(text: str, font: ImageFont.ImageFont) -> Tuple[Image.Image, Tuple[int, int]]:
+    x0, y0, x1, y1 = font.getbbox(text)
+    mask = Image.new("L", (max(1, x1 - x0), max(1, y1 - y0)), 0)
+    ImageDraw.Draw(mask).text((-x0, -y0), text, font=font, fill=255)
+    return mask, (x0, y0)
+
+
+def get_mask(text: str, font: ImageFont.ImageFont) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Return (coverage mask, bbox offset) for `text`, rasterizing on a miss."""
+
+    key = (font_key(font), text)
+    with _lock:
+        hit = _masks.get(key)
+        if hit is not None:
+            _masks.move_to_end(key)
+            _stats["hits"] += 1
+            return hit
+    entry = _rasterize(text, font)
+    with _lock:
+        _stats["misses"] += 1
+        _masks[key] = entry
+        while len(_masks) > MAX_MASKS:
+            _masks.popitem(last=False)
+    return entry
+
+
+def _see(key: Hashable) -> None:
+    """Mark `key` as seen (LRU, at most MAX_SEEN keys); call with _lock held."""
+
+    _seen[key] = None
+    _seen.move_to_end(key)
+    while len(_seen) > MAX_SEEN:
+        _seen.popitem(last=False)
+
+
+def draw_text(
+    img: Image.Image,
+    xy: Tuple[int, int],
+    text: str,
+    font: ImageFont.ImageFont,
+    fill: Any,
+    draw: Optional[ImageDraw.ImageDraw] = None,
+) -> None:
+    """Drop-in for `draw.text(xy, text, font=font, fill=fill)` with mask caching."""
+
+    if "\n" in text or img.mode not in ("RGB", "RGBA") or not isinstance(fill, tuple):
+        with _lock:
+            _stats["fallback"] += 1
+        (draw or ImageDraw.Draw(img)).text(xy, text, font=font, fill=fill)
+        return
+
+    key = (font_key(font), text)
+    with _lock:
+        first = key not in _masks and key not in _seen
+        if first:
+            _stats["fallback"] += 1
+        _see(key)
+    if first:
+        (draw or ImageDraw.Draw(img)).text(xy, text, font=font, fill=fill)
+        return
+
+    mask, (ox, oy) = get_mask(text, font)
+    x, y = int(xy[0]) + ox, int(xy[1]) + oy
+    if len(fill) == 3 and img.mode == "RGBA":
+        fill = (*fill, 255)
+    img.paste(fill, (x, y, x + mask.width, y + mask.height), mask)
+
+
+def prewarm(font: ImageFont.ImageFont, *texts: str) -> None:
+    """Rasterize known boilerplate up front (e.g. in a long-running process)."""
+
+    for t in texts:
+        key = (font_key(font), t)
+        with _lock:
+            _see(key)
+        get_mask(t, font)
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats, entries=len(_masks), metrics=len(_metrics), fits=len(_fits))
+
+
+def clear() -> None:
+    with _lock:
+        _masks.clear()
+        _metrics.clear()
+        _fits.clear()
+        _seen.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Stage timing / tracing for Neural-Engine media jobs.
+
+- `span("fal.inference", model=...)` is a context manager that times one stage
+- `run("gen_ig_carousel_daily_fal", date=...)` wraps a whole job and, when it
+  ends (even via sys.exit), appends ONE JSON line to $IG_TRACE_FILE:
+    {"run": {...per-stage totals...}, "resourceSpans": [...OTLP JSON...]}
+- Spans belong to the run of the current context (contextvars), so jobs in
+  different threads (ig_daemon, ig_queue) keep separate reports. Spans nest
+  (parentSpanId) and share the run's traceId. Threads started inside a run
+  join it if started with contextvars.copy_context().run (see ig_fal).
+- Process-pool workers have no run of their own: submit `traced(handoff(),
+  fn, *args)`; it returns (result, spans), and `adopt(spans)` files the
+  worker's spans under the submitting span (ig_stream, ig_animate)
+
+Nothing is written unless IG_TRACE_FILE is set, so cron opts in with e.g.
+  IG_TRACE_FILE=logs/ig-runs.jsonl python3 gen_ig_carousel_daily_fal.py ...
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import contextvars
+import datetime as dt
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.Lock()   # serializes report-file appends
+
+# Spans recorded outside any run() are never flushed; long-lived processes
+# (ig_queue work --forever, ig_daemon) keep only the most recent ones
+DEFAULT_KEEP = 1000
+
+
+class _Run:
+    """Spans collected for one traced job."""
+
+    def __init__(self, trace_id: Optional[str] = None, keep: Optional[int] = None) -> None:
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.lock = threading.Lock()
+        self.spans: Deque[Dict[str, Any]] = collections.deque(maxlen=keep)
+
+
+class Handoff(NamedTuple):
+    """What a worker process needs to add spans to the parent's trace (picklable)."""
+
+    trace_id: str
+    parent_span_id: str
+
+
+_default = _Run(keep=DEFAULT_KEEP)   # spans recorded outside any run()
+_run: contextvars.ContextVar[_Run] = contextvars.ContextVar("ig_trace_run", default=_default)
+_parent: contextvars.ContextVar[str] = contextvars.ContextVar("ig_trace_parent", default="")
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time a stage. Yields the attribute dict so callers can add results."""
+
+    current = _run.get()
+    rec: Dict[str, Any] = {
+        "traceId": current.trace_id,
+        "spanId": uuid.uuid4().hex[:16],
+        "parentSpanId": _parent.get(),
+        "name": name,
+        "startTimeUnixNano": time.time_ns(),
+        "attributes": dict(attrs),
+        "status": "OK",
+    }
+    t0 = time.perf_counter()
+    token = _parent.set(rec["spanId"])
+    try:
+        yield rec["attributes"]
+    except BaseException as e:
+        rec["status"] = "ERROR"
+        rec["attributes"]["error"] = repr(e)[:200]
+        raise
+    finally:
+        _parent.reset(token)
+        rec["endTimeUnixNano"] = time.time_ns()
+        rec["durationMs"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        with current.lock:
+            current.spans.append(rec)
+
+
+def reset() -> None:
+    """Drop the current run's spans and start a new trace id."""
+
+    current = _run.get()
+    with current.lock:
+        current.spans.clear()
+        current.trace_id = uuid.uuid4().hex
+
+
+def handoff() -> Handoff:
+    """The current trace and span, for a worker process to record under."""
+
+    return Handoff(_run.get().trace_id, _parent.get())
+
+
+def traced(ctx: Handoff, fn: Callable[..., T], *args: Any) -> Tuple[T, List[Dict[str, Any]]]:
+    """Worker side: run fn(*args) under the parent's trace; returns (result, spans)."""
+
+    collector = _Run(ctx.trace_id)
+    run_token, parent_token = _run.set(collector), _parent.set(ctx.parent_span_id)
+    try:
+        result = fn(*args)
+    finally:
+        _parent.reset(parent_token)
+        _run.reset(run_token)
+    return result, list(collector.spans)
+
+
+def adopt(spans: List[Dict[str, Any]]) -> None:
+    """Parent side: add spans a worker returned from traced() to the current run."""
+
+    current = _run.get()
+    with current.lock:
+        current.spans.extend(spans)
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def report(service: str, **attrs: Any) -> Dict[str, Any]:
+    """Build the run report: per-stage totals + OTLP-shaped spans."""
+
+    current = _run.get()
+    with current.lock:
+        spans = list(current.spans)
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        st = stages.setdefault(s["name"], {"count": 0, "totalMs": 0.0, "maxMs": 0.0, "errors": 0})
+        st["count"] += 1
+        st["totalMs"] = round(st["totalMs"] + s["durationMs"], 3)
+        st["maxMs"] = max(st["maxMs"], s["durationMs"])
+        if s["status"] != "OK":
+            st["errors"] += 1
+
+    roots = [s for s in spans if not s["parentSpanId"]]
+    start = min((s["startTimeUnixNano"] for s in spans), default=time.time_ns())
+    end = max((s["endTimeUnixNano"] for s in spans), default=start)
+
+    otlp_spans = [
+        {
+            "traceId": s["traceId"],
+            "spanId": s["spanId"],
+            "parentSpanId": s["parentSpanId"],
+            "name": s["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(s["startTimeUnixNano"]),
+            "endTimeUnixNano": str(s["endTimeUnixNano"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+            "status": {"code": 1 if s["status"] == "OK" else 2},
+        }
+        for s in spans
+    ]
+
+    return {
+        "run": {
+            "service": service,
+            "traceId": current.trace_id,
+            "start": dt.datetime.fromtimestamp(start / 1e9).isoformat(timespec="seconds"),
+            "durationMs": round((end - start) / 1e6, 3),
+            "ok": all(s["status"] == "OK" for s in roots),
+            "attributes": attrs,
+            "stages": stages,
+        },
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "ig_trace"}, "spans": otlp_spans}],
+            }
+        ],
+    }
+
+
+def flush(service: str, path: Optional[str] = None, **attrs: Any) -> Optional[str]:
+    """Append one run report line to `path` (default $IG_TRACE_FILE)."""
+
+    path = path or os.environ.get("IG_TRACE_FILE")
+    if not path:
+        return None
+    line = json.dumps(report(service, **attrs), separators=(",", ":"))
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    with _lock, open(path, "a") as f:
+        f.write(line + "\n")
+    return path
+
+
+@contextlib.contextmanager
+def run(service: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Trace one whole job; the report is flushed when the block exits."""
+
+    run_token, parent_token = _run.set(_Run()), _parent.set("")
+    try:
+        with span(service, **attrs) as a:
+            yield a
+    finally:
+        try:
+            flush(service, **attrs)
+        finally:
+            _parent.reset(parent_token)
+            _run.reset(run_token)
+
+
+def main():
+    """Summarize a run-report JSONL file: per-stage count / p50 / p95 / max."""
+
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", nargs="?", default=os.environ.get("IG_TRACE_FILE", "logs/ig-runs.jsonl"))
+    ap.add_argument("--service", help="Only runs of this service")
+    ap.add_argument("--since", help="Only runs starting on/after YYYY-MM-DD")
+    args = ap.parse_args()
+
+    per_stage: Dict[str, List[float]] = {}
+    runs = 0
+    with open(args.path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            r = json.loads(line)["run"]
+            if args.service and r["service"] != args.service:
+                continue
+            if args.since and r["start"][:10] < args.since:
+                continue
+            runs += 1
+            for name, st in r["stages"].items():
+                per_stage.setdefault(name, []).append(st["totalMs"] / max(st["count"], 1))
+
+    print(f"{runs} runs")
+    for name, vals in sorted(per_stage.items(), key=lambda kv: -max(kv[1])):
+        vals.sort()
+        p50 = vals[len(vals) // 2]
+        p95 = vals[min(len(vals) - 1, int(len(vals) * 0.95))]
+        print(f"  {name:32s} n={len(vals):4d}  p50={p50:9.1f}ms  p95={p95:9.1f}ms  max={vals[-1]:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Header-only pre-flight check of post images against Instagram's specs.
+
+A bad image otherwise only shows up as container status ERROR, after
+publish_ig_* has created containers and polled for up to two minutes.
+validate() reads just enough of each image to know its format and
+dimensions and checks it before any Graph call. It uses Pillow's lazy
+Image.open, which parses the header without decoding pixels.
+
+Where the bytes come from:
+- repo paths, and public URLs that point at a file in this checkout
+  (ig_graph.RAW_BASE), are read locally. A repo path missing from this
+  checkout is checked at its RAW_BASE URL, which is what Graph fetches.
+- other URLs get an HTTP Range request for the first HEAD_BYTES. More is
+  fetched only if the header is longer (e.g. a big EXIF block). The file
+  size comes from Content-Range / Content-Length.
+
+Rules for feed posts:
+- errors: JPEG or PNG only, at most MAX_BYTES, aspect ratio between 4:5
+  and 1.91:1 (9:16 story renders are rejected), a carousel has 3–10 images
+- warnings: a width outside 320–1440 px (Instagram only rescales it);
+  carousel images whose aspect ratio differs from the first one's
+  (Instagram crops them to it)
+
+  python3 ig_validate.py [--carousel] <path|url> ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from ig_graph import RAW_BASE
+from ig_trace import span
+
+FORMATS = ("JPEG", "PNG")
+MAX_BYTES = 8 * 1024 * 1024
+MIN_RATIO, MAX_RATIO = 4 / 5, 1.91
+MIN_WIDTH, MAX_WIDTH = 320, 1440
+CAROUSEL_MIN, CAROUSEL_MAX = 3, 10
+HEAD_BYTES = 64 * 1024       # first Range request; enough for PNG and almost every JPEG
+MAX_HEAD_BYTES = 1024 * 1024
+TIMEOUT_S = 10
+RATIO_EPS = 0.005
+
+
+class ValidationError(ValueError):
+    def __init__(self, problems: List[str]) -> None:
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    source: str
+    format: str
+    width: int
+    height: int
+    bytes: Optional[int]   # None if the server did not say
+
+    @property
+    def ratio(self) -> float:
+        return self.width / self.height
+
+
+def local_path(src: str) -> Optional[str]:
+    """The file in this checkout `src` refers to (repo path or RAW_BASE URL), if any."""
+
+    if src.startswith(("http://", "https://")):
+        prefix = RAW_BASE + "/"
+        if src.startswith(prefix) and os.path.isfile(src[len(prefix):]):
+            return src[len(prefix):]
+        return None
+    for path in (src, src.lstrip("/")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _open_header(data: io.BufferedIOBase, source: str, size: Optional[int]) -> ImageInfo:
+    with Image.open(data) as im:   # parses the header only
+        return ImageInfo(source, im.format or "?", im.width, im.height, size)
+
+
+def _total_bytes(r) -> Optional[int]:
+    cr = r.headers.get("Content-Range", "")
+    if "/" in cr and cr.rsplit("/", 1)[1].isdigit():
+        return int(cr.rsplit("/", 1)[1])
+    if r.status_code == 200 and r.headers.get("Content-Length", "").isdigit():
+        return int(r.headers["Content-Length"])
+    return None
+
+
+def _probe_url(url: str) -> ImageInfo:
+    import requests
+
+    from ig_graph import session
+
+    want = HEAD_BYTES
+    while True:
+        try:
+            r = session().get(url, headers={"Range": f"bytes=0-{want - 1}"}, stream=True, timeout=TIMEOUT_S)
+        except requests.RequestException as e:
+            raise ValidationError([f"{url}: not reachable ({e})"]) from None
+        try:
+            if r.status_code not in (200, 206):
+                raise ValidationError([f"{url}: HTTP {r.status_code} (not publicly reachable yet?)"])
+            head = bytearray()
+            for chunk in r.iter_content(16384):
+                head += chunk
+                if len(head) >= want:
+                    break
+            total = _total_bytes(r)
+        finally:
+            r.close()
+        try:
+            return _open_header(io.BytesIO(bytes(head)), url, total)
+        except OSError as e:
+            # Header longer than what we fetched: ask for more, up to a limit
+            if len(head) < want or want >= MAX_HEAD_BYTES:
+                raise ValidationError([f"{url}: not a readable image ({e})"]) from None
+            want = min(want * 4, MAX_HEAD_BYTES)
+
+
+def probe(src: str) -> ImageInfo:
+    """Format, dimensions and byte size of `src` from its header; ValidationError if unreadable."""
+
+    path = local_path(src)
+    if path is not None:
+        try:
+            with open(path, "rb") as f:
+                return _open_header(f, src, os.fstat(f.fileno()).st_size)
+        except OSError as e:
+            raise ValidationError([f"{src}: not a readable image ({e})"]) from None
+    if src.startswith(("http://", "https://")):
+        return _probe_url(src)
+    # Not in this checkout: check what Graph will fetch, the asset at its public URL
+    from ig_graph import to_public_url
+
+    try:
+        return replace(_probe_url(to_public_url(src)), source=src)
+    except ValidationError as e:
+        raise ValidationError([f"{src}: file not found, and not at its public URL ({'; '.join(e.problems)})"]) from None
+
+
+def check(infos: Sequence[ImageInfo], carousel: bool, count: Optional[int] = None) -> Tuple[List[str], List[str]]:
+    """(errors, warnings) for the probed images of one post of `count` images (default: all probed)."""
+
+    errors: List[str] = []
+    warnings: List[str] = []
+    count = len(infos) if count is None else count
+    if carousel and not (CAROUSEL_MIN <= count <= CAROUSEL_MAX):
+        errors.append(f"Carousel must have {CAROUSEL_MIN}–{CAROUSEL_MAX} images (got {count}).")
+    for i in infos:
+        name = f"{i.source} ({i.format} {i.width}x{i.height})"
+        if i.format not in FORMATS:
+            errors.append(f"{name}: format must be {' or '.join(FORMATS)}")
+        if i.bytes is not None and i.bytes > MAX_BYTES:
+            errors.append(f"{name}: {i.bytes / 2**20:.1f} MB is over the {MAX_BYTES >> 20} MB limit")
+        if not MIN_RATIO - RATIO_EPS <= i.ratio <= MAX_RATIO + RATIO_EPS:
+            errors.append(f"{name}: aspect ratio {i.ratio:.3f} is outside 4:5–1.91:1")
+        if not MIN_WIDTH <= i.width <= MAX_WIDTH:
+            warnings.append(f"{name}: width outside {MIN_WIDTH}–{MAX_WIDTH} px; Instagram will rescale it")
+    if carousel and infos:
+        first = infos[0]
+        for i in infos[1:]:
+            if abs(i.ratio - first.ratio) > RATIO_EPS:
+                warnings.append(f"{i.source}: aspect ratio {i.ratio:.3f} differs from the first image's "
+                                f"{first.ratio:.3f}; Instagram crops carousel items to the first")
+    return errors, warnings
+
+
+def validate(sources: Sequence[str], carousel: bool = False) -> Tuple[List[ImageInfo], List[str], List[str]]:
+    """Probe and check every image of a post: (infos, errors, warnings)."""
+
+    with span("validate", images=len(sources), carousel=carousel) as a:
+        remote = [s for s in sources if local_path(s) is None]
+
+        def safe_probe(src: str) -> object:
+            try:
+                return probe(src)
+            except ValidationError as e:
+                return e
+
+        if len(remote) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(remote), CAROUSEL_MAX)) as ex:
+                results = list(ex.map(safe_probe, sources))
+        else:
+            results = [safe_probe(s) for s in sources]
+        infos = [r for r in results if isinstance(r, ImageInfo)]
+        errors = [p for r in results if isinstance(r, ValidationError) for p in r.problems]
+        more, warnings = check(infos, carousel, len(sources))
+        errors += more
+        a["errors"] = len(errors)
+        a["remote"] = len(remote)
+    return infos, errors, warnings
+
+
+def require(sources: Sequence[str], carousel: bool = False) -> List[ImageInfo]:
+    """validate(); warnings go to stderr, errors raise ValidationError."""
+
+    infos, errors, warnings = validate(sources, carousel)
+    for w in warnings:
+        print(f"Warning: {w}", file=sys.stderr)
+    if errors:
+        raise ValidationError(errors)
+    return infos
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("images", nargs="+", help="Repo paths or public URLs")
+    ap.add_argument("--carousel", action="store_true", help="Also apply the carousel rules")
+    args = ap.parse_args(argv)
+
+    infos, errors, warnings = validate(args.images, args.carousel)
+    for i in infos:
+        size = f"{i.bytes / 1024:.0f} KB" if i.bytes is not None else "size unknown"
+        print(f"{i.source}: {i.format} {i.width}x{i.height} ({i.ratio:.3f}), {size}")
+    for w in warnings:
+        print(f"Warning: {w}", file=sys.stderr)
+    for e in errors:
+        print(f"Error: {e}", file=sys.stderr)
+    return 2 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,64 +12,49 @@ Notes:
 - Creates one media container per image with is_carousel_item=true
 - Creates a parent container with media_type=CAROUSEL and children=<ids>
 - Publishes the parent container
+- First checks every image's header against the feed rules (ig_validate:
+  format, size, aspect ratio, 3–10 images) and exits 2 on a violation,
+  before any Graph call
+- Rate/quota limits don't fail the post: it is queued in ig_queue for the
+  earliest legal time (QUEUED:<job id>), unless --no-queue is given.
+- Published posts are recorded for `ig_insights.py sync` (reach/engagement
+  per theme and variant).
+- Importable: `publish(caption, urls)`; no env reads, HTTP imports or network
+  calls happen at import time
 """
 
-import os
+import argparse
 import sys
-import time
-import requests
-
-TOKEN = os.environ["META_ACCESS_TOKEN"]
-IG_ID = os.environ["INSTAGRAM_IG_BUSINESS_ID"]
-BASE = "https://graph.facebook.com/v22.0"
-RAW_BASE = "https://cdn.jsdelivr.net/gh/Navid-Aghaebrahim/neural-engine-media@main"
-
-
-def api(method: str, path: str, **kwargs):
-    url = f"{BASE}/{path}"
-    params = kwargs.setdefault("params", {})
-    params["access_token"] = TOKEN
-    r = getattr(requests, method)(url, **kwargs)
-    data = r.json()
-    if "error" in data:
-        print(f"API ERROR: {data['error']}", file=sys.stderr)
-        sys.exit(1)
-    return data
-
-
-def wait_container(container_id: str, label: str, max_attempts: int = 24, sleep_s: int = 5):
-    for attempt in range(max_attempts):
-        status = api("get", container_id, params={"fields": "status_code"})
-        sc = status.get("status_code", "UNKNOWN")
-        print(f"  {label} status_code: {sc}")
-        if sc == "FINISHED":
-            return
-        if sc == "ERROR":
-            print(f"{label} container error — aborting.", file=sys.stderr)
-            sys.exit(1)
-        time.sleep(sleep_s)
-    print(f"{label} container never became FINISHED.", file=sys.stderr)
-    sys.exit(1)
-
-
-def to_public_url(url: str) -> str:
-    if url.startswith("http"):
-        return url
-    path = url.lstrip("/")
-    return f"{RAW_BASE}/{path}"
-
-
-def main():
-    if len(sys.argv) < 4:
-        print(__doc__.strip(), file=sys.stderr)
-        sys.exit(2)
-
-    caption = sys.argv[1]
-    image_urls = [to_public_url(u) for u in sys.argv[2:]]
-
-    if not (3 <= len(image_urls) <= 10):
-        print("Carousel must have 3–10 images.", file=sys.stderr)
-        sys.exit(2)
+from typing import Dict, List, Optional
+
+from ig_graph import (
+    GraphError,
+    api,
+    ig_id,
+    publish_container,
+    require_publish_slot,
+    to_public_url,
+    wait_container,
+)
+from ig_trace import run
+
+
+def publish(caption: str, image_urls: List[str]) -> Dict[str, str]:
+    """Create child containers, the parent CAROUSEL container, and publish it.
+
+    Raises ig_validate.ValidationError (before any Graph call) if an image
+    breaks the carousel rules, GraphError on any API / container failure;
+    `retry_at` is set on the latter when the post was blocked by rate limits
+    or the publishing quota.
+    """
+
+    # Header-only image checks: fail in milliseconds, not after container polling
+    from ig_validate import require
+
+    require(image_urls, carousel=True)
+
+    # Don't create containers for a post the quota won't let through
+    require_publish_slot()
 
     # Step 1 — create child containers
     children = []
@@ -77,7 +62,7 @@ def main():
         print(f"Creating child container {i}/{len(image_urls)}...")
         child = api(
             "post",
-            f"{IG_ID}/media",
+            f"{ig_id()}/media",
             data={
                 "image_url": url,
                 "is_carousel_item": "true",
@@ -92,7 +77,7 @@ def main():
     print("Creating parent carousel container...")
     parent = api(
         "post",
-        f"{IG_ID}/media",
+        f"{ig_id()}/media",
         data={
             "media_type": "CAROUSEL",
             "children": ",".join(children),
@@ -105,8 +90,7 @@ def main():
 
     # Step 3 — publish
     print("Publishing...")
-    pub = api("post", f"{IG_ID}/media_publish", data={"creation_id": parent_id})
-    media_id = pub["id"]
+    media_id = publish_container(parent_id)
     print(f"Published! media_id={media_id}")
 
     # Step 4 — permalink
@@ -115,6 +99,43 @@ def main():
     print(f"MEDIA_ID:{media_id}")
     print(f"PERMALINK:{info.get('permalink','')}")
 
+    # Keep the post (and the build-index entry it came from) for ig_insights sync
+    from ig_insights import record_post
+
+    record_post(media_id, info.get("permalink", ""), "carousel", image_urls, caption)
+    return {"media_id": media_id, "permalink": info.get("permalink", "")}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("caption")
+    ap.add_argument("images", nargs="+", help="Public image URLs or repo-relative paths (3–10)")
+    ap.add_argument("--no-queue", action="store_true",
+                    help="Exit 1 on rate/quota limits instead of queueing the post in ig_queue")
+    args = ap.parse_args(argv)
+
+    from ig_validate import ValidationError
+
+    image_urls = [to_public_url(u) for u in args.images]
+
+    with run("publish_ig_carousel", images=len(image_urls)):
+        try:
+            publish(args.caption, image_urls)
+        except ValidationError as e:
+            for p in e.problems:
+                print(p, file=sys.stderr)
+            return 2
+        except GraphError as e:
+            print(str(e), file=sys.stderr)
+            if e.retry_at is None or args.no_queue:
+                return 1
+            import ig_queue
+
+            jid = ig_queue.enqueue(ig_queue.connect(), "publish_carousel",
+                                   {"caption": args.caption, "images": image_urls}, not_before=e.retry_at)
+            print(f"QUEUED:{jid} (run `python3 ig_queue.py work` to publish at the earliest legal time)")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
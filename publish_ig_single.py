@@ -8,73 +8,105 @@ Notes:
 - Instagram Graph requires a PUBLICLY-REACHABLE URL.
 - If you pass a repo-relative path like: assets/ig/2026-02-28-PM-foo.png
   this script will convert it to a raw GitHub URL on the main branch.
+- The image header is checked against the feed rules first (ig_validate:
+  format, size, aspect ratio); a violation exits 2 before any Graph call.
+- Rate/quota limits don't fail the post: it is queued in ig_queue for the
+  earliest legal time (QUEUED:<job id>), unless --no-queue is given.
+- Published posts are recorded for `ig_insights.py sync` (reach/engagement
+  per theme and variant).
+- Importable: `publish(image, caption)` does the work; nothing runs (and no
+  network/HTTP library is touched) at import time.
 """
 
-import os
+import argparse
 import sys
-import time
-from typing import Final
-
-import requests
-
-TOKEN: Final[str] = os.environ["META_ACCESS_TOKEN"]
-IG_ID: Final[str] = os.environ["INSTAGRAM_IG_BUSINESS_ID"]
-BASE: Final[str] = "https://graph.facebook.com/v22.0"
-RAW_BASE: Final[str] = "https://cdn.jsdelivr.net/gh/Navid-Aghaebrahim/neural-engine-media@main"
-
-
-def api(method, path, **kwargs):
-    url = f"{BASE}/{path}"
-    kwargs.setdefault("params", {})["access_token"] = TOKEN
-    r = getattr(requests, method)(url, **kwargs)
-    data = r.json()
-    if "error" in data:
-        print(f"API ERROR: {data['error']}", file=sys.stderr)
-        sys.exit(1)
-    return data
-
-
-def to_public_url(image_url_or_path: str) -> str:
-    if image_url_or_path.startswith("http://") or image_url_or_path.startswith("https://"):
-        return image_url_or_path
-    p = image_url_or_path.lstrip("/")
-    return f"{RAW_BASE}/{p}"
-
-
-image_url = to_public_url(sys.argv[1])
-caption = sys.argv[2]
-
-# Step 1 — create container
-print("Creating media container...")
-container = api("post", f"{IG_ID}/media",
-                data={"image_url": image_url, "caption": caption})
-container_id = container["id"]
-print(f"Container id: {container_id}")
-
-# Step 2 — wait for container to be ready
-for attempt in range(12):
-    status = api("get", container_id, params={"fields": "status_code"})
-    sc = status.get("status_code", "UNKNOWN")
-    print(f"  status_code: {sc}")
-    if sc == "FINISHED":
-        break
-    if sc == "ERROR":
-        print("Container error — aborting.", file=sys.stderr)
-        sys.exit(1)
-    time.sleep(5)
-else:
-    print("Container never became FINISHED.", file=sys.stderr)
-    sys.exit(1)
-
-# Step 3 — publish
-print("Publishing...")
-pub = api("post", f"{IG_ID}/media_publish",
-          data={"creation_id": container_id})
-media_id = pub["id"]
-print(f"Published! media_id={media_id}")
-
-# Step 4 — get permalink
-info = api("get", media_id, params={"fields": "permalink"})
-print(f"Permalink: {info.get('permalink','(n/a)')}")
-print(f"MEDIA_ID:{media_id}")
-print(f"PERMALINK:{info.get('permalink','')}")
+from typing import Dict, List, Optional
+
+from ig_graph import (
+    GraphError,
+    api,
+    ig_id,
+    publish_container,
+    require_publish_slot,
+    to_public_url,
+    wait_container,
+)
+from ig_trace import run
+
+
+def publish(image_url_or_path: str, caption: str) -> Dict[str, str]:
+    """Create, wait for and publish one image container.
+
+    Raises ig_validate.ValidationError (before any Graph call) if the image
+    breaks the feed rules, GraphError otherwise; `retry_at` is set on the
+    latter when the post was blocked by rate limits or the publishing quota.
+    """
+
+    # Header-only image checks: fail in milliseconds, not after container polling
+    from ig_validate import require
+
+    require([image_url_or_path])
+    image_url = to_public_url(image_url_or_path)
+
+    # Don't create containers for a post the quota won't let through
+    require_publish_slot()
+
+    # Step 1 — create container
+    print("Creating media container...")
+    container = api("post", f"{ig_id()}/media",
+                    data={"image_url": image_url, "caption": caption})
+    container_id = container["id"]
+    print(f"Container id: {container_id}")
+
+    # Step 2 — wait for container to be ready
+    wait_container(container_id, label="single", max_attempts=12, sleep_s=5)
+
+    # Step 3 — publish
+    print("Publishing...")
+    media_id = publish_container(container_id)
+    print(f"Published! media_id={media_id}")
+
+    # Step 4 — get permalink
+    info = api("get", media_id, params={"fields": "permalink"})
+    print(f"Permalink: {info.get('permalink','(n/a)')}")
+    print(f"MEDIA_ID:{media_id}")
+    print(f"PERMALINK:{info.get('permalink','')}")
+
+    # Keep the post (and the build-index entry it came from) for ig_insights sync
+    from ig_insights import record_post
+
+    record_post(media_id, info.get("permalink", ""), "single", [image_url_or_path], caption)
+    return {"media_id": media_id, "permalink": info.get("permalink", "")}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("image", help="Public image URL or repo-relative path")
+    ap.add_argument("caption")
+    ap.add_argument("--no-queue", action="store_true",
+                    help="Exit 1 on rate/quota limits instead of queueing the post in ig_queue")
+    args = ap.parse_args(argv)
+
+    from ig_validate import ValidationError
+
+    with run("publish_ig_single"):
+        try:
+            publish(args.image, args.caption)
+        except ValidationError as e:
+            for p in e.problems:
+                print(p, file=sys.stderr)
+            return 2
+        except GraphError as e:
+            print(str(e), file=sys.stderr)
+            if e.retry_at is None or args.no_queue:
+                return 1
+            import ig_queue
+
+            jid = ig_queue.enqueue(ig_queue.connect(), "publish_single",
+                                   {"image": args.image, "caption": args.caption}, not_before=e.retry_at)
+            print(f"QUEUED:{jid} (run `python3 ig_queue.py work` to publish at the earliest legal time)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())